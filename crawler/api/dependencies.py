@@ -12,11 +12,11 @@ from typing import Generator, Annotated
 from fastapi import Depends
 from sqlmodel import Session
 
-from crawler.database.connection import get_engine
+from crawler.database.connection import READ, get_engine
 
 def get_db_session() -> Generator[Session, None, None]:
-    """為 API 端點提供一個資料庫會話的依賴。"""
-    with Session(get_engine()) as session:
+    """為 API 端點提供一個資料庫會話的依賴；使用讀取引擎，可指向唯讀副本 (MYSQL_READ_HOST)。"""
+    with Session(get_engine(READ)) as session:
         yield session
 
 # 創建一個 Annotated 類型別名，使在 API 端點中引用依賴更簡潔
@@ -5,14 +5,28 @@
 它提供了多個端點 (endpoints)，允許前端應用或其他後端服務查詢和過濾
 已經被爬蟲系統收集並標準化後的職缺數據。
 """
+import base64
+import json
+from datetime import datetime
 from fastapi import FastAPI, Query, HTTPException
-from sqlmodel import select, func
-from typing import List, Optional, Dict, Any
+from sqlalchemy import and_, or_
+from sqlalchemy.dialects.mysql import match
+from sqlmodel import SQLModel, select, func
+from typing import List, Optional, Dict, Any, Tuple
 
 from crawler.api.dependencies import DBSession
+from crawler.database.connection import get_pool_stats
 from crawler.database.schema import Job, Url
 from crawler.enums import SourcePlatform, CrawlStatus
 
+# MySQL ngram 全文解析器的預設 ngram_token_size；更短的關鍵字無法命中全文索引
+NGRAM_TOKEN_SIZE = 2
+
+class JobPage(SQLModel):
+    """游標分頁的響應：`next_cursor` 為 None 表示已是最後一頁。"""
+    items: List[Job]
+    next_cursor: Optional[str] = None
+
 app = FastAPI(
     title="多平台職缺數據 API",
     version="2.0.0",
@@ -24,29 +38,89 @@ def read_root():
     """返回一個歡迎信息，可用於健康檢查。"""
     return {"message": "歡迎使用多平台職缺數據 API！"}
 
+def _filter_jobs(stmt, q: Optional[str], boolean_mode: bool, platform: Optional[SourcePlatform]) -> Tuple[Any, Any]:
+    """
+    套用關鍵字與平台過濾，返回 `(stmt, relevance)`；
+    relevance 為全文搜索的相關度表達式，未使用全文索引時為 None。
+    """
+    relevance = None
+    q = q.strip() if q else q
+    if q and len(q) >= NGRAM_TOKEN_SIZE:
+        # 使用 ngram 全文索引 (ft_jobs_text) 搜索
+        relevance = match(Job.title, Job.company_name, Job.description, against=q)
+        if boolean_mode:
+            relevance = relevance.in_boolean_mode()
+        stmt = stmt.where(relevance)
+    elif q:
+        # 單字關鍵字短於 ngram 長度，退回對標題與公司名稱的 LIKE 搜索
+        stmt = stmt.where(Job.title.contains(q) | Job.company_name.contains(q))
+    
+    if platform:
+        stmt = stmt.where(Job.source_platform == platform)
+    return stmt, relevance
+
+def encode_cursor(job: Job) -> str:
+    """將頁面最後一筆職缺的 (updated_at, id) 編碼為不透明的游標。"""
+    raw = json.dumps([job.updated_at.isoformat(), job.id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """`encode_cursor` 的逆操作；游標無效時返回 400。"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, job_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), int(job_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="無效的分頁游標。") from e
+
 @app.get("/jobs/", response_model=List[Job], tags=["職缺數據"], summary="獲取職缺列表")
 def get_jobs(
     session: DBSession,
-    q: Optional[str] = Query(None, description="對職缺標題或公司名稱進行關鍵字搜索。"),
+    q: Optional[str] = Query(None, description="對職缺標題、公司名稱與職缺描述進行全文搜索，結果依相關度排序。"),
+    boolean_mode: bool = Query(False, description="以 MySQL 布林模式解讀 q，支援 +必含、-排除、\"片語\" 等運算子。"),
     platform: Optional[SourcePlatform] = Query(None, description="依平台來源進行過濾。"),
-    skip: int = Query(0, ge=0, description="跳過的紀錄數量，用於分頁。"),
+    skip: int = Query(0, ge=0, description="跳過的紀錄數量 (OFFSET 分頁，僅為向後兼容保留；深度分頁請改用 /jobs/page)。"),
     limit: int = Query(100, ge=1, le=1000, description="返回的最大紀錄數量。"),
 ) -> List[Job]:
     """
     從資料庫中檢索一個經過分頁、過濾和排序的職缺列表。
     """
-    stmt = select(Job)
-    
-    if q:
-        # 使用 OR 條件進行多字段搜索
-        stmt = stmt.where(Job.title.contains(q) | Job.company_name.contains(q))
-    
-    if platform:
-        stmt = stmt.where(Job.source_platform == platform)
+    stmt, relevance = _filter_jobs(select(Job), q, boolean_mode, platform)
+    order_by = [Job.updated_at.desc(), Job.id.desc()]
+    if relevance is not None:
+        # 全文搜索時以相關度排序
+        order_by.insert(0, relevance.desc())
 
     return session.exec(
-        stmt.offset(skip).limit(limit).order_by(Job.updated_at.desc())
+        stmt.offset(skip).limit(limit).order_by(*order_by)
+    ).all()
+
+@app.get("/jobs/page", response_model=JobPage, tags=["職缺數據"], summary="以游標分頁獲取職缺列表")
+def get_jobs_page(
+    session: DBSession,
+    cursor: Optional[str] = Query(None, description="上一頁響應中的 next_cursor；省略時從最新的職缺開始。"),
+    q: Optional[str] = Query(None, description="對職缺標題、公司名稱與職缺描述進行全文搜索 (結果仍依更新時間排序)。"),
+    boolean_mode: bool = Query(False, description="以 MySQL 布林模式解讀 q。"),
+    platform: Optional[SourcePlatform] = Query(None, description="依平台來源進行過濾。"),
+    limit: int = Query(100, ge=1, le=1000, description="每頁的最大紀錄數量。"),
+) -> JobPage:
+    """
+    依 (updated_at, id) 由新到舊進行 keyset 分頁，由索引 ix_jobs_updated_at_id 支撐。
+    每頁只讀取 `limit + 1` 筆，不論翻到多深都不需要掃描並丟棄前面的紀錄。
+    """
+    stmt, _ = _filter_jobs(select(Job), q, boolean_mode, platform)
+    if cursor:
+        updated_at, job_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Job.updated_at < updated_at,
+            and_(Job.updated_at == updated_at, Job.id < job_id),
+        ))
+
+    jobs = session.exec(
+        stmt.order_by(Job.updated_at.desc(), Job.id.desc()).limit(limit + 1)
     ).all()
+    next_cursor = encode_cursor(jobs[limit - 1]) if len(jobs) > limit else None
+    return JobPage(items=jobs[:limit], next_cursor=next_cursor)
 
 @app.get("/jobs/{job_id}", response_model=Job, tags=["職缺數據"], summary="獲取單一職缺詳情")
 def get_job_by_id(session: DBSession, job_id: int) -> Job:
@@ -80,4 +154,9 @@ def get_url_status_summary(session: DBSession) -> List[Dict[str, Any]]:
             "status": row.details_crawl_status.value,
             "count": row.count
         } for row in results
-    ]
\ No newline at end of file
+    ]
+
+@app.get("/status/db-pools", tags=["系統狀態"], summary="獲取資料庫連線池統計")
+def get_db_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """返回本進程中各資料庫引擎 (讀取 / 寫入) 連線池的使用情況與利用率。"""
+    return get_pool_stats()
@@ -0,0 +1,173 @@
+# crawler/archive.py
+"""原始響應封存庫 (Raw Response Archive)。
+
+Details pipeline 抓取到的原始內容 (HTML / JSON) 只在 `DetailFetcher` 與
+`DetailParser` 之間短暫存在。此模組將每份原始內容以 zstd 壓縮後，按內容的
+SHA-256 摘要存放於本地目錄 (相同內容只存一份)，並為每個平台維護一個
+URL → 摘要的 SQLite 索引，同時保存解析所需的中介資料 (Redis 中的副本
+會在職缺入庫後刪除，見 crawler.metastore)。
+
+修正 `crawler/projects/*/parsers.py` 後，可以用 `crawler task reparse <platform>`
+以多進程重新解析整個封存庫並寫回資料庫，無需再次請求目標網站。
+
+目錄結構::
+
+    {root}/objects/ab/abcdef....zst   # 內容定址的壓縮 blob
+    {root}/index/{platform}.sqlite    # URL -> digest (+ meta) 索引
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import zstandard
+
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# (url, digest, meta)
+ArchiveEntry = Tuple[str, str, Optional[Dict[str, Any]]]
+
+
+class RawArchive:
+    """
+    單一平台的原始響應封存庫。
+
+    Attributes:
+        root (Path): 封存庫根目錄，所有平台共用同一個 objects 目錄。
+        platform (str): 平台值，決定使用哪一個索引檔。
+    """
+    def __init__(self, root: str, platform: str, level: int = 3):
+        self.root = Path(root)
+        self.platform = platform
+        self.level = level
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index" / f"{platform}.sqlite"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # zstd 的 (解) 壓縮器不是線程安全的，每個線程各自持有
+        self._local = threading.local()
+        self._index_lock = threading.Lock()
+        self._index = sqlite3.connect(self.index_path, timeout=30, check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "url TEXT PRIMARY KEY, digest TEXT NOT NULL, meta TEXT, archived_at TEXT NOT NULL)"
+        )
+        self._index.commit()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(level=self.level)
+        return self._local.compressor
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = zstandard.ZstdDecompressor()
+        return self._local.decompressor
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.zst"
+
+    def put(self, url: str, content: str, meta: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        封存一份原始內容並更新該 URL 的索引。寫入失敗只記錄警告，不影響爬取流程。
+
+        Returns:
+            Optional[str]: 內容的 SHA-256 摘要；寫入失敗時返回 None。
+        """
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        try:
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                # 先寫入臨時檔再原子地改名，避免併發寫入或中斷時留下半個檔案
+                tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp_path.write_bytes(self._compressor().compress(data))
+                os.replace(tmp_path, path)
+
+            with self._index_lock:
+                self._index.execute(
+                    "INSERT OR REPLACE INTO entries (url, digest, meta, archived_at) VALUES (?, ?, ?, ?)",
+                    (url, digest, json.dumps(meta) if meta else None, datetime.utcnow().isoformat()),
+                )
+                self._index.commit()
+            return digest
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"[{self.platform}] 無法封存 {url} 的原始內容: {e}")
+            return None
+
+    def get(self, digest: str) -> str:
+        """讀取並解壓指定摘要的原始內容。"""
+        return self._decompressor().decompress(self._object_path(digest).read_bytes()).decode("utf-8")
+
+    def __len__(self) -> int:
+        with self._index_lock:
+            return self._index.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def iter_entries(self, chunk_size: int = 5000) -> Iterator[List[ArchiveEntry]]:
+        """按 URL 順序分塊迭代索引，避免一次性載入整個索引。"""
+        last_url = ""
+        while True:
+            with self._index_lock:
+                rows = self._index.execute(
+                    "SELECT url, digest, meta FROM entries WHERE url > ? ORDER BY url LIMIT ?",
+                    (last_url, chunk_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield [(url, digest, json.loads(meta) if meta else None) for url, digest, meta in rows]
+            last_url = rows[-1][0]
+
+    def close(self) -> None:
+        with self._index_lock:
+            self._index.close()
+
+
+def get_archive(platform: str) -> Optional[RawArchive]:
+    """返回平台的封存庫；`settings.archive.enabled` 為 False 或目錄無法創建時返回 None。"""
+    if not settings.archive.enabled:
+        return None
+    try:
+        return RawArchive(settings.archive.path, platform, settings.archive.compression_level)
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"[{platform}] 無法初始化原始內容封存庫 ({settings.archive.path})，將不封存: {e}")
+        return None
+
+
+# --- 離線重新解析 (在子進程中執行) ---
+
+_worker_archive: Optional[RawArchive] = None
+_worker_parser: Any = None
+
+def init_reparse_worker(root: str, platform: str, parser: Any) -> None:
+    """ProcessPoolExecutor 的 initializer：每個子進程各自打開封存庫。"""
+    global _worker_archive, _worker_parser
+    _worker_archive = RawArchive(root, platform)
+    _worker_parser = parser
+
+def reparse_entry(entry: ArchiveEntry) -> Tuple[str, Any, Optional[str]]:
+    """
+    在子進程中重新解析一筆封存內容。
+
+    Returns:
+        Tuple[str, Any, Optional[str]]: `(url, job_or_none, error)`；異常以字串返回，
+        避免不可序列化的異常物件跨進程傳遞失敗。
+    """
+    url, digest, meta = entry
+    try:
+        raw_content = _worker_archive.get(digest)
+        job = _worker_parser(raw_content, url, meta or {})
+        if not job:
+            return url, None, "Parsing failed, parser returned None."
+        return url, job, None
+    except Exception as e:
+        return url, None, f"{type(e).__name__}: {e}"
@@ -0,0 +1,67 @@
+# crawler/bench_clean_text.py
+"""`clean_text` 的微基準測試。
+
+比較目前的 `crawler.utils.clean_text` 與舊版 (每個字串建立一棵
+BeautifulSoup 解析樹) 在典型職缺欄位上的耗時::
+
+    python -m crawler.bench_clean_text --rounds 2000
+"""
+import argparse
+import timeit
+import warnings
+from typing import Callable, List, Optional
+
+from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
+
+from crawler.utils import clean_text
+
+# 模擬單一職缺記錄中 clean_text 會處理的欄位：純文字標題、公司名、
+# 重複出現的短標籤，以及含標籤與實體的 HTML 描述
+SAMPLES: List[str] = [
+    "資深後端工程師 (Python / Go)",
+    "  盈弘展工程行股份有限公司  ",
+    "台北市大安區",
+    "大學以上",
+    "需具備 3 年以上工作經驗",
+    "月薪 45,000元~55,000元",
+    "Tom &amp; Jerry&#39;s Café &lt;Team&gt;",
+    "<p>負責 <b>後端 API</b> 開發&nbsp;與維護</p>\n<ul><li>設計資料庫</li><li>撰寫測試</li></ul>",
+    "<div><!-- tracking --><script>trackImpression({id: 1})</script>"
+    "<style>.x{color:red}</style><h2>工作內容</h2>\n<p>1. 系統設計<br/>2. Code review</p></div>",
+    "<p>" + "我們正在尋找熱愛技術的夥伴加入團隊，" * 40 + "</p>",
+]
+
+
+def legacy_clean_text(text: Optional[str]) -> Optional[str]:
+    """舊版實作，作為正確性與效能的對照組。"""
+    if isinstance(text, str):
+        soup = BeautifulSoup(text, "html.parser")
+        return ' '.join(soup.get_text().split()).strip()
+    return text
+
+
+def _bench(func: Callable[[str], Optional[str]], rounds: int) -> float:
+    return timeit.timeit(lambda: [func(s) for s in SAMPLES], number=rounds)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    # 純文字輸入會讓 BeautifulSoup 發出此警告，對照組不需要
+    warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
+
+    mismatches = [s for s in SAMPLES if clean_text(s) != legacy_clean_text(s)]
+    if mismatches:
+        raise SystemExit(f"clean_text 與舊版結果不一致: {mismatches!r}")
+
+    legacy = _bench(legacy_clean_text, args.rounds)
+    current = _bench(clean_text, args.rounds)
+    calls = args.rounds * len(SAMPLES)
+    print(f"legacy (BeautifulSoup): {legacy:.3f}s  {legacy / calls * 1e6:8.2f} µs/call")
+    print(f"clean_text:             {current:.3f}s  {current / calls * 1e6:8.2f} µs/call")
+    print(f"speedup:                {legacy / current:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,11 @@ import typer
 import logging
 from typing import List, Optional
 import json
+from enum import Enum
 from pathlib import Path # 新增導入
 
 from typing_extensions import Annotated
-from crawler.enums import SourcePlatform
+from crawler.enums import SourcePlatform, ExecutionMode
 from crawler.factory import create_crawler
 
 # 配置日誌，以便在 CLI 中看到詳細輸出
@@ -27,7 +28,7 @@ app.add_typer(db_app, name="db")
 app.add_typer(task_app, name="task")
 
 
-@db_app.command("init", help="初始化資料庫，創建所有表結構。")
+@db_app.command("init", help="初始化資料庫，創建所有表結構，並為既有的表補上新增的欄位與索引 (包括全文索引)。")
 def initialize_db_command() -> None:
     """初始化資料庫並創建所有在 schema.py 中定義的表。"""
     try:
@@ -39,6 +40,57 @@ def initialize_db_command() -> None:
         typer.secho(f"資料庫初始化失敗: {e}", fg=typer.colors.RED, err=True)
         raise typer.Exit(code=1)
 
+@db_app.command("migrate-url-hash", help="將既有 tb_urls 的主鍵由 source_url 遷移為 64 位 URL 雜湊。")
+def migrate_url_hash_command(
+    batch_size: Annotated[int, typer.Option(help="每批回填的資料行數。")] = 5000,
+) -> None:
+    """回填 url_hash 並重建 tb_urls 的主鍵；可重複執行。建議在停止爬蟲 worker 後執行。"""
+    try:
+        from crawler.database.connection import migrate_urls_to_hash_key
+        typer.echo("正在遷移 tb_urls 的主鍵...")
+        backfilled = migrate_urls_to_hash_key(batch_size=batch_size)
+        typer.secho(f"遷移完成，共回填 {backfilled} 筆 URL 雜湊。", fg=typer.colors.GREEN)
+    except Exception as e:
+        typer.secho(f"遷移失敗: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+class BulkTable(str, Enum):
+    """`db bulk-load` 可載入的目標表。"""
+    JOBS = "jobs"
+    URLS = "urls"
+
+@db_app.command("bulk-load", help="以 LOAD DATA LOCAL INFILE 將 JSONL 檔案批量 upsert 到 tb_jobs 或 tb_urls。")
+def bulk_load_command(
+    path: Annotated[Path, typer.Argument(help="JSONL 檔案：jobs 每行一個 Job 的 JSON；urls 每行含 source_url 與可選的 fingerprint。", exists=True, dir_okay=False)],
+    table: Annotated[BulkTable, typer.Option(help="目標表。")] = BulkTable.JOBS,
+    platform: Annotated[Optional[SourcePlatform], typer.Option(help="URL 所屬的平台 (載入 urls 時必填)。")] = None,
+    chunk_rows: Annotated[Optional[int], typer.Option(help="每次 LOAD DATA 的行數，預設為 MYSQL_BULK_CHUNK_ROWS。")] = None,
+) -> None:
+    """平台首次上線或全量回填時使用；需要 MYSQL_LOCAL_INFILE=true 且伺服器開啟 local_infile。"""
+    if table == BulkTable.URLS and platform is None:
+        typer.secho("載入 urls 時必須指定 --platform。", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+    try:
+        from crawler.database import bulk
+        from crawler.database.schema import Job
+        typer.echo(f"正在從 {path} 批量載入 {table.value}...")
+        with path.open(encoding="utf-8") as f:
+            records = (json.loads(line) for line in f if line.strip())
+            if table == BulkTable.JOBS:
+                loaded = bulk.load_jobs((Job.model_validate(record) for record in records), chunk_rows=chunk_rows)
+            else:
+                fingerprints = {}
+                urls = []
+                for record in records:
+                    urls.append(record["source_url"])
+                    if record.get("fingerprint"):
+                        fingerprints[record["source_url"]] = record["fingerprint"]
+                loaded = bulk.load_urls(platform, urls, fingerprints, chunk_rows=chunk_rows)
+        typer.secho(f"批量載入完成，共 {loaded} 行。", fg=typer.colors.GREEN)
+    except Exception as e:
+        typer.secho(f"批量載入失敗: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
 def _get_orchestrator(platform: SourcePlatform, category_ids: Optional[List[str]] = None) -> "CrawlerOrchestrator":
     """輔助函數，用於獲取配置好的 Orchestrator 實例。"""
     return create_crawler(platform, category_ids)
@@ -67,12 +119,13 @@ def run_urls_pipeline_command(
 def run_details_pipeline_command(
     platform: Annotated[SourcePlatform, typer.Argument(help="要運行的平台。")],
     limit: Annotated[int, typer.Option(help="本次要處理的最大 URL 數量。")] = 100,
+    mode: Annotated[ExecutionMode, typer.Option(help="併發模式：thread (線程池)、async (事件循環) 或 pipeline (抓取線程 + 解析進程池)。")] = ExecutionMode.THREAD,
 ):
     """手動觸發職缺詳情抓取流程。"""
-    typer.echo(f"正在為平台 {platform.value} 執行 Details pipeline，上限為 {limit} 筆...")
+    typer.echo(f"正在為平台 {platform.value} 執行 Details pipeline ({mode.value} 模式)，上限為 {limit} 筆...")
     try:
         orchestrator = _get_orchestrator(platform)
-        orchestrator.run_details_pipeline(limit=limit)
+        orchestrator.run_details_pipeline(limit=limit, mode=mode)
         typer.secho(f"平台 {platform.value} 的 Details pipeline 執行完畢。", fg=typer.colors.GREEN)
     except Exception as e:
         typer.secho(f"執行 Details pipeline 時發生錯誤: {e}", fg=typer.colors.RED, err=True)
@@ -94,7 +147,8 @@ def debug_single_url(
         orchestrator = _get_orchestrator(platform)
         
         typer.echo("\n--- 1. 抓取內容 (Fetching) ---")
-        raw_content = orchestrator.detail_fetcher(url)
+        # 不帶快取的驗證器，已抓取過的 URL 也會返回完整內容而不是 304
+        raw_content = orchestrator.detail_fetcher(url, conditional=False)
         typer.echo(f"內容抓取成功，大小: {len(raw_content)} bytes。")
         
         # 如果用戶指定，則保存 HTML
@@ -120,5 +174,22 @@ def debug_single_url(
         traceback.print_exc()
         raise typer.Exit(code=1)
 
+@task_app.command("reparse", help="以封存的原始內容離線重新解析指定平台的所有職缺並寫回資料庫。")
+def reparse_command(
+    platform: Annotated[SourcePlatform, typer.Argument(help="要重新解析的平台。")],
+    workers: Annotated[Optional[int], typer.Option(help="解析進程數，預設為 ARCHIVE_REPARSE_WORKERS。")] = None,
+):
+    """修正解析器後，從封存庫回填職缺資料，不會再次請求目標網站。"""
+    from crawler.settings import settings
+    workers = workers or settings.archive.reparse_workers
+    typer.echo(f"正在以 {workers} 個進程重新解析平台 {platform.value} 的封存內容...")
+    try:
+        orchestrator = _get_orchestrator(platform)
+        orchestrator.run_reparse_pipeline(workers=workers)
+        typer.secho(f"平台 {platform.value} 的重新解析執行完畢。", fg=typer.colors.GREEN)
+    except Exception as e:
+        typer.secho(f"重新解析時發生錯誤: {e}", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
@@ -0,0 +1,84 @@
+# crawler/core/lease.py
+"""
+此模組包含 UrlLease，讓多個 details worker 安全地分攤同一平台的待抓取 URL。
+
+每個 worker 以 `repository.claim_urls` (SELECT ... FOR UPDATE SKIP LOCKED)
+認領一批 URL 並取得租約，其他 worker 不會再認領這些 URL。處理期間由背景線程
+定期續約；worker 崩潰或卡住而停止續約時，租約過期，URL 會被其他 worker 重新認領。
+URL 標記為完成或失敗時租約即清除，離開時仍未處理的 URL 會立即釋放。
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from typing import List, Optional
+
+from crawler.database.schema import Url
+from crawler.database import repository
+from crawler.enums import SourcePlatform
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+def make_worker_id() -> str:
+    """產生租約持有者 ID：主機名、進程 ID 與隨機後綴，同一進程的多次執行也不會衝突。"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class UrlLease:
+    """
+    一批已認領 URL 的租約，作為 context manager 使用。
+
+    Attributes:
+        urls (List[Url]): 進入區塊時認領到的 URL；沒有可認領的 URL 時為空列表。
+        worker_id (str): 租約持有者 ID。
+    """
+    def __init__(
+        self,
+        platform: SourcePlatform,
+        limit: int,
+        lease_seconds: Optional[int] = None,
+        renew_interval: Optional[float] = None,
+        worker_id: Optional[str] = None,
+    ):
+        self.platform = platform
+        self.limit = limit
+        self.lease_seconds = lease_seconds or settings.claim.lease_seconds
+        self.renew_interval = renew_interval or settings.claim.renew_interval
+        self.worker_id = worker_id or make_worker_id()
+        self.urls: List[Url] = []
+        self._stop = threading.Event()
+        self._renewer: Optional[threading.Thread] = None
+
+    def _renew_loop(self) -> None:
+        source_urls = [u.source_url for u in self.urls]
+        while not self._stop.wait(self.renew_interval):
+            try:
+                renewed = repository.renew_leases(source_urls, self.worker_id, self.lease_seconds)
+                logger.debug(f"[{self.platform.value}] Renewed {renewed} URL leases for {self.worker_id}.")
+            except Exception as e:
+                # 續約失敗不中斷抓取；租約過期只會讓少量 URL 被重複處理
+                logger.warning(f"[{self.platform.value}] Failed to renew URL leases: {e}")
+
+    def __enter__(self) -> "UrlLease":
+        self.urls = repository.claim_urls(self.platform, self.limit, self.worker_id, self.lease_seconds)
+        if self.urls:
+            logger.info(f"[{self.platform.value}] {self.worker_id} claimed {len(self.urls)} URLs (lease {self.lease_seconds}s).")
+            self._renewer = threading.Thread(
+                target=self._renew_loop, name=f"{self.platform.value}-lease", daemon=True
+            )
+            self._renewer.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join()
+        if self.urls:
+            # 已標記的 URL 租約已清除，此處只會釋放未處理完的 URL
+            try:
+                repository.release_leases([u.source_url for u in self.urls], self.worker_id)
+            except Exception as e:
+                logger.warning(f"[{self.platform.value}] Failed to release URL leases, they will expire instead: {e}")
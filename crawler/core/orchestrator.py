@@ -2,18 +2,30 @@
 """
 此模組包含 CrawlerOrchestrator，是爬蟲框架的核心大腦。
 """
+import asyncio
+import hashlib
 import logging
 import json
-from typing import Dict, Optional, Any
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Any
 from urllib.parse import urlparse, urljoin
 
-from crawler.enums import SourcePlatform, CrawlStatus
+from crawler.archive import get_archive, init_reparse_worker, reparse_entry
+from crawler.enums import SourcePlatform, CrawlStatus, ExecutionMode
 from crawler.database.schema import Url, Job
-from crawler.database import repository
-from crawler.cache import get_redis_client
+from crawler.database import bulk, repository
+from crawler.database.connection import get_pool_stats
+from crawler.http_client import get_connection_stats
+from crawler.metastore import decode_meta, encode_meta, get_intermediate_store
 from crawler.settings import settings
-from crawler.utils import run_concurrently
-from .protocols import UrlFetcher, DetailFetcher, DetailParser, CategoryFetcher
+from crawler.utils import run_concurrently, async_client_scope
+from crawler.validators import NotModifiedError, get_validator_cache
+from crawler.watermark import commit_watermarks
+from .lease import UrlLease
+from .sink import DetailsSink, describe_error
+from .staged import Payload, StagedDetailsPipeline
+from .protocols import UrlFetcher, DetailFetcher, AsyncDetailFetcher, DetailParser, CategoryFetcher
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +40,7 @@ class CrawlerOrchestrator:
         detail_fetcher: DetailFetcher,
         detail_parser: DetailParser,
         category_fetcher: Optional[CategoryFetcher] = None,
+        async_detail_fetcher: Optional[AsyncDetailFetcher] = None,
     ):
         self.platform = platform
         self.cfg = self._get_platform_settings(platform)
@@ -35,7 +48,9 @@ class CrawlerOrchestrator:
         self.detail_fetcher = detail_fetcher
         self.detail_parser = detail_parser
         self.category_fetcher = category_fetcher
-        self.redis = get_redis_client()
+        self.async_detail_fetcher = async_detail_fetcher
+        self.meta_store = get_intermediate_store(platform.value, self.cfg.use_intermediate_data)
+        self.archive = get_archive(platform.value)
         logger.info(f"[{self.platform.value}] CrawlerOrchestrator initialized.")
 
     def _get_platform_settings(self, platform: SourcePlatform) -> Any:
@@ -78,10 +93,45 @@ class CrawlerOrchestrator:
         logger.warning(f"[{self.platform.value}] Could not determine base URL for relative path: {url_path}")
         return None
 
+    def _log_connection_stats(self) -> None:
+        """記錄本平台 HTTP 客戶端的按主機連線統計，以及資料庫連線池的利用率。"""
+        stats = get_connection_stats().get(self.platform.value)
+        if stats:
+            logger.info(f"[{self.platform.value}] HTTP connection stats: {stats}")
+        pool_stats = get_pool_stats()
+        if pool_stats:
+            logger.info(f"[{self.platform.value}] Database pool stats: {pool_stats}")
+
+    def _fingerprint_item(self, item: Dict[str, Any]) -> str:
+        """
+        以平台配置的 `fingerprint_fields` 計算列表項目的指紋 (例如 104 的 appearDate)，
+        未配置欄位時以整個列表項目計算。指紋改變代表職缺需要重新抓取詳情。
+        """
+        fields = self.cfg.fingerprint_fields
+        material = [item.get(field) for field in fields] if fields else item
+        return hashlib.sha1(json.dumps(material, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def _prefetch_intermediate_data(self, urls: List[Url]) -> Dict[str, Dict[str, Any]]:
+        """
+        在分派給 worker 前取回並解碼整批 URL 的中介資料：先以分塊 HMGET 讀取 Redis hash，
+        不在 Redis 中的再一次性從 MySQL 讀取。平台關閉 `use_intermediate_data` 時直接返回空字典。
+        """
+        if not self.cfg.use_intermediate_data or not urls:
+            return {}
+        source_urls = [url_obj.source_url for url_obj in urls]
+        metas = self.meta_store.get_many(source_urls) if self.meta_store is not None else {}
+
+        missing = [url for url in source_urls if url not in metas]
+        if missing:
+            stored = repository.get_intermediate_data(missing)
+            metas.update({url: decode_meta(blob) for url, blob in stored.items()})
+            logger.info(f"[{self.platform.value}] {len(missing)} URLs missed the Redis metadata cache, {len(stored)} recovered from MySQL.")
+        return metas
+
     def run_urls_pipeline(self):
         logger.info(f"[{self.platform.value}] Starting URL pipeline...")
-        urls_to_sync = set()
-        redis_pipe = self.redis.pipeline()
+        urls_to_sync: Dict[str, str] = {}
+        metas: Dict[str, bytes] = {}
         items_processed = 0
 
         for item in self.url_fetcher():
@@ -90,77 +140,193 @@ class CrawlerOrchestrator:
             if not url:
                 continue
 
-            urls_to_sync.add(url)
-            redis_key = f"meta:{self.platform.value}:{url}"
-            redis_pipe.set(redis_key, json.dumps(item), ex=86400)
+            urls_to_sync[url] = self._fingerprint_item(item)
+            if self.cfg.use_intermediate_data:
+                metas[url] = encode_meta(item, self.cfg.intermediate_fields)
 
         logger.info(f"[{self.platform.value}] UrlFetcher yielded {items_processed} items.")
 
         if urls_to_sync:
             # [關鍵修正] 將 set 轉換為 list 再傳遞，避免類型錯誤
-            repository.upsert_urls(self.platform, list(urls_to_sync))
-            redis_pipe.execute()
+            repository.upsert_urls(
+                self.platform,
+                list(urls_to_sync),
+                fingerprints=urls_to_sync,
+                refresh_days=self.cfg.detail_refresh_days,
+                intermediate_data=metas,
+            )
+            if self.meta_store is not None and metas:
+                # 只快取待抓取的職缺；指紋未變而保持 COMPLETED 的職缺不會再被讀取
+                pending = repository.get_pending_urls(list(metas))
+                self.meta_store.put_many({url: metas[url] for url in pending})
             logger.info(f"[{self.platform.value}] Synced {len(urls_to_sync)} URLs to database and Redis.")
         else:
             logger.info(f"[{self.platform.value}] No new URLs found to sync.")
+        # 高水位必須在 URL 寫入成功後才提交，否則寫入失敗時下次會跳過這些頁面
+        commit_watermarks(getattr(self.url_fetcher, "pending_watermarks", []))
+        self._log_connection_stats()
 
-    def run_details_pipeline(self, limit: int):
-        logger.info(f"[{self.platform.value}] Starting Details pipeline with limit {limit}...")
-        urls_to_process = repository.get_unprocessed_urls(self.platform, limit)
-        if not urls_to_process:
-            logger.info(f"[{self.platform.value}] No unprocessed URLs found.")
-            return
+    def _prepare_detail(self, url_obj: Url, raw_content: str, intermediate_data: Dict[str, Any]) -> None:
+        """
+        在解析前將原始內容與中介資料一同封存，即使解析失敗也能在修正解析器後離線重跑。
+        """
+        if not raw_content:
+            raise ValueError("Fetched content is empty.")
 
-        jobs, url_status_map = [], {CrawlStatus.COMPLETED: [], CrawlStatus.FAILED: []}
-        
-        def process_single_url(url_obj: Url) -> tuple[Optional[Job], CrawlStatus]:
-            redis_key = f"meta:{self.platform.value}:{url_obj.source_url}"
-            intermediate_data_str = self.redis.get(redis_key)
-            intermediate_data = json.loads(intermediate_data_str) if intermediate_data_str else {}
+        if self.archive is not None:
+            self.archive.put(url_obj.source_url, raw_content, intermediate_data)
 
+    def _parse_detail(self, url_obj: Url, raw_content: str, intermediate_data: Dict[str, Any]) -> Job:
+        """將抓取到的原始內容連同預取的中介資料交給 DetailParser 解析。"""
+        self._prepare_detail(url_obj, raw_content, intermediate_data)
+        job = self.detail_parser(raw_content, url_obj.source_url, intermediate_data)
+        if not job:
+            raise ValueError("Parsing failed, parser returned None.")
+        return job
+
+    def _fetch_payload(self, url_obj: Url, intermediate_data: Dict[str, Any]) -> Optional[Payload]:
+        """分階段模式的抓取階段：返回待解析的內容；內容未變更 (304) 時返回 None。"""
+        try:
+            raw_content = self.detail_fetcher(url_obj.source_url)
+        except NotModifiedError:
+            return None
+        self._prepare_detail(url_obj, raw_content, intermediate_data)
+        return url_obj.source_url, raw_content, intermediate_data
+
+    async def _process_urls_async(
+        self, urls_to_process: List[Url], sink: DetailsSink, metas: Dict[str, Dict[str, Any]]
+    ) -> None:
+        """
+        以單一事件循環併發處理所有 URL，在途請求數由 `async_concurrency` 限制。
+        原始內容的封存與解析在線程池中執行，結果按完成順序寫入 sink。
+        """
+        semaphore = asyncio.Semaphore(self.cfg.async_concurrency)
+
+        async def process_single_url_async(url_obj: Url) -> tuple[str, Optional[Job], CrawlStatus, Optional[str]]:
+            async with semaphore:
+                try:
+                    raw_content = await self.async_detail_fetcher(url_obj.source_url)
+                    # 封存寫檔與解析都是阻塞操作，在線程池中執行以免拖慢其他在途請求
+                    job = await asyncio.to_thread(
+                        self._parse_detail, url_obj, raw_content, metas.get(url_obj.source_url, {})
+                    )
+                    return url_obj.source_url, job, CrawlStatus.COMPLETED, None
+                except NotModifiedError:
+                    return url_obj.source_url, None, CrawlStatus.COMPLETED, None
+                except Exception as e:
+                    logger.error(
+                        f"[{self.platform.value}] Failed to process URL: {url_obj.source_url}. Reason: {e}",
+                        exc_info=True
+                    )
+                    return url_obj.source_url, None, CrawlStatus.FAILED, describe_error(e)
+
+        async with async_client_scope():
+            for next_done in asyncio.as_completed([process_single_url_async(u) for u in urls_to_process]):
+                url, job, status, error = await next_done
+                await sink.add_async(url, status, job, error)
+
+    def run_details_pipeline(self, limit: int, mode: ExecutionMode = ExecutionMode.THREAD):
+        logger.info(f"[{self.platform.value}] Starting Details pipeline with limit {limit} in {mode.value} mode...")
+        if mode == ExecutionMode.ASYNC and self.async_detail_fetcher is None:
+            raise ValueError(f"Platform '{self.platform.value}' does not provide an AsyncDetailFetcher.")
+        if mode == ExecutionMode.PIPELINE and multiprocessing.current_process().daemon:
+            # 例如 Celery prefork worker：守護進程不能再創建子進程
+            logger.warning(f"[{self.platform.value}] Cannot start parser processes from a daemon process, falling back to thread mode.")
+            mode = ExecutionMode.THREAD
+
+        # 以租約認領 URL，同一平台的多個 worker 不會處理相同的 URL
+        with UrlLease(self.platform, limit) as lease:
+            if not lease.urls:
+                logger.info(f"[{self.platform.value}] No unprocessed URLs found.")
+                return
+            self._process_details(lease.urls, mode, lease.worker_id)
+
+        self._log_connection_stats()
+
+    def _process_details(self, urls_to_process: List[Url], mode: ExecutionMode, holder: Optional[str] = None) -> None:
+        """抓取並解析已認領的 URL，結果經 DetailsSink 寫回 `holder` 仍持有租約的 URL。"""
+        metas = self._prefetch_intermediate_data(urls_to_process)
+
+        def process_single_url(url_obj: Url) -> Optional[Job]:
+            """返回解析後的 Job；內容未變更 (304) 時返回 None，跳過解析。"""
             try:
                 raw_content = self.detail_fetcher(url_obj.source_url)
-                if not raw_content:
-                    raise ValueError("Fetched content is empty.")
-                
-                job = self.detail_parser(raw_content, url_obj.source_url, intermediate_data)
-                if job:
-                    return job, CrawlStatus.COMPLETED
-                else:
-                    raise ValueError("Parsing failed, parser returned None.")
-
-            except Exception as e:
-                logger.error(
-                    f"[{self.platform.value}] Failed to process URL: {url_obj.source_url}. Reason: {e}",
-                    exc_info=True
-                )
-                return None, CrawlStatus.FAILED
-
-        results = list(run_concurrently(process_single_url, urls_to_process, self.cfg.max_workers))
-
-        for i, result in enumerate(results):
-            # Check if result is not None and is a tuple of size 2
-            if result and isinstance(result, tuple) and len(result) == 2:
-                job, status = result
-                url = urls_to_process[i].source_url
-                url_status_map[status].append(url)
-                if job:
-                    jobs.append(job)
+            except NotModifiedError:
+                return None
+            return self._parse_detail(url_obj, raw_content, metas.get(url_obj.source_url, {}))
+
+        # 結果以微批次寫回資料庫；中斷時 (例如 Celery soft time limit) 由 sink 寫入已完成的部分
+        validators = get_validator_cache(self.platform.value)
+        with DetailsSink(
+            self.platform, self.cfg.sink_batch_size, self.cfg.sink_flush_interval, validators, self.meta_store,
+            bulk_load=self.cfg.sink_bulk_load, holder=holder,
+        ) as sink:
+            if mode == ExecutionMode.ASYNC:
+                asyncio.run(self._process_urls_async(urls_to_process, sink, metas))
+            elif mode == ExecutionMode.PIPELINE:
+                StagedDetailsPipeline(
+                    self.platform,
+                    lambda url_obj: self._fetch_payload(url_obj, metas.get(url_obj.source_url, {})),
+                    self.detail_parser,
+                    fetch_workers=self.cfg.max_workers,
+                    parse_workers=self.cfg.parse_workers,
+                    queue_size=self.cfg.parse_queue_size,
+                ).run(urls_to_process, sink)
             else:
-                url = urls_to_process[i].source_url
-                url_status_map[CrawlStatus.FAILED].append(url)
-                logger.warning(f"Concurrent task for URL {url} returned an unexpected result: {result}")
+                # 中斷時 run_concurrently 取消排隊的任務且不等待在途的抓取，sink 隨即寫入已完成的部分
+                results = run_concurrently(process_single_url, urls_to_process, self.cfg.max_workers)
+                for url_obj, result in results:
+                    if isinstance(result, Exception):
+                        # 異常已由 run_concurrently 記錄
+                        sink.add(url_obj.source_url, CrawlStatus.FAILED, error=describe_error(result))
+                    else:
+                        sink.add(url_obj.source_url, CrawlStatus.COMPLETED, result)
 
+        logger.info(f"[{self.platform.value}] Details pipeline finished. Totals: {sink.totals}")
+
+    def run_reparse_pipeline(self, workers: int) -> None:
+        """
+        以 `workers` 個進程對封存庫中的所有原始內容重新執行 DetailParser，
+        並將結果批次 upsert 回資料庫。不發出任何網絡請求，也不改變 URL 的抓取狀態。
+        """
+        if self.archive is None:
+            raise ValueError("Raw archive is disabled (ARCHIVE_ENABLED=false); nothing to reparse.")
+
+        logger.info(f"[{self.platform.value}] Starting reparse of {len(self.archive)} archived payloads with {workers} processes...")
+        totals = {"jobs": 0, "failed": 0}
+        jobs: List[Job] = []
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_reparse_worker,
+            initargs=(str(self.archive.root), self.platform.value, self.detail_parser),
+        ) as executor:
+            reparsed = self._iter_reparsed_jobs(executor, totals)
+            if self.cfg.sink_bulk_load:
+                # 串流寫入 LOAD DATA，不在記憶體中累積批次
+                totals["jobs"] = bulk.load_jobs(reparsed)
+            else:
+                for job in reparsed:
+                    jobs.append(job)
+                    if len(jobs) >= self.cfg.sink_batch_size:
+                        repository.upsert_jobs(jobs)
+                        totals["jobs"] += len(jobs)
+                        jobs = []
 
         if jobs:
-            logger.info(f"[{self.platform.value}] Preparing to upsert {len(jobs)} jobs. First job: source_job_id={jobs[0].source_job_id}, url={jobs[0].url}")
             repository.upsert_jobs(jobs)
+            totals["jobs"] += len(jobs)
+        logger.info(f"[{self.platform.value}] Reparse pipeline finished. Totals: {totals}")
 
-        if url_status_map[CrawlStatus.COMPLETED] or url_status_map[CrawlStatus.FAILED]:
-            logger.info(f"[{self.platform.value}] Marking URLs status: {len(url_status_map[CrawlStatus.COMPLETED])} COMPLETED, {len(url_status_map[CrawlStatus.FAILED])} FAILED.")
-            repository.mark_urls_as_crawled(url_status_map)
-        
-        logger.info(f"[{self.platform.value}] Details pipeline finished.")
+    def _iter_reparsed_jobs(self, executor: ProcessPoolExecutor, totals: Dict[str, int]):
+        """依封存順序產生重新解析成功的 Job，失敗的條目只記錄並計入 `totals["failed"]`。"""
+        for chunk in self.archive.iter_entries():
+            for url, job, error in executor.map(reparse_entry, chunk, chunksize=64):
+                if error:
+                    totals["failed"] += 1
+                    logger.warning(f"[{self.platform.value}] Reparse failed for {url}: {error}")
+                    continue
+                yield job
 
     def run_category_pipeline(self) -> None:
         """
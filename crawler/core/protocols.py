@@ -27,8 +27,22 @@ class DetailFetcher(Protocol):
     實現此協議的類必須提供一個 __call__ 方法，該方法接收一個 URL 字串，
     並返回該 URL 對應的詳細頁面的原始內容（通常是 HTML 或 JSON 格式的字串）。
     如果獲取失敗，應返回空字串或在 `make_request` 中拋出異常。
+    若以條件請求得知內容自上次成功抓取後未變更 (304)，應拋出
+    `crawler.validators.NotModifiedError`，Orchestrator 會跳過解析與寫入。
+    `conditional=False` 時不帶驗證器，始終取得完整內容 (例如 `debug-url`)。
     """
-    def __call__(self, url: str) -> str:
+    def __call__(self, url: str, conditional: bool = True) -> str:
+        ...
+
+class AsyncDetailFetcher(Protocol):
+    """
+    策略接口：`DetailFetcher` 的非同步版本。
+
+    實現此協議的類必須提供一個 async __call__ 方法，語義與 `DetailFetcher`
+    相同，但使用 `make_async_request` 發起請求，讓 Orchestrator 能在單一
+    事件循環中同時保持大量詳情請求在途。
+    """
+    async def __call__(self, url: str) -> str:
         ...
 
 class DetailParser(Protocol):
@@ -0,0 +1,131 @@
+# crawler/core/sink.py
+"""
+此模組包含 DetailsSink，負責將 Details pipeline 的結果以微批次寫回資料庫。
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from crawler.enums import SourcePlatform, CrawlStatus
+from crawler.database.schema import Job
+from crawler.database import bulk, repository
+
+logger = logging.getLogger(__name__)
+
+def describe_error(exc: BaseException) -> str:
+    """失敗原因的簡短描述，寫入 `tb_urls.error_reason`。"""
+    return f"{type(exc).__name__}: {exc}"
+
+class DetailsSink:
+    """
+    Details pipeline 的串流寫入器。
+
+    每累積 `batch_size` 筆結果或距上次寫入超過 `flush_interval` 秒，
+    就先 upsert 已解析的 Job，再標記對應 URL 的抓取狀態，使記憶體佔用
+    維持在一個批次以內。作為 context manager 使用時，離開區塊 (包括
+    Celery 的 SoftTimeLimitExceeded 等異常) 會寫入剩餘結果，保留部分進度。
+
+    先寫 Job 再寫 URL 狀態的順序確保了崩潰時最壞情況只是重抓少量 URL，
+    不會出現 URL 已標記完成但 Job 未寫入的情況。詳情頁的 HTTP 驗證器
+    (ETag / Last-Modified) 也在此之後才提交，因此 304 只會跳過已入庫的職缺。
+
+    狀態為 COMPLETED 但沒有 Job 的結果代表內容未變更 (304)，只更新 URL 狀態，
+    並計入 `totals["unchanged"]`。完成的 URL 在 Redis 中的中介資料也在此時刪除。
+    失敗的 URL 可附上原因，隨狀態一併寫入 `tb_urls.error_reason`。
+    `bulk_load` 為 True 時職缺改以 LOAD DATA 寫入 (見 crawler.database.bulk)，
+    適合搭配較大的 `batch_size` 進行大批量回填。
+    `holder` 為 UrlLease 的 worker ID，狀態只寫回仍由此 worker 持有租約的 URL。
+    async 模式使用 `add_async`，批次寫入在線程池中執行，不阻塞事件循環上的請求。
+    """
+    def __init__(
+        self,
+        platform: SourcePlatform,
+        batch_size: int,
+        flush_interval: float,
+        validators: Optional[Any] = None,
+        meta_store: Optional[Any] = None,
+        bulk_load: bool = False,
+        holder: Optional[str] = None,
+    ):
+        self.platform = platform
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.validators = validators
+        self.meta_store = meta_store
+        self.bulk_load = bulk_load
+        self.holder = holder
+        self.jobs: List[Job] = []
+        self.url_status_map: Dict[CrawlStatus, List[str]] = {CrawlStatus.COMPLETED: [], CrawlStatus.FAILED: []}
+        self.error_reasons: Dict[str, str] = {}
+        self.totals: Dict[str, int] = {
+            "jobs": 0, "unchanged": 0, CrawlStatus.COMPLETED.value: 0, CrawlStatus.FAILED.value: 0,
+        }
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def add(self, url: str, status: CrawlStatus, job: Optional[Job] = None, error: Optional[str] = None) -> None:
+        """加入一筆 URL 處理結果，達到批次大小或時間間隔時自動寫入。"""
+        if self._buffer(url, status, job, error):
+            self.flush()
+
+    async def add_async(
+        self, url: str, status: CrawlStatus, job: Optional[Job] = None, error: Optional[str] = None
+    ) -> None:
+        """`add` 的非同步版本：需要寫入時在線程池中執行 `flush`，期間事件循環繼續處理其他請求。"""
+        if self._buffer(url, status, job, error):
+            await asyncio.to_thread(self.flush)
+
+    def _buffer(self, url: str, status: CrawlStatus, job: Optional[Job], error: Optional[str]) -> bool:
+        """緩衝一筆結果，返回是否已達到寫入條件。"""
+        self.url_status_map[status].append(url)
+        if error:
+            self.error_reasons[url] = error
+        if job:
+            self.jobs.append(job)
+        elif status == CrawlStatus.COMPLETED:
+            self.totals["unchanged"] += 1
+        self._pending += 1
+        return self._pending >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval
+
+    def flush(self) -> None:
+        """將目前緩衝的 Job 與 URL 狀態寫入資料庫並清空緩衝區。"""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        jobs, url_status_map, error_reasons = self.jobs, self.url_status_map, self.error_reasons
+        self.jobs = []
+        self.url_status_map = {CrawlStatus.COMPLETED: [], CrawlStatus.FAILED: []}
+        self.error_reasons = {}
+        self._pending = 0
+
+        if jobs:
+            logger.info(f"[{self.platform.value}] Flushing {len(jobs)} jobs. First job: source_job_id={jobs[0].source_job_id}, url={jobs[0].url}")
+            if self.bulk_load:
+                bulk.load_jobs(jobs)
+            else:
+                repository.upsert_jobs(jobs)
+
+        completed, failed = url_status_map[CrawlStatus.COMPLETED], url_status_map[CrawlStatus.FAILED]
+        if completed or failed:
+            logger.info(f"[{self.platform.value}] Marking URLs status: {len(completed)} COMPLETED, {len(failed)} FAILED.")
+            repository.mark_urls_as_crawled(url_status_map, error_reasons, holder=self.holder)
+
+        if self.validators is not None:
+            self.validators.commit(completed)
+            self.validators.discard(failed)
+        if self.meta_store is not None:
+            self.meta_store.discard(completed + failed)
+
+        self.totals["jobs"] += len(jobs)
+        self.totals[CrawlStatus.COMPLETED.value] += len(completed)
+        self.totals[CrawlStatus.FAILED.value] += len(failed)
+
+    def __enter__(self) -> "DetailsSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is not None:
+            logger.warning(f"[{self.platform.value}] Details pipeline interrupted ({exc_type.__name__}), flushing partial results.")
+        self.flush()
@@ -0,0 +1,205 @@
+# crawler/core/staged.py
+"""
+此模組包含分階段的 Details pipeline：I/O 抓取線程 → 有界隊列 → 解析進程池。
+
+線程模式下每個 worker 先抓取再解析，HTML 解析持有 GIL，增加線程並不能提高
+吞吐量。分階段執行時，抓取線程只負責網絡 I/O，將原始內容放入有界隊列；
+主線程從隊列取出內容提交給 `ProcessPoolExecutor` 解析，並把結果寫入 sink。
+隊列滿時抓取階段會阻塞 (背壓)，解析進程池在途任務也有上限，因此記憶體中
+最多只有 `queue_size + parse_workers * 2` 份原始內容。
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from crawler.database.schema import Url
+from crawler.enums import CrawlStatus, SourcePlatform
+from crawler.utils import run_concurrently
+from .sink import DetailsSink, describe_error
+
+logger = logging.getLogger(__name__)
+
+# (url, raw_content, intermediate_data)
+Payload = Tuple[str, str, Dict[str, Any]]
+
+_DONE = object()
+_POLL_INTERVAL = 0.05
+
+
+# --- 解析階段 (在子進程中執行) ---
+
+_worker_parser: Any = None
+
+def init_parse_worker(parser: Any) -> None:
+    """ProcessPoolExecutor 的 initializer：每個子進程只接收一次 DetailParser。"""
+    global _worker_parser
+    _worker_parser = parser
+
+def parse_payload(payload: Payload) -> Tuple[str, Any, Optional[str], float]:
+    """
+    在子進程中解析一份原始內容。
+
+    Returns:
+        Tuple[str, Any, Optional[str], float]: `(url, job_or_none, error, 解析秒數)`；
+        異常以字串返回，避免不可序列化的異常物件跨進程傳遞失敗。
+    """
+    url, raw_content, intermediate_data = payload
+    started = time.perf_counter()
+    try:
+        job = _worker_parser(raw_content, url, intermediate_data)
+        error = None if job else "Parsing failed, parser returned None."
+    except Exception as e:
+        job, error = None, describe_error(e)
+    return url, job, error, time.perf_counter() - started
+
+
+class StageStats:
+    """單一階段的處理數量、忙碌時間與阻塞時間，用於計算利用率。"""
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.items += 1
+        self.busy += seconds
+
+    def summary(self, elapsed: float) -> Dict[str, Any]:
+        capacity = elapsed * self.workers
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_s": round(self.busy, 2),
+            "blocked_s": round(self.blocked, 2),
+            "utilization": round(self.busy / capacity, 2) if capacity else 0.0,
+        }
+
+
+class StagedDetailsPipeline:
+    """
+    分階段執行一批 URL 的抓取與解析。
+
+    Attributes:
+        fetch (Callable[[Url], Optional[Payload]]): 在抓取線程中執行，返回待解析的內容；
+            內容未變更 (304) 時返回 None，失敗時拋出異常。
+        parser (Any): 可被 pickle 的 DetailParser，在每個解析進程中使用。
+        stats (Dict[str, StageStats]): "fetch" 與 "parse" 兩個階段的統計。
+    """
+    def __init__(
+        self,
+        platform: SourcePlatform,
+        fetch: Callable[[Url], Optional[Payload]],
+        parser: Any,
+        fetch_workers: int,
+        parse_workers: int,
+        queue_size: int,
+    ):
+        self.platform = platform
+        self.fetch = fetch
+        self.parser = parser
+        self.parse_workers = parse_workers
+        self.queue_size = queue_size
+        self.stats = {"fetch": StageStats(fetch_workers), "parse": StageStats(parse_workers)}
+        self.max_queue_depth = 0
+
+    def _put(self, payloads: queue.Queue, item: Any, stop: threading.Event) -> bool:
+        """放入隊列，隊列滿時阻塞直到有空位或 pipeline 被中止；返回是否成功放入。"""
+        blocked_since = time.perf_counter()
+        try:
+            while not stop.is_set():
+                try:
+                    payloads.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats["fetch"].blocked += time.perf_counter() - blocked_since
+
+    def _produce(self, urls: Iterable[Url], payloads: queue.Queue, stop: threading.Event) -> None:
+        """抓取階段：由獨立線程驅動 run_concurrently，將結果依完成順序放入隊列。"""
+        fetch_stats = self.stats["fetch"]
+        results = run_concurrently(
+            self.fetch, urls, fetch_stats.workers, on_latency=lambda _, seconds: fetch_stats.record(seconds)
+        )
+        try:
+            for url_obj, result in results:
+                if isinstance(result, Exception):
+                    # 異常已由 run_concurrently 記錄
+                    item = (url_obj.source_url, CrawlStatus.FAILED, None, describe_error(result))
+                elif result is None:
+                    item = (url_obj.source_url, CrawlStatus.COMPLETED, None, None)
+                else:
+                    item = (url_obj.source_url, None, result, None)
+                if not self._put(payloads, item, stop):
+                    return
+        except Exception as e:
+            logger.error(f"[{self.platform.value}] Fetch stage stopped unexpectedly: {e}", exc_info=True)
+        finally:
+            results.close()
+            self._put(payloads, _DONE, stop)
+
+    def run(self, urls: Iterable[Url], sink: DetailsSink) -> None:
+        """處理所有 URL 並將結果寫入 sink；sink 只在調用線程中使用。"""
+        payloads: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        started = time.perf_counter()
+        producer = threading.Thread(
+            target=self._produce, args=(urls, payloads, stop), name=f"{self.platform.value}-fetch", daemon=True
+        )
+        producer.start()
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.parse_workers, initializer=init_parse_worker, initargs=(self.parser,)
+        )
+        in_flight: Dict[Future, str] = {}
+        producing = True
+        try:
+            while producing or in_flight:
+                # 解析進程有空位時從隊列取出內容；無在途解析時才阻塞等待抓取階段
+                while producing and len(in_flight) < self.parse_workers * 2:
+                    self.max_queue_depth = max(self.max_queue_depth, payloads.qsize())
+                    try:
+                        item = payloads.get(timeout=_POLL_INTERVAL) if not in_flight else payloads.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        producing = False
+                        break
+                    url, status, payload, error = item
+                    if payload is None:
+                        sink.add(url, status, error=error)
+                    else:
+                        in_flight[executor.submit(parse_payload, payload)] = url
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._collect(in_flight.pop(future), future, sink)
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            producer.join()
+            elapsed = time.perf_counter() - started
+            stage_stats = {name: stats.summary(elapsed) for name, stats in self.stats.items()}
+            logger.info(
+                f"[{self.platform.value}] Staged pipeline stats ({elapsed:.1f}s, "
+                f"max queue depth {self.max_queue_depth}/{self.queue_size}): {stage_stats}"
+            )
+
+    def _collect(self, url: str, future: Future, sink: DetailsSink) -> None:
+        try:
+            _, job, error, seconds = future.result()
+        except Exception as e:
+            # 子進程崩潰等無法返回結果的情況
+            job, error, seconds = None, describe_error(e), 0.0
+        self.stats["parse"].record(seconds)
+        if error:
+            logger.error(f"[{self.platform.value}] Failed to process URL: {url}. Reason: {error}")
+            sink.add(url, CrawlStatus.FAILED, error=error)
+        else:
+            sink.add(url, CrawlStatus.COMPLETED, job)
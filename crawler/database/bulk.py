@@ -0,0 +1,195 @@
+# crawler/database/bulk.py
+"""
+大批量回填用的 LOAD DATA 寫入路徑 (Bulk Ingest)。
+
+平台首次上線或全量重抓時，`repository.upsert_jobs` / `upsert_urls` 逐批發送
+的 VALUES upsert 比 MySQL 原生的批量載入慢一個數量級。此模組將正規化後的
+資料行串流寫入本地 TSV，以 `LOAD DATA LOCAL INFILE` 載入與目標表欄位相同的
+暫存表，再以單一 `INSERT ... SELECT ... ON DUPLICATE KEY UPDATE` 合併回目標表。
+暫存表依欄位清單建立而非 `CREATE TEMPORARY TABLE ... LIKE`：LIKE 會複製
+tb_jobs 的 FULLTEXT 索引，而 InnoDB 暫存表不支援全文索引。
+
+合併規則與 repository 相同：tb_urls 沿用 `url_upsert_updates` (指紋未變的
+已完成 URL 保留狀態)，tb_jobs 的內容雜湊未變更時整列保持不變。
+每 `MYSQL_BULK_CHUNK_ROWS` 行載入並合併一次，限制單一事務的大小。
+
+需要客戶端與伺服器都允許 LOCAL INFILE：設定 `MYSQL_LOCAL_INFILE=true`，
+並在 MySQL 開啟 `local_infile=ON`。
+"""
+import logging
+import os
+import tempfile
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, MetaData, Table, UniqueConstraint, case, column, select, table
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.schema import CreateTable
+
+from crawler.database.connection import get_engine
+from crawler.database.schema import Job, Url
+from crawler.database import repository
+from crawler.enums import SourcePlatform
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_NULL = "\\N"
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+# 以十六進位寫入 TSV、載入時以 UNHEX 還原的二進位欄位
+_BINARY_COLUMNS = {"intermediate_data"}
+JOB_COLUMNS = [c.name for c in Job.__table__.columns if c.name != "id"]
+URL_COLUMNS = [c.name for c in Url.__table__.columns]
+# 暫存表上保留的唯一鍵，讓 LOAD DATA ... REPLACE 在合併前去除重複的資料行
+_STAGING_KEYS = {
+    Job.__tablename__: ["source_platform", "source_job_id"],
+    Url.__tablename__: ["url_hash"],
+}
+
+
+def staging_table(target: Table, columns: List[str]) -> Table:
+    """依 `columns` 建立目標表的暫存表定義：只有欄位與去重用的唯一鍵，不含其他索引。"""
+    staged_columns = [Column(name, target.c[name].type, nullable=target.c[name].nullable) for name in columns]
+    return Table(
+        f"stg_{target.name}",
+        MetaData(),
+        *staged_columns,
+        UniqueConstraint(*_STAGING_KEYS[target.name]),
+        prefixes=["TEMPORARY"],
+    )
+
+
+def tsv_field(value: Any) -> str:
+    """將單一值轉為 LOAD DATA 預設格式 (tab 分隔、反斜線轉義、`\\N` 表示 NULL) 的欄位。"""
+    if value is None:
+        return _NULL
+    if isinstance(value, Enum):
+        # SQLAlchemy 的 Enum 欄位以成員名稱存入 MySQL ENUM
+        return value.name
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value).translate(_ESCAPES)
+
+
+def write_tsv(path: str, rows: Iterable[Dict[str, Any]], columns: List[str]) -> int:
+    """將資料行依 `columns` 順序寫入 TSV，返回行數。"""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for row in rows:
+            f.write("\t".join(tsv_field(row.get(name)) for name in columns))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def _load_data_sql(path: str, staging: str, columns: List[str]) -> str:
+    quoted_path = path.replace("\\", "\\\\").replace("'", "\\'")
+    targets = [f"@{name}" if name in _BINARY_COLUMNS else name for name in columns]
+    sql = (
+        f"LOAD DATA LOCAL INFILE '{quoted_path}' REPLACE INTO TABLE {staging} CHARACTER SET utf8mb4 "
+        f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({', '.join(targets)})"
+    )
+    binary = [name for name in columns if name in _BINARY_COLUMNS]
+    if binary:
+        sql += " SET " + ", ".join(f"{name} = UNHEX(@{name})" for name in binary)
+    return sql
+
+
+def _job_merge(staging: str) -> Any:
+    """tb_jobs 的合併語句：內容雜湊相同的職缺保留原值 (包括 updated_at)，不產生寫入。"""
+    jobs = Job.__table__
+    staged = table(staging, *[column(name) for name in JOB_COLUMNS])
+    stmt = insert(jobs).from_select(JOB_COLUMNS, select(*[staged.c[name] for name in JOB_COLUMNS]))
+    unchanged = jobs.c.content_hash.is_not_distinct_from(stmt.inserted.content_hash)
+    # content_hash 必須最後賦值，前面的欄位才能比較到舊的雜湊
+    updates = [
+        (name, case((unchanged, jobs.c[name]), else_=stmt.inserted[name]))
+        for name in repository.JOB_CONTENT_FIELDS + ["updated_at"]
+    ]
+    updates.append(("content_hash", stmt.inserted.content_hash))
+    return stmt.on_duplicate_key_update(updates)
+
+
+def _url_merge(staging: str, now: datetime, refresh_days: int) -> Any:
+    staged = table(staging, *[column(name) for name in URL_COLUMNS])
+    stmt = insert(Url.__table__).from_select(URL_COLUMNS, select(*[staged.c[name] for name in URL_COLUMNS]))
+    return stmt.on_duplicate_key_update(repository.url_upsert_updates(stmt, now, refresh_days))
+
+
+def _bulk_merge(
+    target: Table, columns: List[str], rows: Iterable[Dict[str, Any]], merge: Callable[[str], Any], chunk_rows: Optional[int]
+) -> int:
+    """
+    分塊執行「寫入 TSV → LOAD DATA 到暫存表 → INSERT ... SELECT 合併」，返回載入的行數。
+    """
+    if not settings.db.local_infile:
+        raise RuntimeError("Bulk load requires LOAD DATA LOCAL INFILE; set MYSQL_LOCAL_INFILE=true (and local_infile=ON on the server).")
+
+    chunk_rows = chunk_rows or settings.db.bulk_chunk_rows
+    staged = staging_table(target, columns)
+    staging = staged.name
+    fd, path = tempfile.mkstemp(prefix=f"{target.name}-", suffix=".tsv")
+    os.close(fd)
+    loaded = 0
+    iterator = iter(rows)
+    try:
+        # 暫存表只存在於建立它的連線上：整個載入固定使用同一條連線，每個分塊一個事務
+        with get_engine().connect() as connection:
+            connection.exec_driver_sql(f"DROP TEMPORARY TABLE IF EXISTS {staging}")
+            connection.execute(CreateTable(staged))
+            connection.commit()
+            try:
+                while True:
+                    chunk = write_tsv(path, (row for _, row in zip(range(chunk_rows), iterator)), columns)
+                    if not chunk:
+                        break
+                    with connection.begin():
+                        connection.exec_driver_sql(_load_data_sql(path, staging, columns))
+                        connection.execute(merge(staging))
+                        connection.exec_driver_sql(f"DELETE FROM {staging}")
+                    loaded += chunk
+                    logger.info(f"Bulk-loaded {loaded} rows into {target.name}.")
+            finally:
+                # 清理失敗不應掩蓋原本的異常；殘留的暫存表會在連線下次載入時先被刪除
+                try:
+                    connection.exec_driver_sql(f"DROP TEMPORARY TABLE IF EXISTS {staging}")
+                    connection.commit()
+                except Exception as e:
+                    logger.warning(f"Failed to drop staging table {staging}: {e}")
+    finally:
+        os.remove(path)
+    return loaded
+
+
+def load_jobs(jobs: Iterable[Job], chunk_rows: Optional[int] = None) -> int:
+    """以 LOAD DATA 批量 upsert 職缺；`jobs` 可以是生成器，不會整批載入記憶體。"""
+    now = datetime.utcnow()
+    return _bulk_merge(
+        Job.__table__, JOB_COLUMNS, (repository.job_row(job, now) for job in jobs), _job_merge, chunk_rows
+    )
+
+
+def load_urls(
+    platform: SourcePlatform,
+    urls: Iterable[str],
+    fingerprints: Optional[Dict[str, str]] = None,
+    refresh_days: int = 7,
+    intermediate_data: Optional[Dict[str, bytes]] = None,
+    chunk_rows: Optional[int] = None,
+) -> int:
+    """`repository.upsert_urls` 的 LOAD DATA 版本，參數與合併規則相同。"""
+    fingerprints = fingerprints or {}
+    intermediate_data = intermediate_data or {}
+    now = datetime.utcnow()
+    rows = (repository.url_row(platform, u, fingerprints.get(u), intermediate_data.get(u), now) for u in urls)
+    return _bulk_merge(
+        Url.__table__, URL_COLUMNS, rows, lambda staging: _url_merge(staging, now, refresh_days), chunk_rows
+    )
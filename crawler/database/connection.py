@@ -3,22 +3,60 @@
 此模組負責管理與資料庫的連接。
 """
 import logging
-from typing import Optional
-from sqlalchemy import create_engine, text
+import threading
+from typing import Any, Dict
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn
 from tenacity import retry, stop_after_attempt, wait_exponential, before_log, RetryError
 from crawler.settings import settings
 from crawler.database.schema import metadata
+from crawler.urlhash import url_hash
 
 logger = logging.getLogger(__name__)
-_engine: Optional[Engine] = None
 
-def get_engine() -> Engine:
+# 具名引擎：WRITE 供爬蟲 (repository) 使用並連向主庫；READ 供 API 查詢，可指向唯讀副本
+WRITE, READ = "write", "read"
+_engines: Dict[str, Engine] = {}
+_engine_lock = threading.Lock()
+_pool_capacity: Dict[str, int] = {}
+_peak_checked_out: Dict[str, int] = {}
+
+def _pool_config(role: str) -> Dict[str, Any]:
+    """返回指定角色的連接位址與連線池大小。"""
+    db = settings.db
+    if role == WRITE:
+        # 寫入連線由 sink、租約續約線程與各 worker 線程共用，預設依最大的 max_workers 推算
+        platforms = (settings.p104, settings.p1111, settings.pcake, settings.pyes123)
+        pool_size = db.pool_size or max(p.max_workers for p in platforms) + 2
+        return {"host": db.host, "port": db.port, "pool_size": pool_size, "max_overflow": db.max_overflow}
+    if role == READ:
+        return {
+            "host": db.read_host or db.host,
+            "port": db.read_port or db.port,
+            "pool_size": db.read_pool_size,
+            "max_overflow": db.read_max_overflow,
+        }
+    raise ValueError(f"Unknown database engine role: {role}")
+
+def _track_peak_checkout(role: str, engine: Engine) -> None:
+    """記錄連線池同時借出連線數的峰值，供 `get_pool_stats` 計算利用率。"""
+    _peak_checked_out[role] = 0
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _peak_checked_out[role] = max(_peak_checked_out[role], engine.pool.checkedout())
+
+def get_engine(role: str = WRITE) -> Engine:
     """
-    獲取 SQLAlchemy 引擎實例，帶有強大的連接重試機制和正確的字元集配置。
+    獲取指定角色 (WRITE / READ) 的 SQLAlchemy 引擎實例，帶有強大的連接重試機制和正確的字元集配置。
+    每個角色各自擁有連線池，API 的查詢不會與爬蟲的批次寫入競爭同一批連線。
     """
-    global _engine
-    if _engine is None:
+    if role in _engines:
+        return _engines[role]
+    with _engine_lock:
+        if role in _engines:
+            return _engines[role]
         try:
             @retry(
                 stop=stop_after_attempt(10),
@@ -27,26 +65,34 @@ def get_engine() -> Engine:
                 reraise=True
             )
             def _connect_with_retry() -> Engine:
-                logger.info("正在嘗試創建 MySQL 引擎...")
+                logger.info(f"正在嘗試創建 MySQL 引擎 ({role})...")
                 db = settings.db
+                pool = _pool_config(role)
                 # [關鍵修正] 在連接字串中明確指定 charset=utf8mb4
-                addr = f"mysql+pymysql://{db.user}:{db.password}@{db.host}:{db.port}/{db.database}?charset=utf8mb4"
+                addr = f"mysql+pymysql://{db.user}:{db.password}@{pool['host']}:{pool['port']}/{db.database}?charset=utf8mb4"
                 
                 engine = create_engine(
                     addr,
+                    pool_size=pool["pool_size"],
+                    max_overflow=pool["max_overflow"],
+                    pool_timeout=db.pool_timeout,
                     pool_recycle=3600,
+                    pool_pre_ping=True,
                     echo=False,
-                    connect_args={'connect_timeout': 10}, # pymysql-specific
+                    connect_args={'connect_timeout': 10, 'local_infile': db.local_infile and role == WRITE}, # pymysql-specific
                     isolation_level="READ COMMITTED"
                 )
                 
                 with engine.connect() as conn:
                     conn.execute(text("SELECT 1"))
                     
-                logger.info("MySQL 引擎創建成功且連接測試通過。")
+                logger.info(f"MySQL 引擎 ({role}) 創建成功且連接測試通過，連線池 {pool['pool_size']} + {pool['max_overflow']}。")
+                _pool_capacity[role] = pool["pool_size"] + pool["max_overflow"]
                 return engine
 
-            _engine = _connect_with_retry()
+            engine = _connect_with_retry()
+            _track_peak_checkout(role, engine)
+            _engines[role] = engine
 
         except RetryError as e:
             logger.critical(f"資料庫連接在多次重試後失敗。資料庫可能已關閉或無法訪問。錯誤: {e}", exc_info=True)
@@ -55,7 +101,110 @@ def get_engine() -> Engine:
             logger.critical(f"創建資料庫引擎時發生意外錯誤: {e}", exc_info=True)
             raise RuntimeError("創建資料庫引擎時發生意外錯誤。") from e
             
-    return _engine
+    return _engines[role]
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """返回所有已創建引擎的連線池統計：大小、借出數、溢出數、峰值與利用率。"""
+    stats = {}
+    for role, engine in list(_engines.items()):
+        pool, capacity = engine.pool, _pool_capacity.get(role, 0)
+        checked_out = pool.checkedout()
+        stats[role] = {
+            "size": pool.size(),
+            "checked_out": checked_out,
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "capacity": capacity,
+            "peak_checked_out": _peak_checked_out.get(role, 0),
+            "utilization": round(checked_out / capacity, 2) if capacity else 0.0,
+        }
+    return stats
+
+def _add_missing_columns(engine: Engine) -> None:
+    """
+    為已存在的表補上 schema 中新增的欄位。
+    `metadata.create_all` 只會創建缺少的表，不會修改既有表的結構。
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if column.primary_key:
+                    # 主鍵變更需要回填資料，由專用的遷移指令處理
+                    logger.warning(f"表 '{table.name}' 缺少主鍵欄位 '{column.name}'，請執行對應的 `crawler db` 遷移指令。")
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}"))
+                logger.info(f"已為表 '{table.name}' 新增欄位 '{column.name}'。")
+
+def _add_missing_indexes(engine: Engine) -> None:
+    """為已存在的表補上 schema 中新增的索引 (`metadata.create_all` 同樣不會處理)。"""
+    inspector = inspect(engine)
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=engine)
+                logger.info(f"已為表 '{table.name}' 新增索引 '{index.name}'。")
+
+def migrate_urls_to_hash_key(batch_size: int = 5000) -> int:
+    """
+    將既有 `tb_urls` 的主鍵由 VARCHAR(512) 的 source_url 遷移為 64 位 URL 雜湊。
+
+    依 source_url 順序分批回填 `url_hash`，確認沒有雜湊衝突後再重建主鍵。
+    可重複執行：中斷後重跑會重新回填，主鍵已是 url_hash 時直接返回。
+
+    Returns:
+        int: 回填的資料行數。
+    """
+    engine = get_engine()
+    inspector = inspect(engine)
+    if not inspector.has_table("tb_urls"):
+        logger.info("表 'tb_urls' 不存在，將由 initialize_database 直接以新結構創建。")
+        return 0
+    if inspector.get_pk_constraint("tb_urls")["constrained_columns"] == ["url_hash"]:
+        logger.info("表 'tb_urls' 已使用 url_hash 作為主鍵，無需遷移。")
+        return 0
+
+    if "url_hash" not in {column["name"] for column in inspector.get_columns("tb_urls")}:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE tb_urls ADD COLUMN url_hash BIGINT NULL FIRST"))
+
+    backfilled, last_url = 0, ""
+    while True:
+        with engine.begin() as connection:
+            urls = connection.execute(
+                text("SELECT source_url FROM tb_urls WHERE source_url > :last ORDER BY source_url LIMIT :limit"),
+                {"last": last_url, "limit": batch_size},
+            ).scalars().all()
+            if not urls:
+                break
+            connection.execute(
+                text("UPDATE tb_urls SET url_hash = :url_hash WHERE source_url = :source_url"),
+                [{"url_hash": url_hash(url), "source_url": url} for url in urls],
+            )
+        backfilled += len(urls)
+        last_url = urls[-1]
+        logger.info(f"已回填 {backfilled} 筆 URL 雜湊...")
+
+    with engine.begin() as connection:
+        collisions = connection.execute(text(
+            "SELECT url_hash, COUNT(*) FROM tb_urls GROUP BY url_hash HAVING COUNT(*) > 1 LIMIT 10"
+        )).all()
+        if collisions:
+            raise RuntimeError(f"發現重複的 URL 雜湊 (多為正規化後相同的 URL)，請先清理: {collisions}")
+        connection.execute(text(
+            "ALTER TABLE tb_urls DROP PRIMARY KEY, MODIFY url_hash BIGINT NOT NULL, ADD PRIMARY KEY (url_hash)"
+        ))
+    logger.info(f"表 'tb_urls' 的主鍵已遷移為 url_hash，共回填 {backfilled} 筆。")
+    return backfilled
 
 def initialize_database() -> None:
     """初始化資料庫，創建所有定義的表結構。"""
@@ -68,6 +217,8 @@ def initialize_database() -> None:
             logger.info(f"資料庫 '{settings.db.database}' 的字符集已確認/修改為 utf8mb4。")
         
         metadata.create_all(engine)
+        _add_missing_columns(engine)
+        _add_missing_indexes(engine)
         logger.info("資料庫表初始化檢查完成。")
         
     except Exception as e:
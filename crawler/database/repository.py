@@ -1,17 +1,26 @@
 # crawler/database/repository.py
 """Database repository for interacting with the job crawling data."""
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Set, Optional, Any
 
-from sqlalchemy import update
+import xxhash
+from sqlalchemy import (
+    BigInteger, Column, Enum as EnumDB, MetaData, String, Table, TIMESTAMP, and_, case, func, or_, text, tuple_, update,
+)
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import defer
 from sqlalchemy.dialects.mysql import insert
 import sqlalchemy.sql as sql
 from sqlmodel import Session, select
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_random_exponential, before_sleep_log
 
 from crawler.database.connection import get_engine
 from crawler.database.schema import Url, Job, CategorySource
 from crawler.enums import SourcePlatform, CrawlStatus, JobStatus
+from crawler.settings import settings
+from crawler.urlhash import hash_index, url_hash, url_hashes
 
 logger = logging.getLogger(__name__)
 
@@ -40,36 +49,76 @@ def get_source_categories(platform: SourcePlatform, source_ids: Optional[List[st
             stmt = stmt.where(CategorySource.source_category_id.in_(source_ids))
         return session.exec(stmt).all()
 
-def upsert_urls(platform: SourcePlatform, urls: List[str]) -> None:
+def url_row(
+    platform: SourcePlatform, url: str, fingerprint: Optional[str], intermediate_data: Optional[bytes], now: datetime
+) -> Dict[str, Any]:
+    """新發現 URL 的 tb_urls 資料行 (ACTIVE / PENDING)。"""
+    return {
+        "url_hash": url_hash(url),
+        "source_url": url,
+        "source": platform,
+        "status": JobStatus.ACTIVE,
+        "details_crawl_status": CrawlStatus.PENDING,
+        "fingerprint": fingerprint,
+        "intermediate_data": intermediate_data,
+        "crawled_at": now,
+        "updated_at": now,
+    }
+
+def url_upsert_updates(stmt: Any, now: datetime, refresh_days: int) -> List[tuple]:
+    """
+    tb_urls 的 ON DUPLICATE KEY UPDATE 賦值 (見 `upsert_urls` 的說明)。
+    `stmt` 可以是 VALUES 或 INSERT ... SELECT 形式的 MySQL insert。
+    """
+    url_table = Url.__table__.c
+    unchanged = and_(
+        url_table.details_crawl_status == CrawlStatus.COMPLETED,
+        stmt.inserted.fingerprint.isnot(None),
+        url_table.fingerprint == stmt.inserted.fingerprint,
+        url_table.details_crawled_at >= now - timedelta(days=refresh_days),
+    )
+    # MySQL 依序套用 ON DUPLICATE KEY UPDATE 的賦值，狀態必須在指紋被覆寫前計算
+    return [
+        ("details_crawl_status", case((unchanged, url_table.details_crawl_status), else_=stmt.inserted.details_crawl_status)),
+        ("fingerprint", stmt.inserted.fingerprint),
+        ("intermediate_data", func.coalesce(stmt.inserted.intermediate_data, url_table.intermediate_data)),
+        ("status", stmt.inserted.status),
+        ("updated_at", stmt.inserted.updated_at),
+    ]
+
+def upsert_urls(
+    platform: SourcePlatform,
+    urls: List[str],
+    fingerprints: Optional[Dict[str, str]] = None,
+    refresh_days: int = 7,
+    intermediate_data: Optional[Dict[str, bytes]] = None,
+) -> None:
     """
     Synchronizes a list of URLs for a given platform with the database.
-    Performs an UPSERT operation. URLs are marked as ACTIVE and PENDING.
+    Performs an UPSERT operation. New URLs are marked as ACTIVE and PENDING.
+
+    An existing URL keeps its crawl status when it was COMPLETED, its listing
+    fingerprint is unchanged and its details were crawled within `refresh_days`.
+    Otherwise (new or changed fingerprint, missing fingerprint, failed or stale
+    crawl) it is reset to PENDING so the details pipeline picks it up again.
+
+    `intermediate_data` holds the encoded listing metadata per URL (see
+    crawler.metastore); a URL without an entry keeps its stored copy.
     """
     if not urls:
         return
 
+    fingerprints = fingerprints or {}
+    intermediate_data = intermediate_data or {}
     now = datetime.utcnow()
     # [關鍵修正] 這裡 urls 參數現在明確是 List[str]
     url_models_to_upsert = [
-        {
-            "source_url": u,
-            "source": platform,
-            "status": JobStatus.ACTIVE,
-            "details_crawl_status": CrawlStatus.PENDING,
-            "crawled_at": now,
-            "updated_at": now,
-        }
-        for u in urls
+        url_row(platform, u, fingerprints.get(u), intermediate_data.get(u), now) for u in urls
     ]
 
     with Session(get_engine()) as session:
         stmt = insert(Url).values(url_models_to_upsert)
-        update_dict = {
-            "status": stmt.inserted.status,
-            "updated_at": stmt.inserted.updated_at,
-            "details_crawl_status": stmt.inserted.details_crawl_status,
-        }
-        stmt = stmt.on_duplicate_key_update(**update_dict)
+        stmt = stmt.on_duplicate_key_update(url_upsert_updates(stmt, now, refresh_days))
         session.execute(stmt)
         session.commit()
 
@@ -80,71 +129,291 @@ def get_unprocessed_urls(platform: SourcePlatform, limit: int) -> List[Url]:
             select(Url).where(
                 Url.source == platform,
                 Url.details_crawl_status == CrawlStatus.PENDING
-            ).limit(limit)
+            ).options(defer(Url.intermediate_data)).limit(limit)
         ).all()
 
-def upsert_jobs(jobs: List[Job]) -> None:
-    # ... (此函數不變)
-    if not jobs:
+def claim_urls(platform: SourcePlatform, limit: int, worker_id: str, lease_seconds: int) -> List[Url]:
+    """
+    Atomically claims up to `limit` PENDING URLs for `worker_id`.
+
+    Rows are picked with SELECT ... FOR UPDATE SKIP LOCKED, so concurrent
+    workers never receive the same URL. URLs with no lease, or whose lease has
+    expired (a crashed or stalled worker), are claimable. The lease lasts
+    `lease_seconds` and is cleared when the URL is marked as crawled.
+    """
+    now = datetime.utcnow()
+    with Session(get_engine(), expire_on_commit=False) as session:
+        urls = session.exec(
+            select(Url).where(
+                Url.source == platform,
+                Url.details_crawl_status == CrawlStatus.PENDING,
+                or_(Url.lease_expires_at.is_(None), Url.lease_expires_at < now),
+            ).options(defer(Url.intermediate_data)).limit(limit).with_for_update(skip_locked=True)
+        ).all()
+        if urls:
+            lease_expires_at = now + timedelta(seconds=lease_seconds)
+            session.execute(
+                update(Url)
+                .where(Url.url_hash.in_([u.url_hash for u in urls]))
+                .values(claimed_by=worker_id, lease_expires_at=lease_expires_at)
+            )
+            for url in urls:
+                url.claimed_by, url.lease_expires_at = worker_id, lease_expires_at
+        session.commit()
+        return urls
+
+def renew_leases(urls: List[str], worker_id: str, lease_seconds: int) -> int:
+    """
+    Extends the leases `worker_id` still holds on the given URLs.
+    Returns the number of leases renewed; URLs already marked or reclaimed are skipped.
+    """
+    if not urls:
+        return 0
+    with Session(get_engine()) as session:
+        result = session.execute(
+            update(Url)
+            .where(
+                Url.url_hash.in_(url_hashes(urls)),
+                Url.claimed_by == worker_id,
+                Url.details_crawl_status == CrawlStatus.PENDING,
+            )
+            .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        )
+        session.commit()
+        return result.rowcount
+
+def release_leases(urls: List[str], worker_id: str) -> None:
+    """Gives back the leases `worker_id` holds on URLs it will not process, making them claimable at once."""
+    if not urls:
         return
-        
+    with Session(get_engine()) as session:
+        session.execute(
+            update(Url)
+            .where(Url.url_hash.in_(url_hashes(urls)), Url.claimed_by == worker_id)
+            .values(claimed_by=None, lease_expires_at=None)
+        )
+        session.commit()
+
+def get_intermediate_data(urls: List[str], chunk_size: int = 1000) -> Dict[str, bytes]:
+    """
+    Returns the stored, encoded listing metadata for the given URLs.
+    Used when the Redis copy has expired; URLs without metadata are omitted.
+    """
+    result: Dict[str, bytes] = {}
+    url_by_hash = hash_index(urls)
+    hashes = list(url_by_hash)
+    with Session(get_engine()) as session:
+        for start in range(0, len(hashes), chunk_size):
+            rows = session.exec(
+                select(Url.url_hash, Url.intermediate_data).where(
+                    Url.url_hash.in_(hashes[start:start + chunk_size]),
+                    Url.intermediate_data.isnot(None),
+                )
+            ).all()
+            result.update({url_by_hash[key]: blob for key, blob in rows})
+    return result
+
+def get_pending_urls(urls: List[str], chunk_size: int = 1000) -> List[str]:
+    """
+    Returns the given URLs whose details are still PENDING, e.g. those that
+    `upsert_urls` just (re)queued rather than kept as COMPLETED.
+    """
+    pending: List[str] = []
+    url_by_hash = hash_index(urls)
+    hashes = list(url_by_hash)
+    with Session(get_engine()) as session:
+        for start in range(0, len(hashes), chunk_size):
+            rows = session.exec(
+                select(Url.url_hash).where(
+                    Url.url_hash.in_(hashes[start:start + chunk_size]),
+                    Url.details_crawl_status == CrawlStatus.PENDING,
+                )
+            ).all()
+            pending.extend(url_by_hash[key] for key in rows)
+    return pending
+
+# 內容雜湊涵蓋的欄位：不含主鍵、時間戳與雜湊本身
+JOB_CONTENT_FIELDS = [
+    "source_platform", "source_job_id", "url", "status", "title", "description", "job_type",
+    "location_text", "posted_at", "salary_text", "salary_min", "salary_max", "salary_type",
+    "experience_required_text", "education_required_text", "company_source_id", "company_name", "company_url",
+]
+# InnoDB 的死鎖 (1213) 與鎖等待逾時 (1205)，整個事務已回滾，可以安全重試
+_RETRYABLE_MYSQL_ERRORS = {1205, 1213}
+
+def job_content_hash(job_dict: Dict[str, Any]) -> str:
+    """職缺內容欄位的 xxh64 十六進位摘要；內容未變更的職缺不會被重新寫入。"""
+    content = [job_dict.get(field) for field in JOB_CONTENT_FIELDS]
+    return xxhash.xxh64(json.dumps(content, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()
+
+def job_row(job: Job, now: datetime) -> Dict[str, Any]:
+    """將 Job 轉為 tb_jobs 資料行，並附上內容雜湊與寫入時間。"""
+    job_dict = job.model_dump(exclude_none=False)
+    job_dict["source_platform"] = SourcePlatform(job_dict["source_platform"])
+    job_dict["content_hash"] = job_content_hash(job_dict)
+    job_dict["updated_at"] = now
+    job_dict["created_at"] = job_dict.get("created_at") or now
+    return job_dict
+
+def _is_retryable_lock_error(exc: BaseException) -> bool:
+    return isinstance(exc, OperationalError) and bool(exc.orig.args) and exc.orig.args[0] in _RETRYABLE_MYSQL_ERRORS
+
+@retry(
+    retry=retry_if_exception(_is_retryable_lock_error),
+    stop=stop_after_attempt(5),
+    wait=wait_random_exponential(multiplier=0.1, max=2),
+    before_sleep=before_sleep_log(logger, logging.WARNING),
+    reraise=True,
+)
+def _upsert_job_chunk(rows: List[Dict[str, Any]]) -> int:
+    """
+    在單一事務中 upsert 一個批次，返回實際寫入的職缺數。
+
+    先查出既有職缺的 content_hash，只寫入新職缺與內容已變更的職缺，
+    未變更的職缺 (包括大型 description) 完全不會產生寫入、redo log 與 binlog。
+    """
+    keys = [(row["source_platform"], row["source_job_id"]) for row in rows]
     with Session(get_engine()) as session:
         try:
-            now = datetime.utcnow()
-            job_dicts_to_upsert = []
-            for job in jobs:
-                job_dict = job.model_dump(exclude_none=False)
-                job_dict['updated_at'] = now
-                if 'created_at' not in job_dict:
-                    job_dict['created_at'] = now
-                job_dicts_to_upsert.append(job_dict)
-
-            if not job_dicts_to_upsert:
-                return
-
-            stmt = insert(Job).values(job_dicts_to_upsert)
-            
-            update_cols = {
-                "source_platform": stmt.inserted.source_platform,
-                "source_job_id": stmt.inserted.source_job_id,
-                "url": stmt.inserted.url,
-                "status": stmt.inserted.status,
-                "title": stmt.inserted.title,
-                "description": stmt.inserted.description,
-                "job_type": stmt.inserted.job_type,
-                "location_text": stmt.inserted.location_text,
-                "posted_at": stmt.inserted.posted_at,
-                "salary_text": stmt.inserted.salary_text,
-                "salary_min": stmt.inserted.salary_min,
-                "salary_max": stmt.inserted.salary_max,
-                "salary_type": stmt.inserted.salary_type,
-                "experience_required_text": stmt.inserted.experience_required_text,
-                "education_required_text": stmt.inserted.education_required_text,
-                "company_source_id": stmt.inserted.company_source_id,
-                "company_name": stmt.inserted.company_name,
-                "company_url": stmt.inserted.company_url,
-                "updated_at": stmt.inserted.updated_at,
+            existing = {
+                (SourcePlatform(platform), job_id): content_hash
+                for platform, job_id, content_hash in session.exec(
+                    select(Job.source_platform, Job.source_job_id, Job.content_hash)
+                    .where(tuple_(Job.source_platform, Job.source_job_id).in_(keys))
+                ).all()
             }
-            
-            final_stmt = stmt.on_duplicate_key_update(**update_cols)
-            result = session.execute(final_stmt)
-            session.commit()
-            logger.info(f"Upserted or updated {result.rowcount} jobs.")
+            changed = [
+                row for row, key in zip(rows, keys)
+                if key not in existing or existing[key] != row["content_hash"]
+            ]
+            if not changed:
+                return 0
 
-        except Exception as e:
+            stmt = insert(Job).values(changed)
+            update_cols = {field: stmt.inserted[field] for field in JOB_CONTENT_FIELDS}
+            update_cols["content_hash"] = stmt.inserted.content_hash
+            update_cols["updated_at"] = stmt.inserted.updated_at
+            session.execute(stmt.on_duplicate_key_update(**update_cols))
+            session.commit()
+            return len(changed)
+        except Exception:
             session.rollback()
-            logger.error(f"Failed to upsert jobs: {e}", exc_info=True)
             raise
 
-def mark_urls_as_crawled(processed_urls: Dict[CrawlStatus, List[str]]) -> None:
-    # ... (此函數不變)
+def upsert_jobs(jobs: List[Job], batch_size: Optional[int] = None) -> None:
+    """
+    Bulk-upserts jobs in chunks of `batch_size` (default MYSQL_UPSERT_BATCH_SIZE).
+
+    Rows are sorted by (source_platform, source_job_id) so concurrent workers
+    lock unique-index entries in the same order, and each chunk is its own
+    transaction that is retried on deadlock or lock-wait timeout. Jobs whose
+    content hash matches the stored one are skipped entirely.
+    """
+    if not jobs:
+        return
+
+    batch_size = batch_size or settings.db.upsert_batch_size
     now = datetime.utcnow()
-    with Session(get_engine()) as session:
-        for status, urls in processed_urls.items():
-            if urls:
-                stmt = update(Url).where(Url.source_url.in_(urls)).values(
-                    details_crawl_status=status,
-                    details_crawled_at=now
-                )
-                session.execute(stmt)
-        session.commit()
\ No newline at end of file
+    rows_by_key: Dict[tuple, Dict[str, Any]] = {}
+    for job in jobs:
+        job_dict = job_row(job, now)
+        # 同一批次中重複的職缺只保留最後一筆
+        rows_by_key[(job_dict["source_platform"].value, job_dict["source_job_id"])] = job_dict
+    rows = [rows_by_key[key] for key in sorted(rows_by_key)]
+
+    written = 0
+    try:
+        for start in range(0, len(rows), batch_size):
+            written += _upsert_job_chunk(rows[start:start + batch_size])
+    except Exception as e:
+        logger.error(f"Failed to upsert jobs: {e}", exc_info=True)
+        raise
+    logger.info(f"Upserted {written} new or changed jobs, skipped {len(rows) - written} unchanged.")
+
+# 狀態回寫的暫存表：每個連線各自一份，不屬於 SQLModel.metadata，不會被 create_all 創建
+_url_status_staging = Table(
+    "tmp_url_status",
+    MetaData(),
+    Column("url_hash", BigInteger, primary_key=True, autoincrement=False),
+    Column("details_crawl_status", EnumDB(CrawlStatus), nullable=False),
+    Column("details_crawled_at", TIMESTAMP, nullable=False),
+    Column("error_reason", String(255)),
+    prefixes=["TEMPORARY"],
+    mysql_engine="MEMORY",
+)
+_ERROR_REASON_MAX_LEN = 255
+
+def mark_urls_as_crawled(
+    processed_urls: Dict[CrawlStatus, List[str]],
+    error_reasons: Optional[Dict[str, str]] = None,
+    batch_size: Optional[int] = None,
+    holder: Optional[str] = None,
+) -> None:
+    """
+    Writes back the details crawl status of processed URLs.
+
+    Rows (url_hash, status, crawled_at, error_reason) are staged into a
+    per-connection temporary table with executemany and applied with a single
+    joined UPDATE per chunk of `batch_size` (default MYSQL_STATUS_BATCH_SIZE),
+    so statements stay small and row locks are held only for one chunk.
+    Chunks are sorted by hash so concurrent writers lock rows in the same order.
+    The lease is cleared, and `error_reasons` (failed URLs only) is recorded;
+    successful URLs get their previous error cleared.
+
+    When `holder` (the UrlLease worker id) is given, only rows still claimed by
+    that worker are updated: a URL whose lease expired and was re-claimed by
+    another worker is left to the new holder instead of having its lease wiped.
+    """
+    error_reasons = error_reasons or {}
+    now = datetime.utcnow()
+    rows_by_hash: Dict[int, Dict[str, Any]] = {}
+    for status, urls in processed_urls.items():
+        for url in urls:
+            reason = error_reasons.get(url) if status == CrawlStatus.FAILED else None
+            key = url_hash(url)
+            rows_by_hash[key] = {
+                "url_hash": key,
+                "details_crawl_status": status,
+                "details_crawled_at": now,
+                "error_reason": reason[:_ERROR_REASON_MAX_LEN] if reason else None,
+            }
+    if not rows_by_hash:
+        return
+    rows = [rows_by_hash[key] for key in sorted(rows_by_hash)]
+    batch_size = batch_size or settings.db.status_batch_size
+
+    url_table, staged = Url.__table__, _url_status_staging
+    apply_staged = update(url_table).where(url_table.c.url_hash == staged.c.url_hash)
+    if holder is not None:
+        apply_staged = apply_staged.where(url_table.c.claimed_by == holder)
+    apply_staged = (
+        apply_staged
+        .values(
+            details_crawl_status=staged.c.details_crawl_status,
+            details_crawled_at=staged.c.details_crawled_at,
+            error_reason=staged.c.error_reason,
+            claimed_by=None,
+            lease_expires_at=None,
+        )
+    )
+    drop_staged = text(f"DROP TEMPORARY TABLE IF EXISTS {staged.name}")
+
+    # 暫存表只存在於建立它的連線上：建立、寫入、更新與刪除都固定在同一條連線，每個分塊一個事務
+    with get_engine().connect() as connection:
+        # 連線來自連線池，先清除上次異常中斷時可能殘留的暫存表
+        connection.execute(drop_staged)
+        staged.create(connection)
+        connection.commit()
+        try:
+            for start in range(0, len(rows), batch_size):
+                with connection.begin():
+                    connection.execute(staged.insert(), rows[start:start + batch_size])
+                    connection.execute(apply_staged)
+                    connection.execute(staged.delete())
+        finally:
+            # 清理失敗不應掩蓋原本的異常；殘留的暫存表會在連線下次使用時先被刪除
+            try:
+                connection.execute(drop_staged)
+                connection.commit()
+            except Exception as e:
+                logger.warning(f"Failed to drop temporary table {staged.name}: {e}")
@@ -2,7 +2,7 @@
 """SQLModel schemas for the job crawling database."""
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Text, TIMESTAMP, BigInteger, Enum as EnumDB, UniqueConstraint
+from sqlalchemy import Column, String, Text, TIMESTAMP, BigInteger, LargeBinary, Enum as EnumDB, Index, UniqueConstraint
 
 from sqlmodel import Field, SQLModel
 from crawler.enums import JobStatus, CrawlStatus, JobType, SalaryType, SourcePlatform
@@ -22,13 +22,25 @@ class CategorySource(SQLModel, table=True):
 class Url(SQLModel, table=True):
     """(Phase 1) 職缺 URL 表，追蹤其生命週期。"""
     __tablename__ = "tb_urls"
-    source_url: str = Field(primary_key=True, max_length=512)
+    # 主鍵為正規化 URL 的 xxh64 (見 crawler.urlhash)，次級索引不再攜帶完整 URL
+    url_hash: int = Field(sa_column=Column(BigInteger, primary_key=True, autoincrement=False))
+    source_url: str = Field(sa_column=Column(String(512), nullable=False))
     source: SourcePlatform = Field(sa_column=Column(EnumDB(SourcePlatform), nullable=False, index=True))
     status: JobStatus = Field(default=JobStatus.ACTIVE, sa_column=Column(EnumDB(JobStatus), nullable=False, index=True))
     details_crawl_status: CrawlStatus = Field(default=CrawlStatus.PENDING, sa_column=Column(EnumDB(CrawlStatus), nullable=False, index=True))
     crawled_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(TIMESTAMP, nullable=False))
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(TIMESTAMP, nullable=False, onupdate=datetime.utcnow))
     details_crawled_at: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP))
+    # 列表項目的指紋，只有指紋改變 (或超過強制刷新間隔) 時才重新抓取詳情
+    fingerprint: Optional[str] = Field(default=None, max_length=40)
+    # 精簡後的列表中介資料 (見 crawler.metastore)，Redis 中的副本過期時使用
+    intermediate_data: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary))
+    # 詳情 worker 的租約：claimed_by 為持有者，租約過期後其他 worker 可重新認領
+    claimed_by: Optional[str] = Field(default=None, max_length=128)
+    lease_expires_at: Optional[datetime] = Field(default=None, sa_column=Column(TIMESTAMP, nullable=True))
+    # 最近一次詳情抓取失敗的原因，成功時清空
+    error_reason: Optional[str] = Field(default=None, max_length=255)
+    __table_args__ = (Index("ix_urls_claim", "source", "details_crawl_status", "lease_expires_at"),)
 
 class Job(SQLModel, table=True):
     """(Phase 1) 標準化職缺詳情表。"""
@@ -56,8 +68,16 @@ class Job(SQLModel, table=True):
     company_source_id: Optional[str] = Field(default=None, max_length=255)
     company_name: Optional[str] = Field(default=None, max_length=255)
     company_url: Optional[str] = Field(default=None, max_length=512)
+    # 內容欄位的 xxh64 (見 repository.job_content_hash)，未變更的職缺 upsert 時直接跳過
+    content_hash: Optional[str] = Field(default=None, max_length=16)
     created_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(TIMESTAMP, nullable=False))
     updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column=Column(TIMESTAMP, nullable=False, onupdate=datetime.utcnow))
-    __table_args__ = (UniqueConstraint("source_platform", "source_job_id", name="uq_source_job"),)
+    __table_args__ = (
+        UniqueConstraint("source_platform", "source_job_id", name="uq_source_job"),
+        # API 關鍵字搜索使用的全文索引；ngram 解析器才能切分中文
+        Index("ft_jobs_text", "title", "company_name", "description", mysql_prefix="FULLTEXT", mysql_with_parser="ngram"),
+        # API 以 (updated_at, id) 進行 keyset 分頁與排序
+        Index("ix_jobs_updated_at_id", "updated_at", "id"),
+    )
 
 metadata = SQLModel.metadata
\ No newline at end of file
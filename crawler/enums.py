@@ -27,6 +27,12 @@ class CrawlStatus(str, Enum):
     COMPLETED = "completed"
     FAILED = "failed"
 
+class ExecutionMode(str, Enum):
+    """詳情 pipeline 的併發執行模式。"""
+    THREAD = "thread"
+    ASYNC = "async"
+    PIPELINE = "pipeline"  # 抓取線程 + 解析進程池，見 crawler.core.staged
+
 class SalaryType(str, Enum):
     """標準化的薪資給付週期。"""
     MONTHLY = "MONTHLY"
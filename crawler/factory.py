@@ -7,7 +7,7 @@ import logging
 from typing import Any, Optional, List
 
 from crawler.core.orchestrator import CrawlerOrchestrator
-from crawler.core.protocols import CategoryFetcher
+from crawler.core.protocols import CategoryFetcher, AsyncDetailFetcher
 from crawler.enums import SourcePlatform
 from crawler.database import repository
 from crawler.settings import settings
@@ -40,6 +40,7 @@ def create_crawler(platform: SourcePlatform) -> CrawlerOrchestrator:
 
     url_fetcher = None
     detail_fetcher = None
+    async_detail_fetcher: Optional[AsyncDetailFetcher] = None
     detail_parser = None
     category_fetcher: Optional[CategoryFetcher] = None
 
@@ -47,6 +48,7 @@ def create_crawler(platform: SourcePlatform) -> CrawlerOrchestrator:
         from crawler.projects.platform_104 import strategies
         url_fetcher = strategies.ApiUrlFetcher(categories, platform_settings)
         detail_fetcher = strategies.ApiDetailFetcher(platform_settings)
+        async_detail_fetcher = strategies.AsyncApiDetailFetcher(platform_settings)
         detail_parser = strategies.ApiDetailParser()
         category_fetcher = strategies.ApiCategoryFetcher(platform_settings)
 
@@ -54,6 +56,7 @@ def create_crawler(platform: SourcePlatform) -> CrawlerOrchestrator:
         from crawler.projects.platform_1111 import strategies
         url_fetcher = strategies.ApiUrlFetcher(categories, platform_settings)
         detail_fetcher = strategies.HtmlDetailFetcher(platform_settings)
+        async_detail_fetcher = strategies.AsyncHtmlDetailFetcher(platform_settings)
         detail_parser = strategies.HybridDetailParser()
         category_fetcher = strategies.ApiCategoryFetcher(platform_settings)
 
@@ -62,6 +65,7 @@ def create_crawler(platform: SourcePlatform) -> CrawlerOrchestrator:
         from crawler.projects.platform_cakeresume import strategies
         url_fetcher = strategies.HtmlUrlFetcher(categories, platform_settings)
         detail_fetcher = strategies.HtmlDetailFetcher(platform_settings)
+        async_detail_fetcher = strategies.AsyncHtmlDetailFetcher(platform_settings)
         detail_parser = strategies.ScriptDetailParser()
         category_fetcher = strategies.HtmlCategoryFetcher(platform_settings)
 
@@ -69,6 +73,7 @@ def create_crawler(platform: SourcePlatform) -> CrawlerOrchestrator:
         from crawler.projects.platform_yes123 import strategies
         url_fetcher = strategies.HtmlUrlFetcher(categories, platform_settings)
         detail_fetcher = strategies.HtmlDetailFetcher(platform_settings)
+        async_detail_fetcher = strategies.AsyncHtmlDetailFetcher(platform_settings)
         detail_parser = strategies.HtmlDetailParser()
         category_fetcher = strategies.HtmlCategoryFetcher(platform_settings)
         
@@ -82,4 +87,5 @@ def create_crawler(platform: SourcePlatform) -> CrawlerOrchestrator:
         detail_fetcher=detail_fetcher,
         detail_parser=detail_parser,
         category_fetcher=category_fetcher,
+        async_detail_fetcher=async_detail_fetcher,
     )
\ No newline at end of file
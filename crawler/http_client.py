@@ -0,0 +1,314 @@
+# crawler/http_client.py
+"""HTTP 客戶端註冊中心 (HTTP Client Registry)。
+
+此模組為每個平台維護一個長期存活的 `requests.Session`，取代每次請求都
+調用模組級 `requests.request` 的做法，讓同一平台的列表頁與詳情頁請求
+共用 keep-alive 連線池，避免重複的 TCP + TLS 握手。
+
+每個 Session 內部的 `HTTPAdapter` 會為不同主機各自維護一個連線池，
+池大小由平台配置的 `max_workers` 決定。此外本模組還負責：
+1.  **壓縮協商**：宣告 gzip / deflate / br (需安裝 brotli) 並自動解壓。
+2.  **DNS 快取**：客戶端的連線以帶 TTL 的 LRU 快取解析主機名，不影響行程中的其他程式庫。
+3.  **響應大小上限**：以串流方式讀取響應體，超過上限即中止並拋出異常。
+4.  **連線統計**：按主機記錄請求數、錯誤數、傳輸量與新建連線數。
+5.  **限流**：發送前向 `crawler.ratelimit` 申請許可，並以響應結果回饋速率。
+"""
+import logging
+import socket
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import make_headers
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+
+from crawler.ratelimit import get_rate_limiter
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseTooLargeError(requests.RequestException):
+    """響應體超過 `settings.http.max_response_bytes` 時拋出。"""
+
+
+# --- DNS 快取 ---
+
+class DnsCache:
+    """
+    `socket.getaddrinfo` 結果的 LRU 快取，每個項目在 `ttl` 秒後過期。
+
+    只由本模組的連線類別使用，不替換行程全域的 `socket.getaddrinfo`。
+    寫入時先清除已過期的項目，再依最近使用順序淘汰超出 `max_entries` 的項目。
+    """
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, List[Tuple]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host: str, port: int) -> List[Tuple]:
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                self._entries.move_to_end(key)
+                return cached[1]
+
+        result = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            for stale in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                del self._entries[stale]
+            self._entries[key] = (now + self.ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_dns_cache = DnsCache(settings.http.dns_cache_ttl, settings.http.dns_cache_size)
+
+def _create_connection(
+    address: Tuple[str, int], timeout: Any, source_address: Optional[Tuple] = None, socket_options: Optional[List] = None
+) -> socket.socket:
+    """與 `urllib3.util.connection.create_connection` 相同，但以 `_dns_cache` 解析主機名。"""
+    host, port = address
+    if host.startswith("["):
+        host = host.strip("[]")
+    error: Optional[OSError] = None
+    for family, socktype, proto, _, sockaddr in _dns_cache.getaddrinfo(host, port):
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            for option in socket_options or []:
+                sock.setsockopt(*option)
+            if timeout is not _DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            sock.connect(sockaddr)
+            return sock
+        except OSError as e:
+            error = e
+            if sock is not None:
+                sock.close()
+    raise error or OSError("getaddrinfo returns an empty list")
+
+
+class _CachedDnsConnectionMixin:
+    """以 `_create_connection` 取代 urllib3 預設建立 socket 的方式，異常轉換與原實現一致。"""
+    def _new_conn(self) -> socket.socket:
+        try:
+            sock = _create_connection(
+                (self._dns_host, self.port), self.timeout,
+                source_address=self.source_address, socket_options=self.socket_options,
+            )
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f"Failed to resolve '{self.host}': {e}") from e
+        except socket.timeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})"
+            ) from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+
+class _CachedDnsHTTPConnection(_CachedDnsConnectionMixin, HTTPConnection):
+    pass
+
+
+class _CachedDnsHTTPSConnection(_CachedDnsConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _CachedDnsHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _CachedDnsHTTPConnection
+
+
+class _CachedDnsHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _CachedDnsHTTPSConnection
+
+
+class CachedDnsAdapter(HTTPAdapter):
+    """連線池使用 `_dns_cache` 解析主機名的 `HTTPAdapter`。"""
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CachedDnsHTTPConnectionPool,
+            "https": _CachedDnsHTTPSConnectionPool,
+        }
+
+
+# --- HTTP 客戶端 ---
+
+class HttpClient:
+    """
+    單一平台的 HTTP 客戶端，封裝一個共享的 `requests.Session`。
+
+    Attributes:
+        name (str): 客戶端名稱，通常為平台值 (例如 "platform_104")。
+        session (requests.Session): 帶有 keep-alive 連線池的 Session。
+    """
+    def __init__(self, name: str, pool_maxsize: int):
+        self.name = name
+        self.pool_maxsize = pool_maxsize
+        self.max_response_bytes = settings.http.max_response_bytes
+        adapter_cls = CachedDnsAdapter if settings.http.dns_cache_ttl > 0 else HTTPAdapter
+        self.adapter = adapter_cls(
+            pool_connections=settings.http.pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        # urllib3 只會在 brotli 可用時宣告 br
+        self.session.headers["Accept-Encoding"] = make_headers(accept_encoding=True)["accept-encoding"]
+
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(
+            lambda: {"requests": 0, "errors": 0, "bytes": 0, "elapsed": 0.0}
+        )
+        self._stats_lock = threading.Lock()
+
+    def _read_body(self, response: requests.Response) -> bytes:
+        """以串流方式讀取 (已解壓的) 響應體，超過上限時中止連線。"""
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > self.max_response_bytes:
+            response.close()
+            raise ResponseTooLargeError(
+                f"Response from {response.url} declares {declared} bytes, limit is {self.max_response_bytes}.",
+                response=response,
+            )
+
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_response_bytes:
+                response.close()
+                raise ResponseTooLargeError(
+                    f"Response from {response.url} exceeded {self.max_response_bytes} bytes.",
+                    response=response,
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        timeout: int = 20,
+        **kwargs
+    ) -> requests.Response:
+        """
+        發送請求並返回已完整讀取響應體的 `requests.Response`。
+
+        響應體讀取完畢後連線即歸還連線池，因此調用方可以照常使用
+        `.text` / `.json()`，無需關心串流細節。
+        """
+        host = urlparse(url).hostname or ""
+        limiter = get_rate_limiter()
+        limiter.acquire(self.name, host)
+
+        started = time.monotonic()
+        received = 0
+        try:
+            try:
+                response = self.session.request(
+                    method, url, headers=headers, params=params, timeout=timeout, stream=True, **kwargs
+                )
+            except requests.Timeout:
+                limiter.feedback(self.name, host, None)
+                raise
+            limiter.feedback(self.name, host, response.status_code)
+            response._content = self._read_body(response)
+            received = len(response._content)
+            return response
+        except requests.RequestException:
+            with self._stats_lock:
+                self._stats[host]["errors"] += 1
+            raise
+        finally:
+            with self._stats_lock:
+                stats = self._stats[host]
+                stats["requests"] += 1
+                stats["bytes"] += received
+                stats["elapsed"] += time.monotonic() - started
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回按主機分組的請求統計，並附上連線池的新建連線數。"""
+        with self._stats_lock:
+            result = {host: dict(values) for host, values in self._stats.items()}
+
+        pools = self.adapter.poolmanager.pools
+        for pool_key in pools.keys():
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            host_stats = result.setdefault(pool.host, {"requests": 0, "errors": 0, "bytes": 0, "elapsed": 0.0})
+            host_stats["connections_opened"] = host_stats.get("connections_opened", 0) + pool.num_connections
+        return result
+
+    def grow_pool(self, pool_maxsize: int) -> None:
+        """
+        將每個主機的連線池擴大到 `pool_maxsize` (只增不減)。
+        舊的 PoolManager 在替換後清空，關閉其閒置連線；仍在使用中的連線歸還時即關閉。
+        """
+        if pool_maxsize <= self.pool_maxsize:
+            return
+        old_manager = self.adapter.poolmanager
+        self.adapter.init_poolmanager(settings.http.pool_connections, pool_maxsize)
+        old_manager.clear()
+        self.pool_maxsize = pool_maxsize
+        logger.info(f"'{self.name}' 的 HTTP 連線池已擴大至 {pool_maxsize}。")
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[str, HttpClient] = {}
+_clients_lock = threading.Lock()
+
+def get_http_client(name: str = "default", pool_maxsize: int = 10) -> HttpClient:
+    """
+    獲取指定名稱的共享 HttpClient，不存在時以 `pool_maxsize` 創建。
+    同一平台的不同組件 (例如併發數不同的 URL 發現與詳情抓取) 請求不同大小時，
+    連線池取其中的最大值。
+
+    Args:
+        name (str): 客戶端名稱，各平台使用其 `SourcePlatform` 值。
+        pool_maxsize (int): 每個主機的連線池大小，通常取平台的 `max_workers`。
+
+    Returns:
+        HttpClient: 全域共享的客戶端實例。
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = HttpClient(name, pool_maxsize)
+                _clients[name] = client
+                logger.info(f"已為 '{name}' 創建 HTTP 客戶端，連線池大小: {pool_maxsize}。")
+    if pool_maxsize > client.pool_maxsize:
+        with _clients_lock:
+            client.grow_pool(pool_maxsize)
+    return client
+
+def get_connection_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """返回所有已創建客戶端的按主機連線統計。"""
+    return {name: client.stats() for name, client in list(_clients.items())}
@@ -0,0 +1,136 @@
+# crawler/metastore.py
+"""列表階段中介資料的精簡儲存 (Compact Intermediate-Data Store)。
+
+部分平台的 DetailParser 需要 UrlFetcher 階段取得的列表項目 (例如 1111 的
+jobId 與公司資訊)。此模組只保留平台 `intermediate_fields` 中解析器實際讀取
+的欄位，以 msgpack 編碼 (較大的值再以 zstd 壓縮)，存放在每個平台一個的
+Redis hash `imeta:{platform}` 中，hash 欄位是由 URL 得出的短職缺鍵。
+
+同一份編碼後的資料也會隨 URL 寫入 MySQL (`tb_urls.intermediate_data`)。
+Redis 中的資料過期、被清除或 Redis 無法連接時，Orchestrator 會改從 MySQL
+讀取，因此 details 延遲執行不會讓職缺因缺少中介資料而失敗。
+URL pipeline 只為 `upsert_urls` 後仍為 PENDING 的職缺寫入 Redis，職缺完成或
+失敗後 `DetailsSink` 會刪除其欄位 (失敗的職缺下次被重新排入時會再寫入)，
+因此 hash 只保留待抓取的職缺，不會隨每次發現的全部 URL 無限增長。
+"""
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import msgpack
+import redis
+import zstandard
+from redis.client import Redis as RedisClient
+
+from crawler.cache import get_redis_client
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 編碼格式的第一個字節：未壓縮的 msgpack 或 zstd 壓縮後的 msgpack
+_RAW, _ZSTD = b"\x00", b"\x01"
+# 小於此大小的 msgpack 不壓縮；zstd 的幀標頭會讓精簡後的小物件反而變大
+COMPRESS_MIN_BYTES = 128
+# 每個 HMGET / HSET / HDEL 命令的欄位數
+CHUNK_SIZE = 500
+
+
+def job_key(url: str) -> str:
+    """
+    由職缺 URL 得出短鍵：路徑最後一段是純數字 ID 時直接使用 (例如 1111 的
+    `/job/103687212`)，否則使用 URL 的 64 位 BLAKE2b 摘要。
+    """
+    last_segment = urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+    if last_segment.isdigit():
+        return last_segment
+    return hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def encode_meta(item: Dict[str, Any], fields: List[str]) -> bytes:
+    """只保留 `fields` 中的欄位 (為空時保留整個項目) 並編碼。"""
+    trimmed = {field: item[field] for field in fields if field in item} if fields else item
+    packed = msgpack.packb(trimmed, use_bin_type=True, default=str)
+    if len(packed) < COMPRESS_MIN_BYTES:
+        return _RAW + packed
+    return _ZSTD + zstandard.compress(packed)
+
+
+def decode_meta(blob: bytes) -> Dict[str, Any]:
+    """`encode_meta` 的逆操作。"""
+    header, body = blob[:1], blob[1:]
+    if header == _ZSTD:
+        body = zstandard.decompress(body)
+    return msgpack.unpackb(body, raw=False)
+
+
+class IntermediateStore:
+    """
+    單一平台的中介資料 Redis hash。
+
+    Attributes:
+        platform (str): 平台值，例如 "platform_1111"。
+        ttl (int): hash 的保留秒數，每次寫入時刷新。
+    """
+    def __init__(self, platform: str, client: RedisClient, ttl: int):
+        self.platform = platform
+        self.redis = client
+        self.ttl = ttl
+        self.key = f"imeta:{platform}"
+
+    def put_many(self, blobs: Dict[str, bytes]) -> None:
+        """寫入 `{url: encoded}`；失敗只記錄警告，詳情階段會改從 MySQL 讀取。"""
+        if not blobs:
+            return
+        mapping = {job_key(url): blob for url, blob in blobs.items()}
+        fields = list(mapping)
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for start in range(0, len(fields), CHUNK_SIZE):
+                pipe.hset(self.key, mapping={field: mapping[field] for field in fields[start:start + CHUNK_SIZE]})
+            pipe.expire(self.key, self.ttl)
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法寫入中介資料到 Redis: {e}")
+
+    def get_many(self, urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """以分塊 HMGET 取回並解碼；找不到的 URL 不會出現在結果中。"""
+        if not urls:
+            return {}
+        fields = [job_key(url) for url in urls]
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for start in range(0, len(fields), CHUNK_SIZE):
+                pipe.hmget(self.key, fields[start:start + CHUNK_SIZE])
+            values = [value for chunk in pipe.execute() for value in chunk]
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法從 Redis 讀取中介資料: {e}")
+            return {}
+        return {url: decode_meta(value) for url, value in zip(urls, values) if value}
+
+    def discard(self, urls: Iterable[str]) -> None:
+        """刪除已成功入庫職缺的欄位。"""
+        fields = [job_key(url) for url in urls]
+        if not fields:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for start in range(0, len(fields), CHUNK_SIZE):
+                pipe.hdel(self.key, *fields[start:start + CHUNK_SIZE])
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法刪除已完成職缺的中介資料: {e}")
+
+
+def get_intermediate_store(platform: str, enabled: bool) -> Optional[IntermediateStore]:
+    """
+    返回平台的中介資料儲存；平台不需要中介資料或 Redis 無法連接時返回 None
+    (後者仍會使用 MySQL 中的副本)。
+    """
+    if not enabled:
+        return None
+    try:
+        return IntermediateStore(platform, get_redis_client(decode_responses=False), settings.redis.meta_ttl)
+    except RuntimeError as e:
+        logger.warning(f"[{platform}] 無法初始化中介資料的 Redis 儲存，將只使用 MySQL: {e}")
+        return None
@@ -8,8 +8,12 @@ import logging
 import json
 from typing import List, Dict, Any, Generator, Optional
 
-from crawler.core.protocols import UrlFetcher, DetailFetcher, DetailParser
-from crawler.utils import make_request
+from crawler.core.protocols import UrlFetcher, DetailFetcher, AsyncDetailFetcher, DetailParser
+from crawler.enums import SourcePlatform
+from crawler.http_client import get_http_client
+from crawler.utils import make_request, make_async_request, run_concurrently
+from crawler.validators import get_validator_cache
+from crawler.watermark import CategoryWatermark, get_watermark_store
 from crawler.database.schema import Job, CategorySource
 from . import parsers
 
@@ -19,75 +23,123 @@ class ApiCategoryFetcher:
     """策略實現：從 104 API 獲取職務分類數據。"""
     def __init__(self, settings: Any):
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_104.value, settings.max_workers)
 
     def __call__(self) -> List[Dict[str, Any]]:
         logger.info("[104] 開始從 API 獲取職務分類。")
         api_url = "https://static.104.com.tw/category-tool/json/JobCat.json"
-        res = make_request(api_url, headers=self.cfg.headers)
+        res = make_request(api_url, headers=self.cfg.headers, client=self.http)
         json_data = res.json()
         transformed_data = parsers.transform_categories_to_source_model(json_data)
         logger.info(f"[104] 成功獲取並轉換 {len(transformed_data)} 個職務分類。")
         return transformed_data
 
 class ApiUrlFetcher:
-    """策略實現：通過 104 的搜索 API 獲取職缺列表。"""
+    """
+    策略實現：通過 104 的搜索 API 獲取職缺列表。
+
+    各分類內的頁面依序抓取 (遇到空頁即停止)，不同分類之間則以
+    `discovery_workers` 個線程併發抓取。啟用增量發現時，以職缺的
+    `appearDate` 作為高水位，翻到整頁都早於上次高水位的頁面即停止。
+    """
     def __init__(self, categories: List[CategorySource], settings: Any):
         self.categories = categories
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_104.value, settings.discovery_workers)
+        self.watermarks = get_watermark_store(SourcePlatform.PLATFORM_104.value, settings.incremental_discovery)
+        # 完整抓取的分類高水位，待 URL 寫入資料庫後由 Orchestrator 提交
+        self.pending_watermarks: List[CategoryWatermark] = []
 
     def __call__(self) -> Generator[Dict[str, Any], None, None]:
         if not self.categories:
             logger.warning("[104] UrlFetcher 未收到任何分類，將跳過 URL 抓取。")
             return
 
-        logger.info(f"[104] 開始為 {len(self.categories)} 個分類抓取 URL。")
-        for cat in self.categories:
-            logger.debug(f"[104] 正在抓取分類: {cat.source_category_name} ({cat.source_category_id})")
-            for page in range(1, self.cfg.max_pages + 1):
-                params = {
-                    "ro": 0,
-                    "jobCat": cat.source_category_id,
-                    "order": 16,
-                    "page": page,
-                    "isnew": 30,
-                }
-                try:
-                    res = make_request(
-                        "https://www.104.com.tw/jobs/search/list",
-                        headers=self.cfg.headers,
-                        params=params
-                    )
-                    data = res.json().get("data", {})
-                    jobs = data.get("list", [])
-
-                    if not jobs:
-                        logger.info(f"[104] 分類 {cat.source_category_id} 在第 {page} 頁已無更多職缺。")
-                        break
-
-                    logger.debug(f"[104] 於分類 {cat.source_category_id} 第 {page} 頁獲取 {len(jobs)} 個職缺。")
-                    for job_item in jobs:
-                        # 並將相對 URL 轉換為絕對 URL
-                        if 'job' in job_item.get('link', {}):
-                            job_item["link"]["job"] = f"https:{job_item['link']['job']}"
-                        yield job_item
-
-                except Exception as e:
-                    logger.error(f"[104] 抓取 URL 列表失敗 (分類: {cat.source_category_id}, 頁數: {page}): {e}", exc_info=True)
+        logger.info(f"[104] 開始為 {len(self.categories)} 個分類抓取 URL (併發數: {self.cfg.discovery_workers})。")
+        for cat, job_items in run_concurrently(self._fetch_category, self.categories, self.cfg.discovery_workers):
+            if isinstance(job_items, Exception):
+                continue
+            yield from job_items
+
+    def _fetch_category(self, cat: CategorySource) -> List[Dict[str, Any]]:
+        """依序抓取單一分類的各頁職缺，遇到第一個空頁或整頁舊職缺即停止。"""
+        job_items = []
+        watermark = CategoryWatermark(self.watermarks, cat.source_category_id)
+        logger.debug(f"[104] 正在抓取分類: {cat.source_category_name} ({cat.source_category_id})")
+        for page in range(1, self.cfg.max_pages + 1):
+            params = {
+                "ro": 0,
+                "jobCat": cat.source_category_id,
+                "order": 16,
+                "page": page,
+                "isnew": 30,
+            }
+            try:
+                res = make_request(
+                    "https://www.104.com.tw/jobs/search/list",
+                    headers=self.cfg.headers,
+                    params=params,
+                    client=self.http
+                )
+                data = res.json().get("data", {})
+                jobs = data.get("list", [])
+
+                if not jobs:
+                    logger.info(f"[104] 分類 {cat.source_category_id} 在第 {page} 頁已無更多職缺。")
+                    break
+
+                if watermark.is_stale_page([job.get("appearDate") for job in jobs]):
+                    logger.info(f"[104] 分類 {cat.source_category_id} 第 {page} 頁皆早於上次高水位 {watermark.previous}，停止翻頁。")
                     break
 
+                logger.debug(f"[104] 於分類 {cat.source_category_id} 第 {page} 頁獲取 {len(jobs)} 個職缺。")
+                for job_item in jobs:
+                    # 並將相對 URL 轉換為絕對 URL
+                    if 'job' in job_item.get('link', {}):
+                        job_item["link"]["job"] = f"https:{job_item['link']['job']}"
+                    job_items.append(job_item)
+
+            except Exception as e:
+                logger.error(f"[104] 抓取 URL 列表失敗 (分類: {cat.source_category_id}, 頁數: {page}): {e}", exc_info=True)
+                return job_items
+
+        self.pending_watermarks.append(watermark)
+        return job_items
+
 class ApiDetailFetcher:
-    """策略實現：通過 104 的內容 API 獲取職缺詳情 JSON。"""
+    """
+    策略實現：通過 104 的內容 API 獲取職缺詳情 JSON。
+    內容未變更 (304) 時拋出 `NotModifiedError`。
+    """
     def __init__(self, settings: Any):
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_104.value, settings.max_workers)
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_104.value)
 
-    def __call__(self, url: str) -> str:
+    def __call__(self, url: str, conditional: bool = True) -> str:
         job_id = url.split("/")[-1].split("?")[0]
         api_url = f"https://www.104.com.tw/job/ajax/content/{job_id}"
         
-        headers = {**self.cfg.headers, "Referer": url}
-        res = make_request(api_url, headers=headers)
+        headers = {**self.cfg.headers, "Referer": url, **(self.validators.conditional_headers(url) if conditional else {})}
+        res = make_request(api_url, headers=headers, client=self.http)
+        self.validators.check(url, res)
         return res.text # 直接返回 JSON 字符串
 
+class AsyncApiDetailFetcher:
+    """策略實現：`ApiDetailFetcher` 的非同步版本，供 async 模式的 Details pipeline 使用。"""
+    def __init__(self, settings: Any):
+        self.cfg = settings
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_104.value)
+
+    async def __call__(self, url: str) -> str:
+        job_id = url.split("/")[-1].split("?")[0]
+        api_url = f"https://www.104.com.tw/job/ajax/content/{job_id}"
+
+        headers = {**self.cfg.headers, "Referer": url, **await self.validators.conditional_headers_async(url)}
+        res = await make_async_request(api_url, headers=headers, platform=SourcePlatform.PLATFORM_104.value)
+        self.validators.check(url, res)
+        return res.text
+
 class ApiDetailParser:
     """策略實現：將從 API 獲取的 JSON 數據解析為 Job 模型。"""
     def __call__(self, raw_content: str, url: str, intermediate_data: Optional[Dict[str, Any]]) -> Optional[Job]:
@@ -11,6 +11,7 @@ import logging
 from crawler.app import app
 from crawler.enums import SourcePlatform
 from crawler.database import repository
+from crawler.http_client import get_http_client
 from crawler.utils import make_request
 from crawler.settings import settings
 from . import parsers
@@ -25,7 +26,8 @@ def run_category_pipeline(self) -> None:
         cfg = settings.p104
         api_url = "https://static.104.com.tw/category-tool/json/JobCat.json"
         
-        res = make_request(api_url, headers=cfg.headers)
+        client = get_http_client(SourcePlatform.PLATFORM_104.value, cfg.max_workers)
+        res = make_request(api_url, headers=cfg.headers, client=client)
         json_data = res.json()
         
         transformed_data = parsers.transform_categories_to_source_model(json_data)
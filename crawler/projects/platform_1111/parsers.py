@@ -2,12 +2,11 @@
 import logging
 import re
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 
-from bs4 import BeautifulSoup, Tag
 from crawler.database.schema import Job
 from crawler.enums import SalaryType, JobType, SourcePlatform, JobStatus
-from crawler.utils import safe_extract_text, clean_text
+from crawler.utils import NON_TEXT_TAGS, HtmlNode, parse_html, safe_extract_text, clean_text
 
 logger = logging.getLogger(__name__)
 
@@ -85,46 +84,168 @@ def _parse_salary(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
 
     return None, None
 
-def _find_detail_item(soup: BeautifulSoup, label: str) -> Optional[Tag]:
+# 詳情頁中以 `_DetailIndex` 查詢的欄位標籤
+DETAIL_LABELS = ("工作性質", "工作地點", "工作待遇", "工作經驗", "學歷要求")
+_LABEL_TAGS = frozenset({"div", "span", "dt", "p"})
+_VALUE_TAGS = frozenset({"div", "span", "p"})
+
+class _DetailIndex:
     """
-    在詳情頁中找到對應標籤（例如 "工作性質", "上班地點"）的容器。
-    此函數會尋找包含指定 `label` 文字的標籤，然後嘗試獲取其內容或其兄弟標籤的內容。
+    職缺詳情頁的標籤索引：對文件只遍歷一次，之後每個欄位的查詢只看局部的元素。
 
-    Args:
-        soup (BeautifulSoup): 職缺詳情頁的 BeautifulSoup 物件。
-        label (str): 要查找的標籤文字。
+    元素按文件順序 (前序) 編號，記錄名稱、父元素、下一個兄弟元素、子樹範圍、
+    `.string`，以及其 `get_text(strip=True)` 在全文中的起訖位置，因此判斷某元素
+    的文字是否包含標籤只需在全文上做一次範圍內的 `str.find`，不必為每個元素重新取文字。
 
-    Returns:
-        Optional[Tag]: 包含目標內容的 BeautifulSoup Tag 物件，如果找不到則返回 None。
+    查詢語義與逐標籤掃描整棵樹的舊實作 (`soup.find` + lambda) 完全相同：
+
+    1. 第一個 `.string` 包含標籤的 h3，若其下一個兄弟元素有文字則返回之。
+    2. 否則取文件順序中第一個文字包含標籤的 div/span/dt/p (label 元素)：
+       dt 優先返回其後的 dd；再來是下一個有文字的兄弟元素；
+       最後在父元素的直接子元素、以及所有後代中找有文字的 div/span/p。
     """
-    # Try to find h3 with the label and return its next sibling
-    h3_tag = soup.find("h3", string=lambda text: text and label in text)
-    if h3_tag:
-        next_sibling = h3_tag.find_next_sibling()
-        if next_sibling and next_sibling.get_text(strip=True):
-            return next_sibling
-
-    # Fallback to original broader search if h3 sibling not found
-    label_tag = soup.find(lambda tag: tag.name in ['div', 'span', 'dt', 'p'] and label in tag.get_text(strip=True))
-    if label_tag:
-        if label_tag.name == 'dt':
-            next_dd = label_tag.find_next_sibling('dd')
-            if next_dd and next_dd.get_text(strip=True):
+    def __init__(self, soup: HtmlNode, labels: Tuple[str, ...] = DETAIL_LABELS):
+        self.nodes: List[HtmlNode] = []
+        self.names: List[str] = []
+        self.parents: List[int] = []
+        self.next_siblings: List[int] = []
+        self.last_descendants: List[int] = []
+        self.strings: List[Optional[str]] = []
+        self.text_starts: List[int] = []
+        self.text_ends: List[int] = []
+        # script/style 自身的 get_text() 會返回其內容，儘管它們不計入祖先的文字
+        self._non_text_with_content: set = set()
+
+        parts: List[str] = []
+        offset = 0
+        stack: List[int] = []
+        # 每個未閉合元素的 [子節點數, 唯一子節點的 .string 或子元素編號, 最後一個子元素編號]
+        open_children: List[list] = []
+        for event, value in soup.walk():
+            if event == "start":
+                index = len(self.nodes)
+                if stack:
+                    info = open_children[-1]
+                    info[0] += 1
+                    info[1] = index
+                    if info[2] >= 0:
+                        self.next_siblings[info[2]] = index
+                    info[2] = index
+                self.nodes.append(value)
+                self.names.append(value.name)
+                self.parents.append(stack[-1] if stack else -1)
+                self.next_siblings.append(-1)
+                self.last_descendants.append(index)
+                self.strings.append(None)
+                self.text_starts.append(offset)
+                self.text_ends.append(offset)
+                stack.append(index)
+                open_children.append([0, None, -1])
+            elif event == "end":
+                index = stack.pop()
+                count, only_child, _ = open_children.pop()
+                self.last_descendants[index] = len(self.nodes) - 1
+                self.text_ends[index] = offset
+                if count == 1:
+                    self.strings[index] = self.strings[only_child] if isinstance(only_child, int) else only_child
+            else:
+                if stack:
+                    info = open_children[-1]
+                    info[0] += 1
+                    info[1] = value
+                if event == "hidden" and stack and self.names[stack[-1]] in NON_TEXT_TAGS and value.strip():
+                    self._non_text_with_content.add(stack[-1])
+                if event == "text" and (stripped := value.strip()):
+                    parts.append(stripped)
+                    offset += len(stripped)
+        self.text = "".join(parts)
+
+        self._h3_tags = [i for i, name in enumerate(self.names) if name == "h3"]
+        self._items = self._resolve(labels)
+
+    def _has_text(self, index: int) -> bool:
+        return self.text_ends[index] > self.text_starts[index] or index in self._non_text_with_content
+
+    def _contains(self, index: int, label: str) -> bool:
+        return self.text.find(label, self.text_starts[index], self.text_ends[index]) != -1
+
+    def _next_sibling(self, index: int, name: Optional[str] = None) -> int:
+        index = self.next_siblings[index]
+        while index >= 0 and name is not None and self.names[index] != name:
+            index = self.next_siblings[index]
+        return index
+
+    def _children(self, index: int) -> Iterator[int]:
+        child = index + 1 if self.last_descendants[index] > index else -1
+        while child >= 0:
+            yield child
+            child = self.next_siblings[child]
+
+    def _h3_index(self, label: str) -> int:
+        return next((i for i in self._h3_tags if (text := self.strings[i]) and label in text), -1)
+
+    def _resolve(self, labels: Tuple[str, ...]) -> Dict[str, HtmlNode]:
+        """一次掃描找出所有標籤的 label 元素，再逐一就近取值。"""
+        pending = []
+        items: Dict[str, HtmlNode] = {}
+        for label in labels:
+            h3 = self._h3_index(label)
+            if h3 >= 0 and (sibling := self._next_sibling(h3)) >= 0 and self._has_text(sibling):
+                items[label] = self.nodes[sibling]
+            else:
+                pending.append(label)
+
+        label_tags: Dict[str, int] = {}
+        # 索引 0 是根節點本身，與 `soup.descendants` 一樣不計入
+        for index in range(1, len(self.nodes)):
+            if len(label_tags) == len(pending):
+                break
+            if self.names[index] in _LABEL_TAGS:
+                for label in pending:
+                    if label not in label_tags and self._contains(index, label):
+                        label_tags[label] = index
+
+        for label, index in label_tags.items():
+            if (value := self._value_for(index, label)) >= 0:
+                items[label] = self.nodes[value]
+        return items
+
+    def _value_for(self, label_tag: int, label: str) -> int:
+        if self.names[label_tag] == "dt":
+            next_dd = self._next_sibling(label_tag, "dd")
+            if next_dd >= 0 and self._has_text(next_dd):
                 return next_dd
-        
-        next_sibling = label_tag.find_next_sibling()
-        if next_sibling and next_sibling.get_text(strip=True):
-            return next_sibling
-        
-        parent = label_tag.find_parent()
-        if parent:
-            for child in parent.find_all(lambda tag: tag.name in ['div', 'span', 'p'], recursive=False):
-                if child != label_tag and child.get_text(strip=True) and not child.find(label_tag.name, string=label):
-                    return child
-            for child in parent.find_all(lambda tag: tag.name in ['div', 'span', 'p']):
-                if child != label_tag and child.get_text(strip=True):
-                    return child
-    return None
+
+        sibling = self._next_sibling(label_tag)
+        if sibling >= 0 and self._has_text(sibling):
+            return sibling
+
+        parent = self.parents[label_tag]
+        if parent < 0:
+            return -1
+        label_name = self.names[label_tag]
+        for child in self._children(parent):
+            if self.names[child] not in _VALUE_TAGS:
+                continue
+            has_label = any(
+                self.names[d] == label_name and self.strings[d] == label
+                for d in range(child + 1, self.last_descendants[child] + 1)
+            )
+            if child != label_tag and self._has_text(child) and not has_label:
+                return child
+        for child in range(parent + 1, self.last_descendants[parent] + 1):
+            if self.names[child] in _VALUE_TAGS and child != label_tag and self._has_text(child):
+                return child
+        return -1
+
+    def get(self, label: str) -> Optional[HtmlNode]:
+        """返回標籤對應的內容元素，找不到時返回 None。"""
+        return self._items.get(label)
+
+    def h3(self, label: str) -> Optional[HtmlNode]:
+        """返回第一個 `.string` 包含 `label` 的 h3 元素。"""
+        index = self._h3_index(label)
+        return self.nodes[index] if index >= 0 else None
 
 def transform_categories_to_source_model(raw_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
@@ -159,6 +280,27 @@ def transform_categories_to_source_model(raw_data: Dict[str, Any]) -> List[Dict[
     logger.info(f"[1111] 從 API 響應中成功提取 {len(flat_list)} 個分類。")
     return flat_list
 
+def extract_listing_update_key(hit: Dict[str, Any]) -> Optional[str]:
+    """
+    從搜索 API 的職缺項目中提取可比較的更新時間鍵，供增量發現的高水位使用。
+
+    只保留日期字串中的數字 (例如 "2025/06/17 11:24:00" -> "20250617112400")，
+    使不同分隔符的格式也能以字串比較大小。找不到更新時間欄位時返回 None，
+    此時該頁不會觸發提前停止。
+
+    Args:
+        hit (Dict[str, Any]): `/api/v1/search/jobs/` 響應中 `hits` 的單個項目。
+
+    Returns:
+        Optional[str]: 只含數字的更新時間，或 None。
+    """
+    for field in ("updateAt", "updateDate", "updatedAt"):
+        if value := hit.get(field):
+            digits = re.sub(r"\D", "", str(value))
+            if digits:
+                return digits
+    return None
+
 def transform_details_to_job_model(intermediate_data: Dict[str, Any], html_content: str, url: str) -> Optional[Job]:
     """
     將 1111 的職缺詳情 HTML 和 API 中介數據轉換為標準化的 Job 模型。
@@ -182,7 +324,8 @@ def transform_details_to_job_model(intermediate_data: Dict[str, Any], html_conte
         raise ValueError("缺少來自列表 API 的中介數據 (intermediate_data) 或 jobId。")
 
     try:
-        soup = BeautifulSoup(html_content, "html.parser")
+        soup = parse_html(html_content)
+        details = _DetailIndex(soup)
         
         # 職缺標題：多個選擇器，優先級從高到低
         title_tag = soup.select_one("main h1") # 新版頁面的標題選擇器
@@ -212,16 +355,16 @@ def transform_details_to_job_model(intermediate_data: Dict[str, Any], html_conte
 
         # 提取詳細信息 - 使用新函數並處理潛在的缺失值
         job_type_text = None
-        if job_type_tag := _find_detail_item(soup, "工作性質"):
+        if job_type_tag := details.get("工作性質"):
             job_type_text = safe_extract_text(job_type_tag)
 
         location_text = None
-        if location_tag := _find_detail_item(soup, "工作地點"):
+        if location_tag := details.get("工作地點"):
             # 清理掉可能存在的"地圖"字樣
             location_text = clean_text(location_tag.text.split('地圖')[0])
 
         salary_text = None
-        if salary_tag := _find_detail_item(soup, "工作待遇"):
+        if salary_tag := details.get("工作待遇"):
             # 清理掉可能存在的"查看薪資水平"字樣
             salary_text = clean_text(salary_tag.text.split('查看薪資水平')[0])
         
@@ -254,7 +397,7 @@ def transform_details_to_job_model(intermediate_data: Dict[str, Any], html_conte
                 job_type = JobType.INTERNSHIP
 
         experience_required_text = None
-        if exp_tag := _find_detail_item(soup, "工作經驗"):
+        if exp_tag := details.get("工作經驗"):
             experience_required_text = safe_extract_text(exp_tag)
             # 處理 "Top" 或其他可能表示 "不拘" 的文本 (Q-003 修正)
             if experience_required_text and experience_required_text.lower() in ["top", "不拘", "無經驗"]:
@@ -271,7 +414,7 @@ def transform_details_to_job_model(intermediate_data: Dict[str, Any], html_conte
                 experience_required_text = None
 
         education_required_text = None
-        if edu_tag := _find_detail_item(soup, "學歷要求"):
+        if edu_tag := details.get("學歷要求"):
             education_required_text = safe_extract_text(edu_tag)
             # 處理 "Top" 或其他可能表示 "不拘" 的文本 (Q-003 修正)
             if education_required_text and education_required_text.lower() in ["top", "不拘", "不限"]:
@@ -289,13 +432,13 @@ def transform_details_to_job_model(intermediate_data: Dict[str, Any], html_conte
         # Extract posted_at
         posted_at = None
         # Find the <li> that contains "更新日期"
-        update_date_h3 = soup.find("h3", string=lambda text: text and "更新日期" in text)
+        update_date_h3 = details.h3("更新日期")
         if update_date_h3:
             li_parent = update_date_h3.find_parent("li")
             if li_parent:
-                time_tag = li_parent.find("time")
+                time_tag = li_parent.select_one("time")
                 if time_tag and time_tag.get("datetime"):
-                    posted_at_text = time_tag["datetime"]
+                    posted_at_text = time_tag.get("datetime")
                     posted_at = _parse_date(posted_at_text)
 
         return Job(
@@ -8,8 +8,12 @@ import logging
 from typing import List, Dict, Any, Generator, Optional
 import urllib.parse
 
-from crawler.core.protocols import UrlFetcher, DetailFetcher, DetailParser
-from crawler.utils import make_request
+from crawler.core.protocols import UrlFetcher, DetailFetcher, AsyncDetailFetcher, DetailParser
+from crawler.enums import SourcePlatform
+from crawler.http_client import get_http_client
+from crawler.utils import make_request, make_async_request, run_concurrently
+from crawler.validators import NotModifiedError, get_validator_cache
+from crawler.watermark import CategoryWatermark, get_watermark_store
 from crawler.database.schema import Job, CategorySource
 from . import parsers
 
@@ -19,11 +23,12 @@ class ApiCategoryFetcher:
     """策略實現：從 1111 API 獲取職務分類數據。"""
     def __init__(self, settings: Any):
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_1111.value, settings.max_workers)
 
     def __call__(self) -> List[Dict[str, Any]]:
         logger.info("[1111] 開始從 API 獲取職務分類。")
         api_url = "https://www.1111.com.tw/api/v1/codeCategories/"
-        res = make_request(api_url, headers=self.cfg.headers, verify=False)
+        res = make_request(api_url, headers=self.cfg.headers, verify=False, client=self.http)
         json_data = res.json()
         transformed_data = parsers.transform_categories_to_source_model(json_data)
         logger.info(f"[1111] 成功獲取並轉換 {len(transformed_data)} 個職務分類。")
@@ -34,96 +39,170 @@ class ApiUrlFetcher:
     策略實現：通過 1111 的搜索 API 獲取職缺列表。
 
     此提取器使用 1111 人力銀行的內部 API 來獲取職缺列表。
-    它會迭代預設的最大頁數，並為每個分類獲取數據。
+    它會迭代預設的最大頁數，並為每個分類獲取數據。各分類內的頁面依序抓取，
+    不同分類之間則以 `discovery_workers` 個線程併發抓取。啟用增量發現時，
+    以職缺的更新時間作為高水位，翻到整頁都早於上次高水位的頁面即停止。
 
     Attributes:
         categories (List[CategorySource]): 從資料庫獲取的分類列表。
         cfg (Any): 1111 平台的配置。
+        watermarks (Optional[WatermarkStore]): 高水位儲存，未啟用增量發現時為 None。
+        pending_watermarks (List[CategoryWatermark]): 已完整抓取、待 URL 寫入後提交的分類高水位。
     """
     def __init__(self, categories: List[CategorySource], settings: Any):
         self.categories = categories
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_1111.value, settings.discovery_workers)
+        self.watermarks = get_watermark_store(SourcePlatform.PLATFORM_1111.value, settings.incremental_discovery)
+        self.pending_watermarks: List[CategoryWatermark] = []
 
     def __call__(self) -> Generator[Dict[str, Any], None, None]:
         if not self.categories:
             logger.warning("[1111] UrlFetcher 未收到任何分類，將跳過 URL 抓取。")
             return
 
-        logger.info(f"[1111] 開始為 {len(self.categories)} 個分類抓取 URL。")
-        for cat in self.categories:
-            logger.debug(f"[1111] 正在抓取分類: {cat.source_category_name} ({cat.source_category_id})")
-            for page in range(1, self.cfg.max_pages + 1):
-                # 構建符合 API 要求的 searchUrl 參數
-                # 注意：1111 的這個 API 需要一個 'searchUrl' 參數來模擬前端的請求路徑
-                # 這裡使用 urllib.parse.quote 對 category_id 進行編碼，確保 URL 安全
-                encoded_job_position = urllib.parse.quote(cat.source_category_id)
-                search_url_param = f"/search/job?page={page}&col=da&sort=desc&d0={encoded_job_position}"
-                
-                params = {
-                    "page": page,
-                    "sortBy": "da", # 依更新日期排序 ('da' for date, 'ab' for relevance)
-                    "sortOrder": "desc", # 降序 (desc)
-                    "jobPositions": cat.source_category_id, # 職務分類 ID
-                    "conditionsText": "", # 關鍵字 (設置為空字串以匹配所有)
-                    "searchUrl": search_url_param, # 模擬前端的 URL
-                }
-
-                try:
-                    res = make_request(
-                        "https://www.1111.com.tw/api/v1/search/jobs/",
-                        headers=self.cfg.headers,
-                        params=params,
-                        verify=False # 1111 的 API 需要關閉 SSL 驗證
-                    )
-                    data = res.json().get("result", {})
-                    jobs = data.get("hits", [])
-
-                    if not jobs:
-                        logger.info(f"[1111] 分類 {cat.source_category_id} 在第 {page} 頁已無更多職缺。")
-                        break
-
-                    logger.debug(f"[1111] 於分類 {cat.source_category_id} 第 {page} 頁獲取 {len(jobs)} 個職缺。")
-                    for job_item in jobs:
-                        if job_id := job_item.get("jobId"):
-                            # 將 job_item 作為原始資料項 (intermediate data) 傳遞
-                            # Orchestrator 會使用它來儲存到 Redis，並在詳情頁抓取時回傳
-                            job_item['url'] = f"https://www.1111.com.tw/job/{job_id}" # 添加完整 URL 供 Orchestrator 提取
-                            yield job_item
-                        else:
-                            logger.warning(f"[1111] 職缺項目缺少 'jobId': {job_item}")
-
-                except Exception as e:
-                    logger.error(f"[1111] 抓取 URL 列表失敗 (分類: {cat.source_category_id}, 頁數: {page}): {e}", exc_info=True)
+        logger.info(f"[1111] 開始為 {len(self.categories)} 個分類抓取 URL (併發數: {self.cfg.discovery_workers})。")
+        for cat, job_items in run_concurrently(self._fetch_category, self.categories, self.cfg.discovery_workers):
+            if isinstance(job_items, Exception):
+                continue
+            yield from job_items
+
+    def _fetch_category(self, cat: CategorySource) -> List[Dict[str, Any]]:
+        """
+        依序抓取單一分類的各頁職缺，遇到第一個空頁或整頁舊職缺即停止。
+
+        Args:
+            cat (CategorySource): 要抓取的分類。
+
+        Returns:
+            List[Dict[str, Any]]: 該分類下的原始職缺項目。
+        """
+        job_items = []
+        watermark = CategoryWatermark(self.watermarks, cat.source_category_id)
+        logger.debug(f"[1111] 正在抓取分類: {cat.source_category_name} ({cat.source_category_id})")
+        for page in range(1, self.cfg.max_pages + 1):
+            # 構建符合 API 要求的 searchUrl 參數
+            # 注意：1111 的這個 API 需要一個 'searchUrl' 參數來模擬前端的請求路徑
+            # 這裡使用 urllib.parse.quote 對 category_id 進行編碼，確保 URL 安全
+            encoded_job_position = urllib.parse.quote(cat.source_category_id)
+            search_url_param = f"/search/job?page={page}&col=da&sort=desc&d0={encoded_job_position}"
+            
+            params = {
+                "page": page,
+                "sortBy": "da", # 依更新日期排序 ('da' for date, 'ab' for relevance)
+                "sortOrder": "desc", # 降序 (desc)
+                "jobPositions": cat.source_category_id, # 職務分類 ID
+                "conditionsText": "", # 關鍵字 (設置為空字串以匹配所有)
+                "searchUrl": search_url_param, # 模擬前端的 URL
+            }
+
+            try:
+                res = make_request(
+                    "https://www.1111.com.tw/api/v1/search/jobs/",
+                    headers=self.cfg.headers,
+                    params=params,
+                    verify=False, # 1111 的 API 需要關閉 SSL 驗證
+                    client=self.http
+                )
+                data = res.json().get("result", {})
+                jobs = data.get("hits", [])
+
+                if not jobs:
+                    logger.info(f"[1111] 分類 {cat.source_category_id} 在第 {page} 頁已無更多職缺。")
+                    break
+
+                if watermark.is_stale_page([parsers.extract_listing_update_key(job) for job in jobs]):
+                    logger.info(f"[1111] 分類 {cat.source_category_id} 第 {page} 頁皆早於上次高水位 {watermark.previous}，停止翻頁。")
                     break
 
+                logger.debug(f"[1111] 於分類 {cat.source_category_id} 第 {page} 頁獲取 {len(jobs)} 個職缺。")
+                for job_item in jobs:
+                    if job_id := job_item.get("jobId"):
+                        # 將 job_item 作為原始資料項 (intermediate data) 傳遞
+                        # Orchestrator 會使用它來儲存到 Redis，並在詳情頁抓取時回傳
+                        job_item['url'] = f"https://www.1111.com.tw/job/{job_id}" # 添加完整 URL 供 Orchestrator 提取
+                        job_items.append(job_item)
+                    else:
+                        logger.warning(f"[1111] 職缺項目缺少 'jobId': {job_item}")
+
+            except Exception as e:
+                logger.error(f"[1111] 抓取 URL 列表失敗 (分類: {cat.source_category_id}, 頁數: {page}): {e}", exc_info=True)
+                return job_items
+
+        self.pending_watermarks.append(watermark)
+        return job_items
+
 class HtmlDetailFetcher:
     """
     策略實現：抓取 1111 職缺詳情頁的 HTML。
+    帶上快取的 ETag / Last-Modified 發出條件請求，內容未變更時拋出 `NotModifiedError`。
 
     Attributes:
         cfg (Any): 1111 平台的配置。
+        validators (ValidatorCache): 詳情頁的驗證器快取。
     """
     def __init__(self, settings: Any):
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_1111.value, settings.max_workers)
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_1111.value)
 
-    def __call__(self, url: str) -> str:
+    def __call__(self, url: str, conditional: bool = True) -> str:
         """
         發起 HTTP 請求獲取職缺詳情頁的完整 HTML 內容。
 
         Args:
             url (str): 職缺詳情頁的 URL。
+            conditional (bool): 是否帶上快取的驗證器發出條件請求；偵錯時傳入 False 以取得完整內容。
 
         Returns:
             str: 頁面的原始 HTML 內容。
         """
         # 1111 的網站可能使用自簽名證書或有其他 SSL 問題，因此關閉驗證
+        headers = {**self.cfg.headers, **(self.validators.conditional_headers(url) if conditional else {})}
         try:
-            res = make_request(url, headers=self.cfg.headers, verify=False)
+            res = make_request(url, headers=headers, verify=False, client=self.http)
+            self.validators.check(url, res)
             return res.text
+        except NotModifiedError:
+            raise
         except Exception as e:
             logger.error(f"[1111] 獲取職缺詳情 HTML 失敗 for URL {url}: {e}", exc_info=True)
             return "" # 返回空字符串，讓解析器處理空內容或導致解析器拋出錯誤
 
+class AsyncHtmlDetailFetcher:
+    """
+    策略實現：`HtmlDetailFetcher` 的非同步版本。
+
+    Attributes:
+        cfg (Any): 1111 平台的配置。
+        validators (ValidatorCache): 詳情頁的驗證器快取。
+    """
+    def __init__(self, settings: Any):
+        self.cfg = settings
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_1111.value)
+
+    async def __call__(self, url: str) -> str:
+        """
+        非同步獲取職缺詳情頁的完整 HTML 內容，錯誤處理與同步版本一致。
+
+        Args:
+            url (str): 職缺詳情頁的 URL。
+            conditional (bool): 是否帶上快取的驗證器發出條件請求；偵錯時傳入 False 以取得完整內容。
+
+        Returns:
+            str: 頁面的原始 HTML 內容。
+        """
+        headers = {**self.cfg.headers, **await self.validators.conditional_headers_async(url)}
+        try:
+            res = await make_async_request(url, headers=headers, verify=False, platform=SourcePlatform.PLATFORM_1111.value)
+            self.validators.check(url, res)
+            return res.text
+        except NotModifiedError:
+            raise
+        except Exception as e:
+            logger.error(f"[1111] 非同步獲取職缺詳情 HTML 失敗 for URL {url}: {e}", exc_info=True)
+            return ""
+
 class HybridDetailParser:
     """
     策略實現：結合 HTML 內容和來自 Redis 的中介 API 數據進行解析。
@@ -137,7 +216,7 @@ class HybridDetailParser:
         Args:
             raw_content (str): 職缺詳情頁的原始 HTML 內容。
             url (str): 職缺的 URL。
-            intermediate_data (Optional[Dict[str, Any]]): 從 Redis 獲取的中介數據，包含原始列表項信息。
+            intermediate_data (Optional[Dict[str, Any]]): 從 Redis (或其 MySQL 副本) 獲取的中介數據，只含 `intermediate_fields` 中的列表欄位。
 
         Returns:
             Optional[Job]: 解析後的 Job 模型物件，如果解析失敗則返回 None。
@@ -9,6 +9,7 @@ import logging
 from crawler.app import app
 from crawler.enums import SourcePlatform
 from crawler.database import repository
+from crawler.http_client import get_http_client
 from crawler.utils import make_request
 from crawler.settings import settings
 from . import parsers
@@ -25,7 +26,8 @@ def run_category_pipeline(self) -> None:
         api_url = "https://www.1111.com.tw/api/v1/codeCategories/"
         
         # 1111 的 API 需要關閉 SSL 驗證
-        res = make_request(api_url, headers=cfg.headers, verify=False)
+        client = get_http_client(SourcePlatform.PLATFORM_1111.value, cfg.max_workers)
+        res = make_request(api_url, headers=cfg.headers, verify=False, client=client)
         logger.info(f"[1111] API 原始回應文本: {res.text}")
         api_response_data = res.json()
         logger.info(f"[1111] API 回應數據: {api_response_data}")
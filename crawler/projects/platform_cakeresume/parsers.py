@@ -8,11 +8,10 @@ import json
 from datetime import datetime
 from typing import Optional, Dict, Any, Union
 import re # Ensure re is imported for regex
-from bs4 import BeautifulSoup # Import BeautifulSoup
 
 from crawler.database.schema import Job
 from crawler.enums import SourcePlatform, JobStatus, SalaryType, JobType
-from crawler.utils import clean_text
+from crawler.utils import parse_html, clean_text
 
 logger = logging.getLogger(__name__)
 
@@ -82,7 +81,7 @@ def transform_script_to_job_model(raw_content: Dict[str, Any], html_content: str
         if not description:
             description = job_details.get("description_plain_text") # Fallback to plain text
 
-        # Ensure description is cleaned of HTML tags if it contains them
+        # Ensure description is cleaned of HTML tags if it contains them (only once; it is stored as-is below)
         if description:
             description = clean_text(description)
 
@@ -120,7 +119,6 @@ def transform_script_to_job_model(raw_content: Dict[str, Any], html_content: str
 
         # Location
         location_text = None
-        html_soup = BeautifulSoup(html_content, "html.parser") # Create soup from html_content
 
         if flat_locs := job_details.get("flat_location_list_with_locale"):
             if isinstance(flat_locs, list) and flat_locs:
@@ -135,8 +133,9 @@ def transform_script_to_job_model(raw_content: Dict[str, Any], html_content: str
                 location_text = loc_list[0]
 
         # Fallback: Extract location from HTML if not found in JSON
+        # The DOM is only built here, since most pages carry the location in JSON
         if not location_text:
-            location_tag = html_soup.select_one("div.JobDescriptionRightColumn_locationsWrapper__N_fz_ a")
+            location_tag = parse_html(html_content).select_one("div.JobDescriptionRightColumn_locationsWrapper__N_fz_ a")
             if location_tag:
                 location_text = clean_text(location_tag.get_text())
 
@@ -232,7 +231,7 @@ def transform_script_to_job_model(raw_content: Dict[str, Any], html_content: str
             url=url,
             status=JobStatus.ACTIVE,
             title=clean_text(title),
-            description=clean_text(description),
+            description=description,
             job_type=job_type,
             location_text=location_text,
             posted_at=posted_at,
@@ -7,11 +7,12 @@ import logging
 from typing import Dict, Any, Generator, Optional, List
 import json
 
-from bs4 import BeautifulSoup
-from crawler.core.protocols import UrlFetcher, DetailFetcher, DetailParser, CategoryFetcher
-from bs4 import BeautifulSoup
+from crawler.core.protocols import UrlFetcher, DetailFetcher, AsyncDetailFetcher, DetailParser, CategoryFetcher
 from crawler.database.schema import Job, CategorySource
-from crawler.utils import make_request
+from crawler.enums import SourcePlatform
+from crawler.http_client import get_http_client
+from crawler.utils import make_request, make_async_request, find_script_text, parse_html, run_concurrently
+from crawler.validators import NotModifiedError, get_validator_cache
 from crawler.database.schema import Job, CategorySource
 from . import parsers
 
@@ -21,11 +22,14 @@ class HtmlUrlFetcher:
     """
     Strategy Implementation: Fetches job URLs by scraping the
     category-specific HTML pages, as the search API is not available.
+    Pages within a category are fetched in order, while categories are
+    fetched concurrently by `discovery_workers` threads.
     """
     def __init__(self, categories: List[CategorySource], settings: Any):
         # We only need sub-categories that have an actual ID
         self.categories = [cat for cat in categories if cat.parent_source_id]
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_CAKERESUME.value, settings.discovery_workers)
         self.base_url = "https://www.cakeresume.com"
 
     def __call__(self) -> Generator[Dict[str, Any], None, None]:
@@ -33,72 +37,107 @@ class HtmlUrlFetcher:
             logger.warning("[Cakeresume] No categories provided to UrlFetcher. Skipping.")
             return
 
-        logger.info(f"[Cakeresume] Starting to fetch from HTML pages for {len(self.categories)} categories.")
-        
-        for category in self.categories:
-            category_id = category.source_category_id
-            target_url = f"{self.base_url}/jobs/categories/{category_id}"
-            
-            # Cakeresume uses infinite scroll, we can simulate it by adding `page` param
-            for page in range(1, self.cfg.max_pages + 1):
-                params = {'page': page}
-                logger.debug(f"[Cakeresume] Fetching page {page} for category: {category_id}")
-                try:
-                    res = make_request(
-                        target_url,
-                        headers=self.cfg.headers,
-                        params=params
-                    )
-                    
-                    soup = BeautifulSoup(res.text, "html.parser")
-                    # Use the correct selector for job links
-                    job_links = soup.select("a.JobSearchItem_jobTitle__bu6yO")
-                    
-                    if not job_links:
-                        logger.info(f"[Cakeresume] No more jobs found for category {category_id} at page {page}.")
-                        break
-                    
-                    for link in job_links:
-                        if href := link.get('href'):
-                            # The href is a relative path, e.g., /companies/company/jobs/job-id
-                            # The orchestrator will handle joining it with the base URL
-                            yield {'href': href}
+        logger.info(f"[Cakeresume] Starting to fetch from HTML pages for {len(self.categories)} categories (concurrency: {self.cfg.discovery_workers}).")
+        for category, items in run_concurrently(self._fetch_category, self.categories, self.cfg.discovery_workers):
+            if isinstance(items, Exception):
+                continue
+            yield from items
 
-                except Exception as e:
-                    logger.error(f"[Cakeresume] Failed to fetch HTML for category {category_id}, page {page}: {e}", exc_info=True)
+    def _fetch_category(self, category: CategorySource) -> List[Dict[str, Any]]:
+        """Fetches the pages of one category in order, stopping at the first empty page."""
+        items = []
+        category_id = category.source_category_id
+        target_url = f"{self.base_url}/jobs/categories/{category_id}"
+        
+        # Cakeresume uses infinite scroll, we can simulate it by adding `page` param
+        for page in range(1, self.cfg.max_pages + 1):
+            params = {'page': page}
+            logger.debug(f"[Cakeresume] Fetching page {page} for category: {category_id}")
+            try:
+                res = make_request(
+                    target_url,
+                    headers=self.cfg.headers,
+                    params=params,
+                    client=self.http
+                )
+                
+                soup = parse_html(res.text)
+                # Use the correct selector for job links
+                job_links = soup.select("a.JobSearchItem_jobTitle__bu6yO")
+                
+                if not job_links:
+                    logger.info(f"[Cakeresume] No more jobs found for category {category_id} at page {page}.")
                     break
+                
+                for link in job_links:
+                    if href := link.get('href'):
+                        # The href is a relative path, e.g., /companies/company/jobs/job-id
+                        # The orchestrator will handle joining it with the base URL
+                        items.append({'href': href})
+
+            except Exception as e:
+                logger.error(f"[Cakeresume] Failed to fetch HTML for category {category_id}, page {page}: {e}", exc_info=True)
+                break
+
+        return items
 
 
 class HtmlDetailFetcher:
-    """Strategy: Fetches the full HTML of a single job detail page."""
+    """
+    Strategy: Fetches the full HTML of a single job detail page.
+    Sends conditional requests and raises NotModifiedError on a 304.
+    """
     def __init__(self, settings: Any):
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_CAKERESUME.value, settings.max_workers)
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_CAKERESUME.value)
 
-    def __call__(self, url: str) -> str:
+    def __call__(self, url: str, conditional: bool = True) -> str:
+        headers = {**self.cfg.headers, **(self.validators.conditional_headers(url) if conditional else {})}
         try:
-            res = make_request(url, headers=self.cfg.headers)
+            res = make_request(url, headers=headers, client=self.http)
+            self.validators.check(url, res)
             return res.text
+        except NotModifiedError:
+            raise
         except Exception as e:
             logger.error(f"[Cakeresume] Failed to fetch detail for url {url}: {e}")
             return ""
 
+class AsyncHtmlDetailFetcher:
+    """Strategy: Async counterpart of HtmlDetailFetcher for the async details pipeline."""
+    def __init__(self, settings: Any):
+        self.cfg = settings
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_CAKERESUME.value)
+
+    async def __call__(self, url: str) -> str:
+        headers = {**self.cfg.headers, **await self.validators.conditional_headers_async(url)}
+        try:
+            res = await make_async_request(url, headers=headers, platform=SourcePlatform.PLATFORM_CAKERESUME.value)
+            self.validators.check(url, res)
+            return res.text
+        except NotModifiedError:
+            raise
+        except Exception as e:
+            logger.error(f"[Cakeresume] Failed to fetch detail asynchronously for url {url}: {e}")
+            return ""
+
 class ScriptDetailParser:
     """
-    Strategy: Finds the <script type="application/ld+json"> tag in the
-    raw HTML content and passes its content to a dedicated parser.
+    Strategy: Finds the <script id="__NEXT_DATA__"> tag in the raw HTML
+    content and passes its JSON to a dedicated parser. The script is located
+    by scanning the raw HTML; no DOM is built here.
     """
     def __call__(self, raw_content: str, url: str, intermediate_data: Optional[Dict[str, Any]]) -> Optional[Job]:
-        soup = BeautifulSoup(raw_content, "html.parser")
-        
         # Cakeresume detail pages embed job data in a script tag with id="__NEXT_DATA__"
-        script_tag = soup.find("script", id="__NEXT_DATA__")
+        script_text = find_script_text(raw_content, "__NEXT_DATA__")
         
-        if not script_tag or not script_tag.string:
+        if not script_text:
             logger.warning(f"[Cakeresume] Could not find __NEXT_DATA__ script tag or it is empty on page: {url}")
             return None
         
         try:
-            next_data = json.loads(script_tag.string)
+            next_data = json.loads(script_text)
             # The actual job data is usually nested under props.pageProps.job
             job_data = next_data.get("props", {}).get("pageProps", {}).get("job")
             
@@ -8,12 +8,12 @@ import logging
 import json
 from typing import List, Dict, Any
 
-from bs4 import BeautifulSoup
 
 from crawler.app import app
 from crawler.enums import SourcePlatform
 from crawler.database import repository
-from crawler.utils import make_request
+from crawler.http_client import get_http_client
+from crawler.utils import make_request, find_script_text
 from crawler.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -25,14 +25,13 @@ def parse_next_data_for_i18n_categories(html_content: str) -> List[Dict[str, Any
     and extracts the hierarchical category data from the i18n (internationalization) object.
     This is the most reliable method.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    next_data_script = soup.find('script', id='__NEXT_DATA__')
+    next_data_script = find_script_text(html_content, '__NEXT_DATA__')
     
-    if not next_data_script:
+    if next_data_script is None:
         raise ValueError("Could not find __NEXT_DATA__ script tag in the HTML.")
 
     try:
-        data = json.loads(next_data_script.string)
+        data = json.loads(next_data_script)
     except json.JSONDecodeError:
         raise ValueError("Failed to parse JSON from __NEXT_DATA__ script tag.")
 
@@ -89,7 +88,8 @@ def run_category_pipeline(self) -> None:
         logger.info("[Cakeresume] Running category pipeline from __NEXT_DATA__ (Final Version)...")
         cfg = settings.pcake
         
-        res = make_request("https://www.cakeresume.com/jobs", headers=cfg.headers)
+        client = get_http_client(SourcePlatform.PLATFORM_CAKERESUME.value, cfg.max_workers)
+        res = make_request("https://www.cakeresume.com/jobs", headers=cfg.headers, client=client)
         
         categories = parse_next_data_for_i18n_categories(res.text)
         
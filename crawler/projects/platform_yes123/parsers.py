@@ -10,10 +10,9 @@ import re
 from datetime import datetime
 from typing import Dict, Optional, Any, Tuple
 
-from bs4 import BeautifulSoup, Tag
 from crawler.database.schema import Job
 from crawler.enums import SourcePlatform, JobStatus, SalaryType, JobType
-from crawler.utils import clean_text
+from crawler.utils import HtmlNode, parse_html, clean_text
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +39,7 @@ def _parse_salary(text: str) -> Tuple[Optional[int], Optional[int]]:
         
     return None, None
 
-def _get_full_location(li_tag: Tag) -> Optional[str]:
+def _get_full_location(li_tag: Optional[HtmlNode]) -> Optional[str]:
     """
     [最終修正] 從上班地點的 li 標籤中提取最完整的地址。
     此版本採納了 'find' 方法並增加了安全回退機制。
@@ -48,9 +47,9 @@ def _get_full_location(li_tag: Tag) -> Optional[str]:
     if not li_tag:
         return None
     
-    # 優先級 1: 使用 find('a', class_='companyLocation') 來抓取最精確的地址。
+    # 優先級 1: 使用 a.companyLocation 來抓取最精確的地址。
     # 這是最理想的情況。
-    location_link = li_tag.find('a', class_='companyLocation')
+    location_link = li_tag.select_one('a.companyLocation')
     if location_link and location_link.text.strip():
         return clean_text(location_link.text)
     
@@ -69,7 +68,7 @@ def transform_details_to_job_model(html_content: str, url: str) -> Optional[Job]
     [升級] 此版本全面提取所有可見欄位。
     """
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
+        soup = parse_html(html_content)
         
         title_tag = soup.select_one('h1#limit_word_count')
         company_tag = soup.select_one('div.box_firm_name > a')
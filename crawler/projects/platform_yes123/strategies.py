@@ -2,10 +2,12 @@
 import logging
 from typing import Dict, Any, Generator, Optional, List
 
-from bs4 import BeautifulSoup
-
-from crawler.core.protocols import UrlFetcher, DetailFetcher, DetailParser
-from crawler.utils import make_request
+from crawler.core.protocols import UrlFetcher, DetailFetcher, AsyncDetailFetcher, DetailParser
+from crawler.enums import SourcePlatform
+from crawler.http_client import get_http_client
+from crawler.utils import make_request, make_async_request, parse_html, run_concurrently
+from crawler.validators import get_validator_cache
+from crawler.watermark import CategoryWatermark, get_watermark_store
 from crawler.database.schema import Job, CategorySource
 from . import parsers
 
@@ -15,8 +17,18 @@ class HtmlUrlFetcher:
     def __init__(self, categories: List[CategorySource], settings: Any):
         self.categories = categories
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_YES123.value, settings.discovery_workers)
+        self.watermarks = get_watermark_store(SourcePlatform.PLATFORM_YES123.value, settings.incremental_discovery)
+        # 完整抓取的分類高水位，待 URL 寫入資料庫後由 Orchestrator 提交
+        self.pending_watermarks: List[CategoryWatermark] = []
 
-    def _fetch_urls_by_params(self, params: Dict[str, Any], url_path: str) -> Generator[Dict[str, Any], None, None]:
+    def _fetch_urls_by_params(
+        self, params: Dict[str, Any], url_path: str, watermark: Optional[CategoryWatermark] = None
+    ) -> Generator[Dict[str, Any], None, None]:
+        """
+        依序抓取列表頁的職缺連結。列表頁沒有刊登日期，因此增量發現以先前
+        抓取時見過的職缺連結為標記：翻到整頁都是已知職缺的頁面即停止。
+        """
         base_url = "https://www.yes123.com.tw/wk_index/"
         target_url = f"{base_url}{url_path}"
 
@@ -25,9 +37,9 @@ class HtmlUrlFetcher:
                 params["strrec"] = (page - 1) * 20
             
             try:
-                res = make_request(target_url, headers=self.cfg.headers, params=params, verify=False)
+                res = make_request(target_url, headers=self.cfg.headers, params=params, verify=False, client=self.http)
                 res.encoding = 'big5'
-                soup = BeautifulSoup(res.text, "html.parser")
+                soup = parse_html(res.text)
                 
                 selector = 'a[href^="job.asp?p_id="]'
                 job_links = soup.select(selector)
@@ -36,27 +48,41 @@ class HtmlUrlFetcher:
                     logger.info(f"[yes123] 在 URL {target_url} 參數 {params} 的第 {page} 頁未找到任何職缺連結。")
                     break
                 
-                for a_tag in job_links:
-                    if href := a_tag.get('href'):
-                        yield {"href": href}
+                hrefs = [href for a_tag in job_links if (href := a_tag.get('href'))]
+                if watermark and watermark.is_known_page(hrefs):
+                    logger.info(f"[yes123] 參數 {params} 的第 {page} 頁皆為先前抓取過的職缺，停止翻頁。")
+                    break
+
+                for href in hrefs:
+                    yield {"href": href}
 
             except Exception as e:
                 logger.error(f"[yes123] 抓取 URL 列表頁面失敗 (URL: {target_url}, 參數: {params}, 頁數: {page}): {e}", exc_info=True)
-                break
+                return
+
+        if watermark:
+            self.pending_watermarks.append(watermark)
+
+    def _fetch_category(self, cat: CategorySource) -> List[Dict[str, Any]]:
+        """依序抓取單一分類的各頁職缺連結，遇到第一個空頁或整頁已知職缺即停止。"""
+        logger.debug(f"[yes123] 正在抓取分類: {cat.source_category_name} ({cat.source_category_id})")
+        params = {
+            "find_work_mode1": cat.source_category_id,
+            "order_by": "m_date",
+            "order_ascend": "desc",
+        }
+        watermark = CategoryWatermark(self.watermarks, cat.source_category_id)
+        return list(self._fetch_urls_by_params(params, url_path="joblist.asp", watermark=watermark))
 
     def __call__(self) -> Generator[Dict[str, Any], None, None]:
         if self.categories:
-            logger.info(f"[yes123] 開始為 {len(self.categories)} 個分類抓取 URL。")
-            for cat in self.categories:
-                if '_' not in cat.source_category_id:
+            # 只有二級分類 (ID 含 '_') 可用於列表查詢
+            categories = [cat for cat in self.categories if '_' in cat.source_category_id]
+            logger.info(f"[yes123] 開始為 {len(categories)} 個分類抓取 URL (併發數: {self.cfg.discovery_workers})。")
+            for cat, items in run_concurrently(self._fetch_category, categories, self.cfg.discovery_workers):
+                if isinstance(items, Exception):
                     continue
-                logger.debug(f"[yes123] 正在抓取分類: {cat.source_category_name} ({cat.source_category_id})")
-                params = {
-                    "find_work_mode1": cat.source_category_id,
-                    "order_by": "m_date",
-                    "order_ascend": "desc",
-                }
-                yield from self._fetch_urls_by_params(params, url_path="joblist.asp")
+                yield from items
         else:
             logger.warning("[yes123] 未提供任何分類，將回退到通用總覽頁抓取模式。")
             yield from self._fetch_urls_by_params({}, url_path="job.asp")
@@ -64,9 +90,24 @@ class HtmlUrlFetcher:
 class HtmlDetailFetcher:
     def __init__(self, settings: Any):
         self.cfg = settings
+        self.http = get_http_client(SourcePlatform.PLATFORM_YES123.value, settings.max_workers)
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_YES123.value)
+
+    def __call__(self, url: str, conditional: bool = True) -> str:
+        headers = {**self.cfg.headers, **(self.validators.conditional_headers(url) if conditional else {})}
+        res = make_request(url, headers=headers, verify=False, client=self.http)
+        self.validators.check(url, res)
+        return res.text
+
+class AsyncHtmlDetailFetcher:
+    def __init__(self, settings: Any):
+        self.cfg = settings
+        self.validators = get_validator_cache(SourcePlatform.PLATFORM_YES123.value)
 
-    def __call__(self, url: str) -> str:
-        res = make_request(url, headers=self.cfg.headers, verify=False)
+    async def __call__(self, url: str) -> str:
+        headers = {**self.cfg.headers, **await self.validators.conditional_headers_async(url)}
+        res = await make_async_request(url, headers=headers, verify=False, platform=SourcePlatform.PLATFORM_YES123.value)
+        self.validators.check(url, res)
         return res.text
 
 class HtmlDetailParser:
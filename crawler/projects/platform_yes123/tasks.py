@@ -10,6 +10,7 @@ from typing import List, Dict, Any
 from crawler.app import app
 from crawler.enums import SourcePlatform
 from crawler.database import repository
+from crawler.http_client import get_http_client
 from crawler.utils import make_request
 from crawler.settings import settings
 
@@ -75,7 +76,8 @@ def run_category_pipeline(self) -> None:
         cfg = settings.pyes123
         api_url = "https://www.yes123.com.tw/json_file/work_mode.json"
         
-        res = make_request(api_url, headers=cfg.headers)
+        client = get_http_client(SourcePlatform.PLATFORM_YES123.value, cfg.max_workers)
+        res = make_request(api_url, headers=cfg.headers, client=client)
         res.encoding = 'utf-8-sig' # 保持對 BOM 的處理
         json_data = res.json()
         
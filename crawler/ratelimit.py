@@ -0,0 +1,190 @@
+# crawler/ratelimit.py
+"""分散式自適應限流器 (Distributed Adaptive Rate Limiter)。
+
+此模組以 Redis 實現一個按「平台 + 主機」劃分的令牌桶 (Token Bucket)。
+所有 worker 副本共享同一個桶，因此擴容 `worker-default` 只會提高吞吐，
+而不會讓目標網站收到成倍的請求。
+
+桶的速率採用 AIMD (Additive Increase / Multiplicative Decrease) 策略自適應調整：
+1.  **加性增長**：每次成功響應將速率提高 `increase_step`，直到 `max_rate`。
+2.  **乘性退避**：遇到 429 / 503 或超時時將速率乘以 `decrease_factor`，直到 `min_rate`。
+
+令牌的補充與扣減都在 Lua 腳本中以 Redis 伺服器時間原子地完成，避免各節點時鐘偏差。
+非同步版本 (`acquire_async` / `feedback_async`) 在線程池中執行同步的 Redis 調用，
+不會阻塞事件循環上其他在途的請求。
+Redis 不可用時限流器會放行請求 (fail-open)，不阻斷爬取流程。
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Optional
+
+import redis
+
+from crawler.cache import get_redis_client
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 返回需要等待的秒數；為 0 表示已成功取得一個令牌
+_ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local initial_rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', key, 'tokens', 'ts', 'rate')
+local rate = tonumber(data[3]) or initial_rate
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', key, 'tokens', tostring(tokens), 'ts', tostring(now), 'rate', tostring(rate))
+redis.call('EXPIRE', key, ttl)
+return tostring(wait)
+"""
+
+# ARGV[1] 為 'increase' 或 'decrease'；返回調整後的速率
+_ADJUST_SCRIPT = """
+local key = KEYS[1]
+local initial_rate = tonumber(ARGV[2])
+local min_rate = tonumber(ARGV[3])
+local max_rate = tonumber(ARGV[4])
+local step = tonumber(ARGV[5])
+local factor = tonumber(ARGV[6])
+local ttl = tonumber(ARGV[7])
+local rate = tonumber(redis.call('HGET', key, 'rate')) or initial_rate
+if ARGV[1] == 'increase' then
+    rate = math.min(max_rate, rate + step)
+else
+    rate = math.max(min_rate, rate * factor)
+end
+redis.call('HSET', key, 'rate', tostring(rate))
+redis.call('EXPIRE', key, ttl)
+return tostring(rate)
+"""
+
+
+class RateLimiter:
+    """
+    基於 Redis 的按平台/主機令牌桶，速率以 AIMD 自適應。
+
+    Attributes:
+        cfg (RateLimitSettings): 限流配置。
+    """
+    def __init__(self, client: redis.Redis):
+        self.cfg = settings.ratelimit
+        self.redis = client
+        self._acquire = client.register_script(_ACQUIRE_SCRIPT)
+        self._adjust = client.register_script(_ADJUST_SCRIPT)
+
+    @staticmethod
+    def _key(platform: str, host: str) -> str:
+        return f"ratelimit:{platform}:{host}"
+
+    def _try_acquire(self, platform: str, host: str) -> float:
+        """嘗試取得一個令牌，返回需要等待的秒數 (0 表示已取得)。Redis 故障時放行。"""
+        try:
+            wait = self._acquire(
+                keys=[self._key(platform, host)],
+                args=[self.cfg.initial_rate, self.cfg.burst, self.cfg.key_ttl],
+            )
+            return float(wait)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{platform}] 限流器無法訪問 Redis，放行請求 ({host}): {e}")
+            return 0.0
+
+    def acquire(self, platform: str, host: str) -> None:
+        """阻塞直到取得 `platform` 在 `host` 上的一個請求許可。"""
+        while (wait := self._try_acquire(platform, host)) > 0:
+            time.sleep(min(wait, self.cfg.max_sleep))
+
+    async def acquire_async(self, platform: str, host: str) -> None:
+        """`acquire` 的非同步版本：Redis 調用在線程池中執行，等待期間讓出事件循環。"""
+        while (wait := await asyncio.to_thread(self._try_acquire, platform, host)) > 0:
+            await asyncio.sleep(min(wait, self.cfg.max_sleep))
+
+    def _adjust_rate(self, platform: str, host: str, direction: str) -> Optional[float]:
+        try:
+            rate = self._adjust(
+                keys=[self._key(platform, host)],
+                args=[
+                    direction, self.cfg.initial_rate, self.cfg.min_rate, self.cfg.max_rate,
+                    self.cfg.increase_step, self.cfg.decrease_factor, self.cfg.key_ttl,
+                ],
+            )
+            return float(rate)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{platform}] 限流器無法更新速率 ({host}): {e}")
+            return None
+
+    def on_success(self, platform: str, host: str) -> None:
+        """成功響應：加性提高速率。"""
+        self._adjust_rate(platform, host, "increase")
+
+    def on_throttle(self, platform: str, host: str) -> None:
+        """被限流 (429/503) 或超時：乘性降低速率。"""
+        rate = self._adjust_rate(platform, host, "decrease")
+        if rate is not None:
+            logger.warning(f"[{platform}] {host} 觸發退避，速率降至 {rate:.2f} req/s。")
+
+    def feedback(self, platform: str, host: str, status_code: Optional[int]) -> None:
+        """
+        根據響應結果調整速率。`status_code` 為 None 表示請求超時。
+        其他 5xx 與 4xx 錯誤不代表限流，不調整速率。
+        """
+        if status_code is None or status_code in self.cfg.throttle_statuses:
+            self.on_throttle(platform, host)
+        elif status_code < 400:
+            self.on_success(platform, host)
+
+    async def feedback_async(self, platform: str, host: str, status_code: Optional[int]) -> None:
+        """`feedback` 的非同步版本，在線程池中調整速率。"""
+        await asyncio.to_thread(self.feedback, platform, host, status_code)
+
+
+class _NoopRateLimiter:
+    """限流停用或 Redis 不可用時使用的空實現。"""
+    def acquire(self, platform: str, host: str) -> None:
+        return None
+
+    async def acquire_async(self, platform: str, host: str) -> None:
+        return None
+
+    def feedback(self, platform: str, host: str, status_code: Optional[int]) -> None:
+        return None
+
+    async def feedback_async(self, platform: str, host: str, status_code: Optional[int]) -> None:
+        return None
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """
+    獲取全域共享的限流器實例。
+
+    當 `settings.ratelimit.enabled` 為 False 或 Redis 無法初始化時，
+    返回一個不做任何限制的空實現，確保爬取流程不受影響。
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                if not settings.ratelimit.enabled:
+                    _rate_limiter = _NoopRateLimiter()
+                else:
+                    try:
+                        _rate_limiter = RateLimiter(get_redis_client())
+                    except RuntimeError as e:
+                        logger.error(f"限流器初始化失敗，將不限流執行: {e}")
+                        _rate_limiter = _NoopRateLimiter()
+    return _rate_limiter
@@ -7,7 +7,7 @@
 """
 from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Dict
+from typing import Dict, List
 
 # --- 平台特定配置模型 ---
 
@@ -15,6 +15,20 @@ class Project104Settings(BaseModel):
     """104 平台的特定配置。"""
     max_pages: int = 3
     max_workers: int = 5
+    async_concurrency: int = 100
+    discovery_workers: int = 8  # URL 發現階段併發抓取的分類數
+    parse_workers: int = 2  # pipeline 模式的解析進程數 (抓取線程數沿用 max_workers)
+    parse_queue_size: int = 100  # pipeline 模式抓取與解析之間的隊列容量
+    incremental_discovery: bool = True  # 翻到整頁舊職缺時停止 (見 crawler.watermark)
+    use_intermediate_data: bool = False  # 解析器是否需要列表階段的中介資料 (見 crawler.metastore)
+    # 中介資料只保留解析器實際讀取的欄位；為空時保留整個列表項目
+    intermediate_fields: List[str] = []
+    sink_batch_size: int = 200
+    sink_flush_interval: float = 30.0
+    sink_bulk_load: bool = False  # 以 LOAD DATA 寫入職缺 (大批量回填時使用，見 crawler.database.bulk)
+    # 計算列表指紋的欄位；為空時以整個列表項目計算
+    fingerprint_fields: List[str] = ["appearDate", "jobName", "salaryLow", "salaryHigh"]
+    detail_refresh_days: int = 7  # 指紋未變的 URL 超過此天數仍會重新抓取詳情
     headers: Dict[str, str] = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
         "Referer": "https://www.104.com.tw/jobs/search/",
@@ -24,6 +38,20 @@ class Project1111Settings(BaseModel):
     """1111 平台的特定配置。"""
     max_pages: int = 3
     max_workers: int = 5
+    async_concurrency: int = 100
+    discovery_workers: int = 8  # URL 發現階段併發抓取的分類數
+    parse_workers: int = 2  # pipeline 模式的解析進程數 (抓取線程數沿用 max_workers)
+    parse_queue_size: int = 100  # pipeline 模式抓取與解析之間的隊列容量
+    incremental_discovery: bool = True  # 翻到整頁舊職缺時停止 (見 crawler.watermark)
+    use_intermediate_data: bool = True  # 解析器是否需要列表階段的中介資料 (見 crawler.metastore)
+    # 中介資料只保留解析器實際讀取的欄位；為空時保留整個列表項目
+    intermediate_fields: List[str] = ["jobId", "companyName", "companyId"]
+    sink_batch_size: int = 200
+    sink_flush_interval: float = 30.0
+    sink_bulk_load: bool = False  # 以 LOAD DATA 寫入職缺 (大批量回填時使用，見 crawler.database.bulk)
+    # 計算列表指紋的欄位；為空時以整個列表項目計算
+    fingerprint_fields: List[str] = ["updateAt", "updateDate", "updatedAt", "title"]
+    detail_refresh_days: int = 7  # 指紋未變的 URL 超過此天數仍會重新抓取詳情
     headers: Dict[str, str] = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
         "Referer": "https://www.1111.com.tw/",
@@ -33,6 +61,19 @@ class ProjectCakeresumeSettings(BaseModel):
     """Cakeresume 平台的特定配置。"""
     max_pages: int = 2
     max_workers: int = 5
+    async_concurrency: int = 100
+    discovery_workers: int = 8  # URL 發現階段併發抓取的分類數
+    parse_workers: int = 2  # pipeline 模式的解析進程數 (抓取線程數沿用 max_workers)
+    parse_queue_size: int = 100  # pipeline 模式抓取與解析之間的隊列容量
+    use_intermediate_data: bool = False  # 解析器是否需要列表階段的中介資料 (見 crawler.metastore)
+    # 中介資料只保留解析器實際讀取的欄位；為空時保留整個列表項目
+    intermediate_fields: List[str] = []
+    sink_batch_size: int = 200
+    sink_flush_interval: float = 30.0
+    sink_bulk_load: bool = False  # 以 LOAD DATA 寫入職缺 (大批量回填時使用，見 crawler.database.bulk)
+    # 計算列表指紋的欄位；為空時以整個列表項目計算
+    fingerprint_fields: List[str] = []
+    detail_refresh_days: int = 7  # 指紋未變的 URL 超過此天數仍會重新抓取詳情
     headers: Dict[str, str] = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
         "Referer": "https://www.cakeresume.com/jobs",
@@ -42,6 +83,20 @@ class ProjectYes123Settings(BaseModel):
     """Yes123 平台的特定配置。"""
     max_pages: int = 5
     max_workers: int = 5
+    async_concurrency: int = 100
+    discovery_workers: int = 8  # URL 發現階段併發抓取的分類數
+    parse_workers: int = 2  # pipeline 模式的解析進程數 (抓取線程數沿用 max_workers)
+    parse_queue_size: int = 100  # pipeline 模式抓取與解析之間的隊列容量
+    incremental_discovery: bool = True  # 翻到整頁舊職缺時停止 (見 crawler.watermark)
+    use_intermediate_data: bool = False  # 解析器是否需要列表階段的中介資料 (見 crawler.metastore)
+    # 中介資料只保留解析器實際讀取的欄位；為空時保留整個列表項目
+    intermediate_fields: List[str] = []
+    sink_batch_size: int = 200
+    sink_flush_interval: float = 30.0
+    sink_bulk_load: bool = False  # 以 LOAD DATA 寫入職缺 (大批量回填時使用，見 crawler.database.bulk)
+    # 計算列表指紋的欄位；為空時以整個列表項目計算
+    fingerprint_fields: List[str] = []
+    detail_refresh_days: int = 7  # 指紋未變的 URL 超過此天數仍會重新抓取詳情
     headers: Dict[str, str] = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/125.0.0.0 Safari/537.36",
         "Referer": "https://www.yes123.com.tw/",
@@ -56,6 +111,17 @@ class DatabaseSettings(BaseSettings):
     user: str = "user"
     password: str = "password"
     database: str = "job_data"
+    read_host: str = ""  # API 查詢使用的唯讀副本，留空時與 host 相同 (但使用獨立的連線池)
+    read_port: int = 0  # 留空 (0) 時與 port 相同
+    pool_size: int = 0  # 寫入引擎的連線池大小，0 表示依各平台最大的 max_workers 推算
+    max_overflow: int = 5
+    read_pool_size: int = 10  # API 讀取引擎的連線池大小
+    read_max_overflow: int = 10
+    pool_timeout: float = 10.0  # 連線池耗盡時等待可用連線的秒數
+    upsert_batch_size: int = 500  # upsert_jobs 每個事務寫入的職缺數
+    status_batch_size: int = 2000  # mark_urls_as_crawled 每個事務更新的 URL 數
+    local_infile: bool = False  # 允許 LOAD DATA LOCAL INFILE (批量載入需要，伺服器也須開啟 local_infile)
+    bulk_chunk_rows: int = 200_000  # 批量載入每次 LOAD DATA 與合併的行數
     model_config = SettingsConfigDict(env_prefix='MYSQL_')
 
 class RabbitMQSettings(BaseSettings):
@@ -71,8 +137,52 @@ class RedisSettings(BaseSettings):
     host: str = "redis"
     port: int = 6379
     db: int = 0
+    meta_ttl: int = 7 * 86400  # 中介資料 hash 的保留秒數 (過期後改從 MySQL 讀取)
     model_config = SettingsConfigDict(env_prefix='REDIS_')
 
+class HttpSettings(BaseSettings):
+    """共享 HTTP 客戶端配置。"""
+    pool_connections: int = 10  # 每個客戶端快取的主機連線池數量
+    max_response_bytes: int = 10 * 1024 * 1024  # 單一響應體 (解壓後) 的大小上限
+    dns_cache_ttl: int = 300  # DNS 快取秒數，0 表示停用
+    dns_cache_size: int = 256  # DNS 快取的主機數上限，超過時淘汰最久未使用的項目
+    conditional_requests: bool = True  # 詳情頁帶上 ETag / Last-Modified 發出條件請求
+    validator_ttl: int = 14 * 86400  # 驗證器在 Redis 中的保留秒數
+    model_config = SettingsConfigDict(env_prefix='HTTP_')
+
+class RateLimitSettings(BaseSettings):
+    """Redis 分散式限流器 (AIMD 令牌桶) 配置，所有 worker 共享同一份預算。"""
+    enabled: bool = True
+    initial_rate: float = 5.0  # 每個平台/主機的初始速率 (req/s)
+    min_rate: float = 0.5
+    max_rate: float = 20.0
+    burst: int = 10  # 令牌桶容量
+    increase_step: float = 0.1  # 每次成功響應增加的速率
+    decrease_factor: float = 0.5  # 遇到限流時速率的乘數
+    throttle_statuses: List[int] = [429, 503]
+    max_sleep: float = 1.0  # 單次等待上限，避免在速率變化後睡過頭
+    key_ttl: int = 3600
+    model_config = SettingsConfigDict(env_prefix='RATELIMIT_')
+
+class ParserSettings(BaseSettings):
+    """HTML 解析配置。"""
+    html_backend: str = "lexbor"  # "lexbor" (selectolax) 或 "bs4" (BeautifulSoup + html.parser)
+    model_config = SettingsConfigDict(env_prefix='PARSER_')
+
+class ArchiveSettings(BaseSettings):
+    """原始響應封存庫配置 (見 crawler.archive)。"""
+    enabled: bool = True
+    path: str = "data/archive"  # 本地封存目錄，多個 worker 可共用同一目錄
+    compression_level: int = 3  # zstd 壓縮等級
+    reparse_workers: int = 4  # `crawler task reparse` 預設的解析進程數
+    model_config = SettingsConfigDict(env_prefix='ARCHIVE_')
+
+class ClaimSettings(BaseSettings):
+    """details worker 認領 URL 的租約配置 (見 crawler.core.lease)。"""
+    lease_seconds: int = 900  # 租約長度，worker 停止續約超過此時間後 URL 可被重新認領
+    renew_interval: float = 300.0  # 續約間隔，應明顯小於 lease_seconds
+    model_config = SettingsConfigDict(env_prefix='CLAIM_')
+
 # --- 主配置類 ---
 
 class Settings(BaseSettings):
@@ -80,6 +190,11 @@ class Settings(BaseSettings):
     db: DatabaseSettings = DatabaseSettings()
     rabbitmq: RabbitMQSettings = RabbitMQSettings()
     redis: RedisSettings = RedisSettings()
+    http: HttpSettings = HttpSettings()
+    ratelimit: RateLimitSettings = RateLimitSettings()
+    archive: ArchiveSettings = ArchiveSettings()
+    parser: ParserSettings = ParserSettings()
+    claim: ClaimSettings = ClaimSettings()
     
     # 聚合所有平台配置
     p104: Project104Settings = Project104Settings()
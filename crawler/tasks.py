@@ -8,12 +8,14 @@ import logging
 import json
 from typing import List, Dict, Any
 
-from bs4 import BeautifulSoup
+from celery.exceptions import SoftTimeLimitExceeded
 
 from crawler.app import app
-from crawler.enums import SourcePlatform
+from crawler.enums import SourcePlatform, ExecutionMode
 from crawler.database import repository
-from crawler.utils import make_request
+from crawler.factory import create_crawler
+from crawler.http_client import get_http_client
+from crawler.utils import make_request, find_script_text
 from crawler.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -24,14 +26,13 @@ def parse_next_data_for_i18n_categories(html_content: str) -> List[Dict[str, Any
     Finds the __NEXT_DATA__ script tag, parses its JSON content,
     and extracts the hierarchical category data from the i18n (internationalization) object.
     """
-    soup = BeautifulSoup(html_content, 'html.parser')
-    next_data_script = soup.find('script', id='__NEXT_DATA__')
+    next_data_script = find_script_text(html_content, '__NEXT_DATA__')
     
-    if not next_data_script:
+    if next_data_script is None:
         raise ValueError("Could not find __NEXT_DATA__ script tag in the HTML.")
 
     try:
-        data = json.loads(next_data_script.string)
+        data = json.loads(next_data_script)
     except json.JSONDecodeError:
         raise ValueError("Failed to parse JSON from __NEXT_DATA__ script tag.")
 
@@ -89,7 +90,8 @@ def run_category_pipeline(self) -> None:
         logger.info("[Cakeresume] Running category pipeline from __NEXT_DATA__...")
         cfg = settings.pcake
         
-        res = make_request("https://www.cakeresume.com/jobs", headers=cfg.headers)
+        client = get_http_client(SourcePlatform.PLATFORM_CAKERESUME.value, cfg.max_workers)
+        res = make_request("https://www.cakeresume.com/jobs", headers=cfg.headers, client=client)
         
         categories = parse_next_data_for_i18n_categories(res.text)
         
@@ -102,4 +104,27 @@ def run_category_pipeline(self) -> None:
 
     except Exception as e:
         logger.error(f"[Cakeresume] Category pipeline failed: {e}", exc_info=True)
-        raise self.retry(exc=e, countdown=180)
\ No newline at end of file
+        raise self.retry(exc=e, countdown=180)
+
+@app.task(bind=True, name="crawler.run_urls_pipeline", acks_late=True)
+def run_urls_pipeline(self, platform_name: str) -> None:
+    """為指定平台執行 URL 獲取流程 (由 Airflow 的 `{platform}_urls` task 觸發)。"""
+    platform = SourcePlatform(platform_name)
+    create_crawler(platform).run_urls_pipeline()
+
+
+@app.task(bind=True, name="crawler.run_details_pipeline", acks_late=True, soft_time_limit=3300, time_limit=3600)
+def run_details_pipeline(self, platform_name: str, limit: int = 100, mode: str = ExecutionMode.THREAD.value) -> None:
+    """
+    為指定平台執行職缺詳情抓取流程 (由 Airflow 的 `{platform}_details` task 觸發)。
+    `mode` 可為 "thread"、"async" 或 "pipeline"，對應 `ExecutionMode`；
+    在 Celery 的 prefork worker 中 pipeline 模式會回退為 thread 模式。
+
+    觸發 soft time limit 時，Orchestrator 的 DetailsSink 會先寫入已完成的結果，
+    未處理的 URL 保持 PENDING，留待下一次執行。
+    """
+    platform = SourcePlatform(platform_name)
+    try:
+        create_crawler(platform).run_details_pipeline(limit=limit, mode=ExecutionMode(mode))
+    except SoftTimeLimitExceeded:
+        logger.warning(f"[{platform_name}] Details pipeline 達到 soft time limit，已保存部分進度，剩餘 URL 將於下次執行處理。")
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateIndex
+
+from crawler.api.dependencies import get_db_session
+from crawler.api.main import app, decode_cursor
+from crawler.database.schema import Job
+from crawler.enums import JobStatus, SourcePlatform
+
+
+class _CapturingSession:
+    """Records the compiled MySQL statement instead of querying a database."""
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.sql = None
+
+    def exec(self, statement):
+        self.sql = str(statement.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}))
+        return self
+
+    def all(self):
+        return self.rows
+
+
+@pytest.fixture
+def session():
+    fake = _CapturingSession()
+    app.dependency_overrides[get_db_session] = lambda: fake
+    yield fake
+    app.dependency_overrides.clear()
+
+
+def test_fulltext_index_uses_the_ngram_parser():
+    index = next(i for i in Job.__table__.indexes if i.name == "ft_jobs_text")
+
+    ddl = str(CreateIndex(index).compile(dialect=mysql.dialect()))
+
+    assert ddl == "CREATE FULLTEXT INDEX ft_jobs_text ON tb_jobs (title, company_name, description) WITH PARSER ngram"
+
+
+def test_keyword_search_ranks_by_relevance(session):
+    response = TestClient(app).get("/jobs/", params={"q": "後端工程師"})
+
+    assert response.status_code == 200
+    assert "WHERE MATCH (tb_jobs.title, tb_jobs.company_name, tb_jobs.description) AGAINST ('後端工程師')" in session.sql
+    assert "ORDER BY MATCH (tb_jobs.title, tb_jobs.company_name, tb_jobs.description) AGAINST ('後端工程師') DESC" in session.sql
+
+
+def test_boolean_mode_passes_operators_through(session):
+    TestClient(app).get("/jobs/", params={"q": "+python -實習", "boolean_mode": True})
+
+    assert "AGAINST ('+python -實習' IN BOOLEAN MODE)" in session.sql
+
+
+def test_single_character_queries_fall_back_to_like(session):
+    TestClient(app).get("/jobs/", params={"q": "廚"})
+
+    assert "MATCH" not in session.sql
+    assert "tb_jobs.title LIKE" in session.sql
+
+
+def _jobs(count):
+    return [
+        Job(id=100 - i, source_platform=SourcePlatform.PLATFORM_104, source_job_id=str(i), url=f"https://www.104.com.tw/job/{i}",
+            status=JobStatus.ACTIVE, title="工程師", updated_at=datetime(2024, 5, 1, 12, 0, 0))
+        for i in range(count)
+    ]
+
+
+def test_keyset_page_returns_a_cursor_for_the_next_page(session):
+    session.rows = _jobs(3)
+
+    body = TestClient(app).get("/jobs/page", params={"limit": 2}).json()
+
+    assert [item["id"] for item in body["items"]] == [100, 99]
+    assert decode_cursor(body["next_cursor"]) == (datetime(2024, 5, 1, 12, 0, 0), 99)
+    assert session.sql.endswith("ORDER BY tb_jobs.updated_at DESC, tb_jobs.id DESC \n LIMIT 3")
+    assert "OFFSET" not in session.sql.upper() and "LIMIT 3," not in session.sql
+
+    TestClient(app).get("/jobs/page", params={"limit": 2, "cursor": body["next_cursor"]})
+
+    assert "tb_jobs.updated_at < '2024-05-01 12:00:00' OR tb_jobs.updated_at = '2024-05-01 12:00:00' AND tb_jobs.id < 99" in session.sql
+
+
+def test_last_page_has_no_cursor(session):
+    session.rows = _jobs(2)
+
+    assert TestClient(app).get("/jobs/page", params={"limit": 2}).json()["next_cursor"] is None
+
+
+def test_invalid_cursor_is_rejected(session):
+    response = TestClient(app).get("/jobs/page", params={"cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+
+
+def test_keyset_index_covers_the_sort_order():
+    index = next(i for i in Job.__table__.indexes if i.name == "ix_jobs_updated_at_id")
+
+    assert [c.name for c in index.columns] == ["updated_at", "id"]
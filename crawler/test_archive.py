@@ -0,0 +1,26 @@
+from crawler.archive import RawArchive
+
+
+def test_identical_payloads_are_stored_once(tmp_path):
+    archive = RawArchive(str(tmp_path), "platform_test")
+
+    first = archive.put("https://example.com/job/1", "<html>same</html>", {"jobId": 1})
+    second = archive.put("https://example.com/job/2", "<html>same</html>", {"jobId": 2})
+
+    assert first == second
+    assert len(list((tmp_path / "objects").rglob("*.zst"))) == 1
+    assert archive.get(first) == "<html>same</html>"
+
+
+def test_latest_payload_wins_and_entries_keep_their_meta(tmp_path):
+    archive = RawArchive(str(tmp_path), "platform_test")
+    archive.put("https://example.com/job/1", "v1", {"jobId": 1})
+    latest = archive.put("https://example.com/job/1", "v2", {"jobId": 1})
+    archive.put("https://example.com/job/3", "other", None)
+
+    entries = [entry for chunk in archive.iter_entries(chunk_size=1) for entry in chunk]
+
+    assert entries == [
+        ("https://example.com/job/1", latest, {"jobId": 1}),
+        ("https://example.com/job/3", archive.put("https://example.com/job/3", "other"), None),
+    ]
@@ -0,0 +1,150 @@
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, UniqueConstraint, create_engine, event, func, select, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateTable
+
+from crawler.database import bulk
+from crawler.database.schema import Job
+from crawler.enums import JobStatus, SourcePlatform
+
+
+def test_fields_use_load_data_escaping():
+    assert bulk.tsv_field(None) == "\\N"
+    assert bulk.tsv_field("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+    assert bulk.tsv_field(SourcePlatform.PLATFORM_104) == "PLATFORM_104"
+    assert bulk.tsv_field(b"\x00\xff") == "00ff"
+    assert bulk.tsv_field(datetime(2024, 5, 1, 8, 30)) == "2024-05-01 08:30:00"
+
+
+def test_binary_columns_are_unhexed_on_load():
+    sql = bulk._load_data_sql("/tmp/urls.tsv", "stg_tb_urls", bulk.URL_COLUMNS)
+
+    assert sql.startswith("LOAD DATA LOCAL INFILE '/tmp/urls.tsv' REPLACE INTO TABLE stg_tb_urls")
+    assert "@intermediate_data" in sql and sql.endswith("SET intermediate_data = UNHEX(@intermediate_data)")
+
+
+_UNESCAPES = {"\\t": "\t", "\\n": "\n", "\\r": "\r", "\\0": "\0", "\\\\": "\\"}
+
+
+def _sql_literal(field):
+    if field == "\\N":
+        return "NULL"
+    value = re.sub(r"\\.", lambda m: _UNESCAPES[m.group()], field)
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _load_data_as_insert(sql, loaded_files):
+    """Translates the LOAD DATA statement into an SQLite INSERT of the TSV file it points at."""
+    path = sql.split("'")[1]
+    staging = re.search(r"INTO TABLE (\w+)", sql).group(1)
+    columns = re.search(r"\(([^()]*)\)(?: SET .*)?$", sql).group(1).replace("@", "")
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    loaded_files.append(content)
+    rows = [
+        "(" + ", ".join(_sql_literal(field) for field in line.split("\t")) + ")"
+        for line in content.split("\n") if line
+    ]
+    return f"INSERT OR REPLACE INTO {staging} ({columns}) VALUES {', '.join(rows)}"
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path, monkeypatch):
+    """
+    A file-backed SQLite engine with a real QueuePool standing in for MySQL: commits, pooled
+    connections and per-connection TEMPORARY tables behave as they do in production.
+    LOAD DATA and DROP TEMPORARY TABLE are translated to SQLite before they reach the driver.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk.db'}", poolclass=QueuePool)
+    engine.loaded_files = []
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def translate(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("LOAD DATA"):
+            statement = _load_data_as_insert(statement, engine.loaded_files)
+        statement = statement.replace("DROP TEMPORARY TABLE", "DROP TABLE")
+        return statement, parameters
+
+    monkeypatch.setattr(bulk, "get_engine", lambda: engine)
+    monkeypatch.setattr(bulk.settings.db, "local_infile", True)
+    yield engine
+    engine.dispose()
+
+
+def _sqlite_jobs_table(engine):
+    """tb_jobs with an SQLite-friendly integer key; the merge below stands in for ON DUPLICATE KEY UPDATE."""
+    jobs = Table(
+        "tb_jobs", MetaData(),
+        Column("id", Integer, primary_key=True),
+        *[Column(name, Job.__table__.c[name].type) for name in bulk.JOB_COLUMNS],
+        UniqueConstraint("source_platform", "source_job_id"),
+    )
+    jobs.create(engine)
+    return jobs
+
+
+def _sqlite_job_merge(staging):
+    columns = ", ".join(bulk.JOB_COLUMNS)
+    return text(f"INSERT OR REPLACE INTO tb_jobs ({columns}) SELECT {columns} FROM {staging}")
+
+
+def _jobs(count):
+    return (
+        Job(source_platform=SourcePlatform.PLATFORM_104, source_job_id=str(i), url=f"https://www.104.com.tw/job/{i}",
+            status=JobStatus.ACTIVE, title="工程師", description="第一行\n第二行")
+        for i in range(count)
+    )
+
+
+def test_jobs_are_loaded_and_merged_in_chunks_on_one_connection(sqlite_engine, monkeypatch):
+    jobs = _sqlite_jobs_table(sqlite_engine)
+    monkeypatch.setattr(bulk, "_job_merge", _sqlite_job_merge)
+
+    assert bulk.load_jobs(_jobs(5), chunk_rows=2) == 5
+
+    assert [len(f.splitlines()) for f in sqlite_engine.loaded_files] == [2, 2, 1]
+    with sqlite_engine.connect() as conn:
+        rows = conn.execute(select(jobs.c.source_job_id, jobs.c.description)).all()
+        leftovers = conn.exec_driver_sql("SELECT name FROM sqlite_temp_master").all()
+    assert sorted(job_id for job_id, _ in rows) == ["0", "1", "2", "3", "4"]
+    assert all(description == "第一行\n第二行" for _, description in rows)
+    assert leftovers == []
+
+
+def test_a_failed_chunk_keeps_earlier_chunks_and_drops_the_staging_table(sqlite_engine, monkeypatch):
+    jobs = _sqlite_jobs_table(sqlite_engine)
+    monkeypatch.setattr(bulk, "_job_merge", _sqlite_job_merge)
+
+    def rows():
+        yield from (bulk.repository.job_row(job, datetime.utcnow()) for job in _jobs(2))
+        raise RuntimeError("source exhausted mid-stream")
+
+    with pytest.raises(RuntimeError):
+        bulk._bulk_merge(Job.__table__, bulk.JOB_COLUMNS, rows(), bulk._job_merge, chunk_rows=2)
+
+    with sqlite_engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(jobs)).scalar() == 2
+        assert conn.exec_driver_sql("SELECT name FROM sqlite_temp_master").all() == []
+
+
+def test_job_merge_keeps_unchanged_rows():
+    sql = str(bulk._job_merge("stg_tb_jobs").compile(dialect=mysql.dialect()))
+
+    assert sql.startswith("INSERT INTO tb_jobs")
+    assert "FROM stg_tb_jobs ON DUPLICATE KEY UPDATE" in sql
+    assert sql.rstrip().endswith("content_hash = VALUES(content_hash)")
+
+
+def test_staging_tables_leave_out_the_fulltext_index():
+    """InnoDB temporary tables reject FULLTEXT indexes, so the staging DDL must not copy ft_jobs_text."""
+    assert any(index.name == "ft_jobs_text" for index in Job.__table__.indexes)
+
+    ddl = str(CreateTable(bulk.staging_table(Job.__table__, bulk.JOB_COLUMNS)).compile(dialect=mysql.dialect()))
+
+    assert ddl.startswith("\nCREATE TEMPORARY TABLE stg_tb_jobs (")
+    assert "UNIQUE (source_platform, source_job_id)" in ddl
+    assert " LIKE " not in ddl and "FULLTEXT" not in ddl and "ngram" not in ddl
@@ -0,0 +1,50 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+
+from crawler.database import connection
+
+
+def _use_sqlite_engines(monkeypatch):
+    """Replaces MySQL with in-memory SQLite engines while keeping the requested pool sizing."""
+    created = {}
+
+    def fake_create_engine(url, **kwargs):
+        created[url] = kwargs
+        return create_engine(
+            "sqlite://", poolclass=QueuePool, pool_size=kwargs["pool_size"], max_overflow=kwargs["max_overflow"]
+        )
+
+    monkeypatch.setattr(connection, "create_engine", fake_create_engine)
+    monkeypatch.setattr(connection, "_engines", {})
+    monkeypatch.setattr(connection, "_pool_capacity", {})
+    monkeypatch.setattr(connection, "_peak_checked_out", {})
+    return created
+
+
+def test_read_and_write_engines_have_separate_tuned_pools(monkeypatch):
+    created = _use_sqlite_engines(monkeypatch)
+    monkeypatch.setattr(connection.settings.db, "read_host", "mysql-replica")
+    monkeypatch.setattr(connection.settings.p104, "max_workers", 12)
+
+    write, read = connection.get_engine(), connection.get_engine(connection.READ)
+
+    assert write is not read and connection.get_engine(connection.WRITE) is write
+    (write_url, write_args), (read_url, read_args) = created.items()
+    assert "@mysql:" in write_url and "@mysql-replica:" in read_url
+    assert write_args["pool_size"] == 14 and read_args["pool_size"] == connection.settings.db.read_pool_size
+    assert write_args["pool_pre_ping"] and read_args["pool_timeout"] == connection.settings.db.pool_timeout
+    assert write_args["connect_args"]["local_infile"] is False
+
+
+def test_pool_stats_report_utilization_and_peak(monkeypatch):
+    _use_sqlite_engines(monkeypatch)
+    engine = connection.get_engine(connection.READ)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        during = connection.get_pool_stats()["read"]
+
+    after = connection.get_pool_stats()["read"]
+    assert during["checked_out"] == 2
+    assert during["utilization"] == round(2 / during["capacity"], 2)
+    assert after["checked_out"] == 0 and after["peak_checked_out"] == 2
@@ -0,0 +1,122 @@
+"""Both HTML backends must produce identical Job output on recorded pages."""
+from pathlib import Path
+
+import pytest
+
+from crawler.projects.platform_1111.parsers import _DetailIndex, transform_details_to_job_model as parse_1111
+from crawler.projects.platform_cakeresume import parsers as cakeresume_parsers
+from crawler.projects.platform_cakeresume.strategies import ScriptDetailParser
+from crawler.projects.platform_yes123.parsers import transform_details_to_job_model as parse_yes123
+from crawler.settings import settings
+from crawler.utils import HtmlNode, find_script_text, parse_html
+
+PROJECTS = Path(__file__).parent / "projects"
+BACKENDS = ["lexbor", "bs4"]
+
+
+def fixture(platform, name):
+    return (PROJECTS / platform / "fixtures" / name).read_text(encoding="utf-8")
+
+
+def parse_with(backend, monkeypatch, parse, *args):
+    monkeypatch.setattr(settings.parser, "html_backend", backend)
+    job = parse(*args)
+    assert job is not None
+    # created_at / updated_at are wall-clock defaults, not parser output
+    return job.model_dump(exclude={"created_at", "updated_at"})
+
+
+DETAIL_CASES = {
+    "1111": lambda: (parse_1111, {"jobId": 103687212, "companyName": "盈弘展工程行", "companyId": 77}, fixture("platform_1111", "job_detail.html"), "https://www.1111.com.tw/job/103687212"),
+    "yes123": lambda: (parse_yes123, fixture("platform_yes123", "job_detail.html"), "https://www.yes123.com.tw/wk_index/job.asp?p_id=20250609_aa&job_id=1001"),
+    "cakeresume": lambda: (ScriptDetailParser(), fixture("platform_cakeresume", "job_detail.html"), "https://www.cakeresume.com/companies/cake-co/jobs/senior-data-engineer", None),
+}
+
+
+@pytest.mark.parametrize("platform", sorted(DETAIL_CASES))
+def test_backends_produce_identical_jobs(platform, monkeypatch):
+    parse, *args = DETAIL_CASES[platform]()
+
+    results = {backend: parse_with(backend, monkeypatch, parse, *args) for backend in BACKENDS}
+
+    assert results["lexbor"] == results["bs4"]
+
+
+def test_1111_detail_fields_are_extracted(monkeypatch):
+    parse, *args = DETAIL_CASES["1111"]()
+    job = parse_with("lexbor", monkeypatch, parse, *args)
+
+    assert job["title"] == "資深後端工程師 & 架構師"
+    assert "trackImpression" not in job["description"]
+    assert job["location_text"] == "台北市大安區復興南路一段 390 號"
+    assert (job["salary_min"], job["salary_max"]) == (45000, 55000)
+    assert job["experience_required_text"] == "需具備 3 年以上工作經驗"
+    assert job["posted_at"].isoformat() == "2025-06-17T11:24:00"
+
+
+@pytest.mark.parametrize("platform, selector", [
+    ("platform_yes123", 'a[href^="job.asp?p_id="]'),
+    ("platform_cakeresume", "a.JobSearchItem_jobTitle__bu6yO"),
+])
+def test_list_page_links_match_across_backends(platform, selector):
+    html = fixture(platform, "job_list.html")
+
+    links = {backend: [a.get("href") for a in parse_html(html, backend).select(selector)] for backend in BACKENDS}
+
+    assert links["lexbor"] == links["bs4"]
+    assert len(links["lexbor"]) == 2 if platform == "platform_cakeresume" else 3
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("html, label, expected", [
+    # h3 label followed by its value
+    ("<li><h3>工作性質</h3><p>全職</p></li>", "工作性質", "全職"),
+    # dt label prefers the following dd
+    ("<dl><dt>工作經驗</dt><dd> 3年以上 </dd></dl>", "工作經驗", "3年以上"),
+    # an empty h3 sibling falls back to the first div/span/dt/p containing the label
+    ("<li><h3>工作待遇</h3><p> </p></li><span>工作待遇</span><span>面議</span>", "工作待遇", "面議"),
+    # value found among the label's siblings, skipping ones that repeat the label
+    ("<div><span>學歷要求</span></div><div><p><span>學歷要求</span></p><p>大學</p></div>", "學歷要求", "學歷要求大學"),
+    # a script sibling counts as having text, as it does for BeautifulSoup
+    ("<div>工作地點</div><script>x()</script><p>台北市</p>", "工作地點", "x()"),
+    ("<p>沒有這個欄位</p>", "工作地點", None),
+])
+def test_1111_detail_index_lookups(backend, html, label, expected):
+    index = _DetailIndex(parse_html(f"<html><body>{html}</body></html>", backend), labels=(label,))
+
+    node = index.get(label)
+
+    assert (node.get_text(strip=True) if node else None) == expected
+
+
+@pytest.mark.parametrize("html", [
+    fixture("platform_cakeresume", "job_detail.html"),
+    "<SCRIPT type='application/json' ID='__NEXT_DATA__'>{\"a\": \"</div>\"}</SCRIPT >",
+    '<script id=__NEXT_DATA__x>no</script><script data-id="id=__NEXT_DATA__" id="__NEXT_DATA__">yes</script>',
+    '<div id="__NEXT_DATA__">not a script</div>',
+])
+def test_find_script_text_matches_the_dom(html):
+    expected = parse_html(html, "bs4").select_one("script#__NEXT_DATA__")
+
+    assert find_script_text(html, "__NEXT_DATA__") == (expected.string if expected else None)
+
+
+def test_cakeresume_parser_skips_the_dom_when_json_has_the_location(monkeypatch):
+    html = fixture("platform_cakeresume", "job_detail.html").replace(
+        '"location_list": []', '"location_list": ["台北市信義區"]'
+    )
+    monkeypatch.setattr(cakeresume_parsers, "parse_html", lambda *_: pytest.fail("DOM should not be built"))
+
+    job = ScriptDetailParser()(html, "https://www.cakeresume.com/companies/cake-co/jobs/senior-data-engineer", None)
+
+    assert job.location_text == "台北市信義區"
+
+
+def test_html_node_is_an_abstract_interface():
+    class PartialNode(HtmlNode):
+        def get_text(self, strip=False):
+            return ""
+
+    with pytest.raises(TypeError, match="abstract"):
+        PartialNode()
+    assert all(isinstance(parse_html("<p>x</p>", backend=backend), HtmlNode) for backend in BACKENDS)
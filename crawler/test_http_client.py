@@ -0,0 +1,100 @@
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from crawler import http_client, utils
+from crawler.http_client import DnsCache, HttpClient, ResponseTooLargeError
+from crawler.ratelimit import _NoopRateLimiter
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    calls = []
+
+    def fake_getaddrinfo(host, port, *args):
+        calls.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+
+    monkeypatch.setattr(socket, "getaddrinfo", fake_getaddrinfo)
+    return calls
+
+
+def test_dns_cache_reuses_fresh_entries_and_evicts_the_least_recently_used(lookups):
+    cache = DnsCache(ttl=60, max_entries=2)
+
+    cache.getaddrinfo("a.example", 443)
+    cache.getaddrinfo("b.example", 443)
+    cache.getaddrinfo("a.example", 443)
+    cache.getaddrinfo("c.example", 443)
+
+    assert lookups == ["a.example", "b.example", "c.example"]
+    assert len(cache) == 2
+    cache.getaddrinfo("b.example", 443)
+    assert lookups[-1] == "b.example"
+
+
+def test_dns_cache_drops_expired_entries(lookups):
+    cache = DnsCache(ttl=0, max_entries=10)
+
+    cache.getaddrinfo("a.example", 443)
+    cache.getaddrinfo("b.example", 443)
+
+    assert len(cache) == 1
+    cache.getaddrinfo("a.example", 443)
+    assert lookups == ["a.example", "b.example", "a.example"]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_client_connections_resolve_through_the_scoped_cache(monkeypatch):
+    monkeypatch.setattr(http_client, "get_rate_limiter", _NoopRateLimiter)
+    monkeypatch.setattr(http_client, "_dns_cache", DnsCache(ttl=60, max_entries=8))
+    server = HTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    original_getaddrinfo = socket.getaddrinfo
+    client = HttpClient("platform_test", pool_maxsize=2)
+    try:
+        response = client.request("GET", f"http://localhost:{server.server_port}/")
+    finally:
+        client.close()
+        server.shutdown()
+
+    assert response.text == "ok"
+    assert socket.getaddrinfo is original_getaddrinfo
+    assert len(http_client._dns_cache) == 1
+
+
+def test_growing_the_pool_closes_the_old_pool_manager():
+    client = HttpClient("platform_test", pool_maxsize=2)
+    old_manager = client.adapter.poolmanager
+    old_manager.connection_from_url("http://example.com/")
+
+    client.grow_pool(8)
+
+    assert client.adapter.poolmanager is not old_manager
+    assert len(old_manager.pools) == 0
+
+
+def test_oversized_responses_are_not_retried():
+    attempts = []
+
+    class OversizedClient:
+        def request(self, *args, **kwargs):
+            attempts.append(1)
+            raise ResponseTooLargeError("too large")
+
+    with pytest.raises(ResponseTooLargeError):
+        utils.make_request("https://example.com/", headers={}, client=OversizedClient())
+
+    assert len(attempts) == 1
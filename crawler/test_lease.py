@@ -0,0 +1,75 @@
+import time
+
+from sqlalchemy.dialects import mysql
+
+from crawler.core import lease
+from crawler.database import repository
+from crawler.database.schema import Url
+from crawler.enums import SourcePlatform
+from crawler.urlhash import url_hash
+
+
+class _RecordingSession:
+    """Captures the statements claim_urls sends instead of talking to MySQL."""
+    def __init__(self, *args, **kwargs):
+        self.statements = []
+        _RecordingSession.last = self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def exec(self, statement):
+        self.statements.append(statement)
+        return self
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+    def all(self):
+        url = "https://www.104.com.tw/job/1"
+        return [Url(source=SourcePlatform.PLATFORM_104, url_hash=url_hash(url), source_url=url)]
+
+    def commit(self):
+        pass
+
+
+def test_claim_uses_skip_locked_and_reclaims_expired_leases(monkeypatch):
+    monkeypatch.setattr(repository, "Session", _RecordingSession)
+    monkeypatch.setattr(repository, "get_engine", lambda: None)
+
+    urls = repository.claim_urls(SourcePlatform.PLATFORM_104, 10, "worker-a", 60)
+
+    select_sql, update_sql = (
+        str(s.compile(dialect=mysql.dialect())) for s in _RecordingSession.last.statements
+    )
+    assert select_sql.endswith("FOR UPDATE SKIP LOCKED")
+    assert "tb_urls.lease_expires_at IS NULL OR tb_urls.lease_expires_at <" in select_sql
+    assert "intermediate_data" not in select_sql
+    assert "claimed_by" in update_sql and "tb_urls.url_hash IN" in update_sql
+    assert urls[0].claimed_by == "worker-a" and urls[0].lease_expires_at is not None
+
+
+def test_lease_is_renewed_while_held_and_released_on_exit(monkeypatch):
+    claimed = [Url(source=SourcePlatform.PLATFORM_104, source_url=f"https://www.104.com.tw/job/{i}") for i in range(3)]
+    calls = []
+    monkeypatch.setattr(lease.repository, "claim_urls", lambda platform, limit, worker_id, seconds: claimed[:limit])
+    monkeypatch.setattr(lease.repository, "renew_leases", lambda urls, worker_id, seconds: calls.append(("renew", len(urls))))
+    monkeypatch.setattr(lease.repository, "release_leases", lambda urls, worker_id: calls.append(("release", len(urls))))
+
+    with lease.UrlLease(SourcePlatform.PLATFORM_104, 2, lease_seconds=60, renew_interval=0.01, worker_id="w") as held:
+        assert [u.source_url for u in held.urls] == [u.source_url for u in claimed[:2]]
+        time.sleep(0.05)
+
+    assert ("renew", 2) in calls
+    assert calls[-1] == ("release", 2)
+
+
+def test_nothing_to_release_when_no_urls_were_claimed(monkeypatch):
+    monkeypatch.setattr(lease.repository, "claim_urls", lambda *args: [])
+    monkeypatch.setattr(lease.repository, "release_leases", lambda *args: (_ for _ in ()).throw(AssertionError))
+
+    with lease.UrlLease(SourcePlatform.PLATFORM_104, 5, worker_id="w") as held:
+        assert held.urls == []
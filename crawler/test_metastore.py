@@ -0,0 +1,39 @@
+import fakeredis
+
+from crawler.metastore import IntermediateStore, decode_meta, encode_meta, job_key
+
+
+def test_only_the_configured_fields_are_kept():
+    hit = {"jobId": 103687212, "companyName": "盈弘展工程行", "companyId": 77, "description": "x" * 2000}
+
+    blob = encode_meta(hit, ["jobId", "companyName", "companyId", "missing"])
+
+    assert decode_meta(blob) == {"jobId": 103687212, "companyName": "盈弘展工程行", "companyId": 77}
+    assert len(blob) < 64
+
+
+def test_large_items_are_compressed_and_round_trip():
+    item = {"jobId": 1, "tags": ["python"] * 200, "nested": {"a": [1, 2, 3]}}
+
+    blob = encode_meta(item, [])
+
+    assert blob[:1] == b"\x01"
+    assert len(blob) < 200
+    assert decode_meta(blob) == item
+
+
+def test_job_key_uses_numeric_ids_and_hashes_everything_else():
+    assert job_key("https://www.1111.com.tw/job/103687212/") == "103687212"
+    assert len(job_key("https://www.104.com.tw/job/8abc1")) == 16
+
+
+def test_completed_urls_are_removed_from_the_hash():
+    client = fakeredis.FakeRedis()
+    store = IntermediateStore("platform_1111", client, ttl=60)
+    urls = ["https://www.1111.com.tw/job/1", "https://www.1111.com.tw/job/2"]
+    store.put_many({url: encode_meta({"jobId": i}, []) for i, url in enumerate(urls)})
+
+    store.discard(urls[:1])
+
+    assert store.get_many(urls) == {urls[1]: {"jobId": 1}}
+    assert 0 < client.ttl("imeta:platform_1111") <= 60
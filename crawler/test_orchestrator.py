@@ -0,0 +1,134 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from crawler.core import orchestrator, sink
+from crawler.enums import CrawlStatus, SourcePlatform
+from crawler.metastore import IntermediateStore, encode_meta
+from crawler.watermark import CategoryWatermark, WatermarkStore
+
+
+def make_orchestrator(monkeypatch, platform, store):
+    monkeypatch.setattr(orchestrator, "get_intermediate_store", lambda platform, enabled: store)
+    monkeypatch.setattr(orchestrator, "get_archive", lambda platform: None)
+    return orchestrator.CrawlerOrchestrator(platform, None, None, None)
+
+
+def test_prefetch_reads_redis_first_and_recovers_the_rest_from_mysql(monkeypatch):
+    store = IntermediateStore("platform_1111", fakeredis.FakeRedis(), ttl=60)
+    orc = make_orchestrator(monkeypatch, SourcePlatform.PLATFORM_1111, store)
+    urls = [f"https://www.1111.com.tw/job/{i}" for i in range(4)]
+    store.put_many({url: encode_meta({"jobId": i}, []) for i, url in enumerate(urls[:2])})
+    queried = []
+
+    def stored_copy(missing):
+        queried.extend(missing)
+        return {urls[2]: encode_meta({"jobId": 2}, [])}
+
+    monkeypatch.setattr(orchestrator.repository, "get_intermediate_data", stored_copy)
+
+    metas = orc._prefetch_intermediate_data([SimpleNamespace(source_url=url) for url in urls])
+
+    assert metas == {urls[0]: {"jobId": 0}, urls[1]: {"jobId": 1}, urls[2]: {"jobId": 2}}
+    assert queried == urls[2:]
+
+
+def test_platforms_without_intermediate_data_skip_the_lookup(monkeypatch):
+    orc = make_orchestrator(monkeypatch, SourcePlatform.PLATFORM_104, None)
+    monkeypatch.setattr(
+        orchestrator.repository, "get_intermediate_data", lambda urls: pytest.fail("unexpected MySQL lookup")
+    )
+
+    assert orc._prefetch_intermediate_data([SimpleNamespace(source_url="https://www.104.com.tw/job/1")]) == {}
+
+
+def test_watermarks_are_only_committed_after_the_urls_are_saved(monkeypatch):
+    watermarks = WatermarkStore("platform_104", fakeredis.FakeRedis(decode_responses=True))
+    watermarks.set("cat", "20250601")
+
+    def fetcher():
+        watermark = CategoryWatermark(watermarks, "cat")
+        watermark.is_stale_page(["20250617"])
+        fetcher.pending_watermarks.append(watermark)
+        yield {"link": {"job": "https://www.104.com.tw/job/1"}, "appearDate": "20250617"}
+
+    fetcher.pending_watermarks = []
+    monkeypatch.setattr(orchestrator, "get_intermediate_store", lambda platform, enabled: None)
+    monkeypatch.setattr(orchestrator, "get_archive", lambda platform: None)
+    orc = orchestrator.CrawlerOrchestrator(SourcePlatform.PLATFORM_104, fetcher, None, None)
+
+    def failing_upsert(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(orchestrator.repository, "upsert_urls", failing_upsert)
+    with pytest.raises(RuntimeError):
+        orc.run_urls_pipeline()
+    assert watermarks.get("cat") == "20250601"
+
+    fetcher.pending_watermarks = []
+    monkeypatch.setattr(orchestrator.repository, "upsert_urls", lambda *args, **kwargs: None)
+    orc.run_urls_pipeline()
+    assert watermarks.get("cat") == "20250617" and fetcher.pending_watermarks == []
+
+
+def test_only_requeued_urls_are_cached_in_redis(monkeypatch):
+    store = IntermediateStore("platform_1111", fakeredis.FakeRedis(), ttl=60)
+    items = [{"url": f"https://www.1111.com.tw/job/{i}", "jobId": i} for i in range(3)]
+    monkeypatch.setattr(orchestrator, "get_intermediate_store", lambda platform, enabled: store)
+    monkeypatch.setattr(orchestrator, "get_archive", lambda platform: None)
+    monkeypatch.setattr(orchestrator.repository, "upsert_urls", lambda *args, **kwargs: None)
+    monkeypatch.setattr(orchestrator.repository, "get_pending_urls", lambda urls: urls[1:])
+    orc = orchestrator.CrawlerOrchestrator(SourcePlatform.PLATFORM_1111, lambda: iter(items), None, None)
+
+    orc.run_urls_pipeline()
+
+    assert set(store.get_many([item["url"] for item in items])) == {items[1]["url"], items[2]["url"]}
+
+
+def test_async_sink_flushes_from_a_worker_thread(monkeypatch):
+    flush_threads = []
+    monkeypatch.setattr(
+        sink.repository, "mark_urls_as_crawled", lambda *args, **kwargs: flush_threads.append(threading.get_ident())
+    )
+    details = sink.DetailsSink(SourcePlatform.PLATFORM_104, batch_size=2, flush_interval=60)
+
+    async def main():
+        await details.add_async("https://www.104.com.tw/job/1", CrawlStatus.COMPLETED)
+        assert flush_threads == []
+        await details.add_async("https://www.104.com.tw/job/2", CrawlStatus.FAILED, error="ValueError: bad")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+
+    assert len(flush_threads) == 1 and flush_threads[0] != loop_thread
+    assert details.totals[CrawlStatus.COMPLETED.value] == 1 and details.totals[CrawlStatus.FAILED.value] == 1
+
+
+def test_async_mode_archives_and_parses_off_the_event_loop(monkeypatch):
+    archive_threads = []
+    archive = SimpleNamespace(put=lambda url, raw, meta: archive_threads.append(threading.get_ident()))
+    monkeypatch.setattr(orchestrator, "get_intermediate_store", lambda platform, enabled: None)
+    monkeypatch.setattr(orchestrator, "get_archive", lambda platform: archive)
+
+    async def fetch(url):
+        return "<html></html>"
+
+    job = SimpleNamespace(source_job_id="1")
+    orc = orchestrator.CrawlerOrchestrator(
+        SourcePlatform.PLATFORM_104, None, None, lambda raw, url, meta: job, async_detail_fetcher=fetch
+    )
+    results = []
+
+    class RecordingSink:
+        async def add_async(self, url, status, job=None, error=None):
+            results.append((url, status, job, threading.get_ident()))
+
+    url = "https://www.104.com.tw/job/1"
+    asyncio.run(orc._process_urls_async([SimpleNamespace(source_url=url)], RecordingSink(), {}))
+
+    [(added_url, status, added_job, loop_thread)] = results
+    assert (added_url, status, added_job) == (url, CrawlStatus.COMPLETED, job)
+    assert archive_threads and loop_thread not in archive_threads
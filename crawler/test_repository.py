@@ -0,0 +1,184 @@
+from datetime import datetime
+
+import pymysql
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import QueuePool
+
+from crawler.database import repository
+from crawler.database.schema import Job, Url
+from crawler.enums import CrawlStatus, JobStatus, SourcePlatform
+
+
+def _job(job_id: str, title: str = "後端工程師", description: str = "負責 API 開發") -> Job:
+    return Job(
+        source_platform=SourcePlatform.PLATFORM_104,
+        source_job_id=job_id,
+        url=f"https://www.104.com.tw/job/{job_id}",
+        status=JobStatus.ACTIVE,
+        title=title,
+        description=description,
+    )
+
+
+class _FakeJobsTable:
+    """Stands in for Session: serves stored content hashes and records upsert chunks."""
+    def __init__(self, stored=None, failures=0):
+        self.stored = stored or {}
+        self.failures = failures
+        self.chunks = []
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def exec(self, statement):
+        self._rows = [(SourcePlatform.PLATFORM_104, job_id, h) for job_id, h in self.stored.items()]
+        return self
+
+    def all(self):
+        return self._rows
+
+    def execute(self, statement):
+        if self.failures:
+            self.failures -= 1
+            raise OperationalError("INSERT", {}, pymysql.err.OperationalError(1213, "Deadlock found"))
+        self.chunks.append(statement)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+@pytest.fixture
+def table(monkeypatch):
+    fake = _FakeJobsTable()
+    monkeypatch.setattr(repository, "Session", fake)
+    monkeypatch.setattr(repository, "get_engine", lambda: None)
+    monkeypatch.setattr(repository._upsert_job_chunk.retry, "sleep", lambda seconds: None)
+    return fake
+
+
+def test_content_hash_ignores_timestamps_but_not_content():
+    job = _job("1").model_dump()
+    touched = dict(job, updated_at="later", created_at="later")
+
+    assert repository.job_content_hash(job) == repository.job_content_hash(touched)
+    assert repository.job_content_hash(job) != repository.job_content_hash(_job("1", description="改版").model_dump())
+
+
+def test_unchanged_jobs_are_not_written(table):
+    table.stored = {"1": repository.job_content_hash(_job("1").model_dump())}
+
+    repository.upsert_jobs([_job("1")])
+
+    assert table.chunks == []
+
+
+def test_jobs_are_sorted_and_chunked(table, monkeypatch):
+    sent = []
+    monkeypatch.setattr(repository, "_upsert_job_chunk", lambda rows: sent.append([r["source_job_id"] for r in rows]) or len(rows))
+
+    repository.upsert_jobs([_job(i) for i in ["5", "3", "4", "1", "2", "3"]], batch_size=2)
+
+    assert sent == [["1", "2"], ["3", "4"], ["5"]]
+
+
+def test_deadlocks_are_retried(table):
+    table.failures = 2
+
+    repository.upsert_jobs([_job("1"), _job("2", title="資料工程師")])
+
+    assert len(table.chunks) == 1
+
+
+@pytest.fixture
+def status_db(tmp_path, monkeypatch):
+    """
+    A file-backed SQLite tb_urls behind a real QueuePool holding two idle connections, so a
+    connection handed back to the pool between chunks comes out as a different one next time.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'urls.db'}", poolclass=QueuePool)
+
+    @event.listens_for(engine, "before_cursor_execute", retval=True)
+    def translate(conn, cursor, statement, parameters, context, executemany):
+        return statement.replace("DROP TEMPORARY TABLE", "DROP TABLE"), parameters
+
+    Url.__table__.create(engine)
+    with engine.connect(), engine.connect():
+        pass
+    monkeypatch.setattr(repository, "get_engine", lambda: engine)
+    yield engine
+    engine.dispose()
+
+
+def _claimed_urls(engine, holders):
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        for url, holder in holders.items():
+            row = repository.url_row(SourcePlatform.PLATFORM_104, url, None, None, now)
+            conn.execute(insert(Url.__table__).values(dict(row, claimed_by=holder, lease_expires_at=now)))
+
+
+def _url_rows(engine):
+    with engine.connect() as conn:
+        rows = conn.execute(select(Url.__table__)).mappings().all()
+        leftovers = conn.exec_driver_sql("SELECT name FROM sqlite_temp_master").all()
+    assert leftovers == []
+    return {row["source_url"]: row for row in rows}
+
+
+def test_status_is_applied_in_chunks_on_one_connection(status_db):
+    ok = [f"https://www.104.com.tw/job/{i}" for i in range(4)]
+    bad = "https://www.104.com.tw/job/x"
+    _claimed_urls(status_db, {url: "host:1:abc" for url in ok + [bad]})
+
+    repository.mark_urls_as_crawled(
+        {CrawlStatus.COMPLETED: ok, CrawlStatus.FAILED: [bad]}, {bad: "HTTPError: 404", ok[0]: "stale"}, batch_size=2
+    )
+
+    rows = _url_rows(status_db)
+    assert {url: rows[url]["details_crawl_status"] for url in ok} == {url: CrawlStatus.COMPLETED for url in ok}
+    assert rows[bad]["details_crawl_status"] == CrawlStatus.FAILED
+    assert rows[bad]["error_reason"] == "HTTPError: 404" and rows[ok[0]]["error_reason"] is None
+    assert all(row["claimed_by"] is None and row["lease_expires_at"] is None for row in rows.values())
+
+
+def test_status_write_back_only_touches_rows_the_holder_still_leases(status_db):
+    mine, reclaimed = "https://www.104.com.tw/job/1", "https://www.104.com.tw/job/2"
+    _claimed_urls(status_db, {mine: "host:1:abc", reclaimed: "host:2:def"})
+
+    repository.mark_urls_as_crawled({CrawlStatus.COMPLETED: [mine, reclaimed]}, holder="host:1:abc")
+
+    rows = _url_rows(status_db)
+    assert rows[mine]["details_crawl_status"] == CrawlStatus.COMPLETED and rows[mine]["claimed_by"] is None
+    assert rows[reclaimed]["details_crawl_status"] == CrawlStatus.PENDING
+    assert rows[reclaimed]["claimed_by"] == "host:2:def"
+
+
+def test_failed_cleanup_does_not_mask_the_write_back(status_db, caplog):
+    url = "https://www.104.com.tw/job/1"
+    _claimed_urls(status_db, {url: "host:1:abc"})
+    drops = []
+
+    @event.listens_for(status_db, "before_cursor_execute")
+    def fail_final_drop(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DROP"):
+            drops.append(statement)
+            if len(drops) > 1:
+                raise RuntimeError("connection lost")
+
+    repository.mark_urls_as_crawled({CrawlStatus.FAILED: [url]})
+
+    assert "Failed to drop temporary table tmp_url_status" in caplog.text
+    event.remove(status_db, "before_cursor_execute", fail_final_drop)
+    with status_db.connect() as conn:
+        assert conn.execute(select(Url.__table__.c.details_crawl_status)).scalar() == CrawlStatus.FAILED
@@ -0,0 +1,60 @@
+import time
+from types import SimpleNamespace
+
+from crawler.core.staged import StagedDetailsPipeline
+from crawler.enums import CrawlStatus, SourcePlatform
+
+
+def parse_upper(raw_content, url, intermediate_data):
+    """Module-level so it can be pickled into the parser processes."""
+    if raw_content == "broken":
+        raise ValueError("bad markup")
+    return SimpleNamespace(url=url, body=raw_content.upper(), meta=intermediate_data)
+
+
+class RecordingSink:
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+
+    def add(self, url, status, job=None, error=None):
+        self.results[url] = (status, job)
+        if error:
+            self.errors[url] = error
+
+
+def fetch(url_obj):
+    url = url_obj.source_url
+    time.sleep(0.001)
+    if url.endswith("/304"):
+        return None
+    if url.endswith("/timeout"):
+        raise TimeoutError("fetch timed out")
+    body = "broken" if url.endswith("/broken") else f"page {url[-1]}"
+    return url, body, {"id": url[-1]}
+
+
+def test_each_url_reaches_the_sink_with_its_outcome():
+    urls = [SimpleNamespace(source_url=f"https://example.com/{i}") for i in range(20)]
+    urls += [SimpleNamespace(source_url=f"https://example.com/{name}") for name in ("304", "timeout", "broken")]
+    pipeline = StagedDetailsPipeline(
+        SourcePlatform.PLATFORM_1111, fetch, parse_upper, fetch_workers=4, parse_workers=2, queue_size=3
+    )
+    sink = RecordingSink()
+
+    pipeline.run(urls, sink)
+
+    assert len(sink.results) == 23
+    status, job = sink.results["https://example.com/7"]
+    assert status == CrawlStatus.COMPLETED and job.body == "PAGE 7" and job.meta == {"id": "7"}
+    assert sink.results["https://example.com/304"] == (CrawlStatus.COMPLETED, None)
+    assert sink.results["https://example.com/timeout"] == (CrawlStatus.FAILED, None)
+    assert sink.results["https://example.com/broken"] == (CrawlStatus.FAILED, None)
+    assert sink.errors == {
+        "https://example.com/timeout": "TimeoutError: fetch timed out",
+        "https://example.com/broken": "ValueError: bad markup",
+    }
+    # the bounded queue caps how far the fetch stage can run ahead of the parsers
+    assert pipeline.max_queue_depth <= 3
+    assert pipeline.stats["fetch"].items == 23
+    assert pipeline.stats["parse"].items == 21
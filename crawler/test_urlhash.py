@@ -0,0 +1,34 @@
+from sqlalchemy.dialects import mysql
+from sqlalchemy.schema import CreateTable
+
+from crawler.database.schema import Url
+from crawler.urlhash import hash_index, normalize_url, url_hash
+
+
+def test_hash_ignores_case_of_host_and_fragments_but_not_the_path():
+    base = url_hash("https://www.104.com.tw/job/8abc1?jobsource=list")
+
+    assert url_hash(" HTTPS://WWW.104.com.tw/job/8abc1?jobsource=list#apply ") == base
+    assert url_hash("https://www.104.com.tw/job/8ABC1?jobsource=list") != base
+    assert normalize_url("https://Example.com/a#b") == "https://example.com/a"
+
+
+def test_hash_fits_a_signed_bigint():
+    hashes = [url_hash(f"https://www.1111.com.tw/job/{i}/") for i in range(2000)]
+
+    assert all(-(1 << 63) <= h < (1 << 63) for h in hashes)
+    assert len(set(hashes)) == len(hashes)
+    assert any(h < 0 for h in hashes)
+
+
+def test_results_map_back_to_the_callers_urls():
+    urls = ["https://www.cakeresume.com/companies/a/jobs/b", "https://www.yes123.com.tw/x?p_id=1"]
+
+    assert {url: url_hash(url) for url in urls} == {url: key for key, url in hash_index(urls).items()}
+
+
+def test_tb_urls_is_clustered_on_the_hash():
+    ddl = str(CreateTable(Url.__table__).compile(dialect=mysql.dialect()))
+
+    assert "PRIMARY KEY (url_hash)" in ddl
+    assert "source_url VARCHAR(512) NOT NULL" in ddl
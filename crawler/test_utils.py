@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+
+import fakeredis
+import httpx
+import pytest
+
+from crawler import utils
+from crawler.bench_clean_text import SAMPLES, legacy_clean_text
+from crawler.ratelimit import RateLimiter
+from crawler.utils import clean_text, run_concurrently
+
+
+def test_run_concurrently_pairs_each_result_with_its_task():
+    """Results come back in completion order, but each one stays attached to its own task."""
+    def square(n):
+        time.sleep(0.01 * (5 - n % 5))
+        return n * n
+
+    pairs = list(run_concurrently(square, list(range(20)), max_workers=4))
+
+    assert len(pairs) == 20
+    assert all(result == task * task for task, result in pairs)
+
+
+def test_run_concurrently_returns_exceptions_instead_of_dropping_them():
+    def fail_on_odd(n):
+        if n % 2:
+            raise ValueError(f"odd {n}")
+        return n
+
+    pairs = dict(run_concurrently(fail_on_odd, list(range(6)), max_workers=3))
+
+    assert sorted(pairs) == list(range(6))
+    assert isinstance(pairs[1], ValueError)
+    assert pairs[4] == 4
+
+
+def test_run_concurrently_keeps_a_bounded_submission_window():
+    consumed = []
+    started = []
+    lock = threading.Lock()
+
+    def tasks():
+        for i in range(50):
+            consumed.append(i)
+            yield i
+
+    def work(n):
+        with lock:
+            started.append(n)
+        time.sleep(0.005)
+        return n
+
+    gen = run_concurrently(work, tasks(), max_workers=2, window=3)
+    next(gen)
+    # Taking one result frees one slot, so at most one more task is pulled in.
+    assert len(consumed) <= 4
+    gen.close()
+    assert len(started) <= 4
+
+
+def test_run_concurrently_reports_latency_per_task():
+    seen = {}
+
+    list(run_concurrently(lambda n: n, [1, 2, 3], max_workers=2, on_latency=seen.__setitem__))
+
+    assert set(seen) == {1, 2, 3}
+    assert all(latency >= 0 for latency in seen.values())
+
+
+@pytest.mark.parametrize("text", SAMPLES + [
+    "",
+    "   ",
+    "a < b && c > d",
+    "1 &lt;b&gt; not a tag &amp",
+    "<TEMPLATE><p>hidden</p></TEMPLATE>visible",
+    "<p>unterminated <!-- comment",
+    "<a title=\"1 > 0\" href=\"#\">link</a> <b",
+    "&copy2 &amp; x &amp",
+    "<SCRIPT type='x'>var a = '<p>';</SCRIPT>text",
+])
+def test_clean_text_matches_beautifulsoup(text):
+    """The regex fast path must agree with the BeautifulSoup implementation it replaced."""
+    assert clean_text(text) == legacy_clean_text(text)
+
+
+@pytest.mark.parametrize("text, expected, beautifulsoup", [
+    ("AT&T", "AT&T", "ATT"),
+    ("P&G", "P&G", "PG"),
+    ("Q&A", "Q&A", "QA"),
+    ("R&D", "R&D", "RD"),
+    ("&notit;", "&notit;", "&notit"),
+])
+def test_clean_text_keeps_unknown_entities_that_beautifulsoup_drops(text, expected, beautifulsoup):
+    """Known divergence: html.parser swallows unknown named entities such as '&T' at the end of input."""
+    assert clean_text(text) == expected
+    assert legacy_clean_text(text) == beautifulsoup
+
+
+def test_clean_text_passes_through_non_strings():
+    assert clean_text(None) is None
+    assert clean_text(42) == 42
+
+
+def test_async_requests_talk_to_redis_off_the_event_loop(monkeypatch):
+    limiter = RateLimiter(fakeredis.FakeRedis())
+    redis_threads = []
+    for name in ("_try_acquire", "_adjust_rate"):
+        original = getattr(limiter, name)
+
+        def recorded(*args, _original=original):
+            redis_threads.append(threading.get_ident())
+            return _original(*args)
+
+        monkeypatch.setattr(limiter, name, recorded)
+    monkeypatch.setattr(utils, "get_rate_limiter", lambda: limiter)
+    monkeypatch.setattr(
+        utils, "_get_async_client",
+        lambda verify: httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200))),
+    )
+
+    async def main():
+        await utils.make_async_request("https://example.com/job/1", headers={}, platform="platform_test")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(main())
+
+    assert len(redis_threads) == 2 and loop_thread not in redis_threads
+
+
+def test_run_concurrently_does_not_wait_for_in_flight_tasks_when_interrupted():
+    release = threading.Event()
+
+    def slow(n):
+        if n:
+            release.wait(5)
+        return n
+
+    results = run_concurrently(slow, list(range(4)), max_workers=2)
+    assert next(results) == (0, 0)
+
+    started = time.monotonic()
+    results.close()
+    elapsed = time.monotonic() - started
+    release.set()
+
+    assert elapsed < 1
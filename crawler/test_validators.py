@@ -0,0 +1,90 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+
+from crawler.validators import NotModifiedError, ValidatorCache
+
+
+def make_cache():
+    return ValidatorCache("platform_test", fakeredis.FakeRedis(decode_responses=True), ttl=60)
+
+
+def response(status_code, **headers):
+    return SimpleNamespace(status_code=status_code, headers=headers)
+
+
+def test_validators_are_only_sent_after_commit():
+    cache = make_cache()
+    cache.check("https://example.com/job/1", response(200, ETag='"abc"', **{"Last-Modified": "Tue, 17 Jun 2025 00:00:00 GMT"}))
+
+    # Staged but not committed yet: the job has not reached the database.
+    assert cache.conditional_headers("https://example.com/job/1") == {}
+
+    cache.commit(["https://example.com/job/1"])
+    assert cache.conditional_headers("https://example.com/job/1") == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Tue, 17 Jun 2025 00:00:00 GMT",
+    }
+
+
+def test_discarded_validators_are_never_committed():
+    cache = make_cache()
+    cache.check("https://example.com/job/2", response(200, ETag='"v1"'))
+    cache.discard(["https://example.com/job/2"])
+    cache.commit(["https://example.com/job/2"])
+
+    assert cache.conditional_headers("https://example.com/job/2") == {}
+
+
+def test_not_modified_response_raises():
+    cache = make_cache()
+    with pytest.raises(NotModifiedError):
+        cache.check("https://example.com/job/3", response(304))
+
+
+def test_async_lookup_reads_redis_off_the_event_loop(monkeypatch):
+    cache = make_cache()
+    cache.check("https://example.com/job/3", response(200, ETag='"xyz"'))
+    cache.commit(["https://example.com/job/3"])
+    lookup_threads = []
+    original = cache.redis.hgetall
+
+    def recorded(key):
+        lookup_threads.append(threading.get_ident())
+        return original(key)
+
+    monkeypatch.setattr(cache.redis, "hgetall", recorded)
+
+    async def main():
+        return await cache.conditional_headers_async("https://example.com/job/3"), threading.get_ident()
+
+    headers, loop_thread = asyncio.run(main())
+
+    assert headers == {"If-None-Match": '"xyz"'}
+    assert lookup_threads and loop_thread not in lookup_threads
+
+
+def test_debug_fetches_skip_the_cached_validators(monkeypatch):
+    from crawler.projects.platform_104 import strategies
+
+    cache = make_cache()
+    cache.check("https://www.104.com.tw/job/abc", response(200, ETag='"v1"'))
+    cache.commit(["https://www.104.com.tw/job/abc"])
+    monkeypatch.setattr(strategies, "get_validator_cache", lambda platform: cache)
+    sent = []
+
+    def fake_request(url, headers, **kwargs):
+        sent.append(headers)
+        return SimpleNamespace(status_code=200, headers={}, text="{}")
+
+    monkeypatch.setattr(strategies, "make_request", fake_request)
+    fetcher = strategies.ApiDetailFetcher(SimpleNamespace(headers={}, max_workers=1))
+
+    fetcher("https://www.104.com.tw/job/abc")
+    fetcher("https://www.104.com.tw/job/abc", conditional=False)
+
+    assert sent[0]["If-None-Match"] == '"v1"'
+    assert "If-None-Match" not in sent[1]
@@ -0,0 +1,82 @@
+import fakeredis
+
+from crawler import watermark as watermark_module
+
+from crawler.watermark import CategoryWatermark, WatermarkStore
+
+
+def make_store():
+    return WatermarkStore("platform_test", fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_first_run_never_stops_early_and_records_the_newest_date():
+    store = make_store()
+    watermark = CategoryWatermark(store, "cat")
+
+    assert not watermark.is_stale_page(["20250617", "20250615"])
+    assert not watermark.is_stale_page(["20250614", "20250610"])
+    watermark.commit()
+
+    assert store.get("cat") == "20250617"
+
+
+def test_page_older_than_mark_is_stale_but_same_day_is_not():
+    store = make_store()
+    store.set("cat", "20250617")
+    watermark = CategoryWatermark(store, "cat")
+
+    assert not watermark.is_stale_page(["20250618", "20250617"])
+    assert not watermark.is_stale_page(["20250617", "20250616"])
+    assert watermark.is_stale_page(["20250616", "20250615"])
+
+
+def test_missing_sort_key_disables_early_stop():
+    store = make_store()
+    store.set("cat", "20250617")
+    watermark = CategoryWatermark(store, "cat")
+
+    assert not watermark.is_stale_page(["20250601", None])
+
+
+def test_unsorted_listings_stop_only_on_a_page_of_known_jobs():
+    store = make_store()
+    store.add_known("cat", ["job.asp?p_id=3", "job.asp?p_id=2", "job.asp?p_id=1"])
+    watermark = CategoryWatermark(store, "cat")
+
+    # p_id=3 was modified and moved to the top; p_id=9 is new and still follows it
+    assert not watermark.is_known_page(["job.asp?p_id=3", "job.asp?p_id=9"])
+    assert watermark.is_known_page(["job.asp?p_id=2", "job.asp?p_id=1"])
+    watermark.commit()
+
+    assert set(store.redis.zrange("hwm:platform_test:cat:known", 0, -1)) == {f"job.asp?p_id={i}" for i in (1, 2, 3, 9)}
+
+
+def test_first_run_of_unsorted_listings_never_stops_early():
+    watermark = CategoryWatermark(make_store(), "cat")
+
+    assert not watermark.is_known_page(["job.asp?p_id=2", "job.asp?p_id=1"])
+
+
+def test_mark_never_moves_backwards():
+    store = make_store()
+    store.set("cat", "20250617")
+    watermark = CategoryWatermark(store, "cat")
+
+    assert watermark.is_stale_page(["20250610", "20250601"])
+    watermark.commit()
+
+    assert store.get("cat") == "20250617"
+
+
+def test_known_jobs_are_trimmed_to_a_bounded_recent_window(monkeypatch):
+    store = make_store()
+    monkeypatch.setattr(watermark_module, "KNOWN_MAX_ENTRIES", 3)
+    monkeypatch.setattr(watermark_module.time, "time", lambda: 1_000_000.0)
+    store.add_known("cat", ["old-1", "old-2"])
+
+    monkeypatch.setattr(watermark_module.time, "time", lambda: 1_000_000.0 + watermark_module.KNOWN_WINDOW + 1)
+    store.add_known("cat", ["a", "b", "c", "d"])
+
+    assert store.redis.zcard("hwm:platform_test:cat:known") == 3
+    assert not store.all_known("cat", ["old-1"])
+    assert store.all_known("cat", ["c", "d"])
@@ -0,0 +1,39 @@
+# crawler/urlhash.py
+"""職缺 URL 的 64 位雜湊 (URL Hash Key)。
+
+`tb_urls` 以 URL 的 xxh64 雜湊 (BIGINT) 作為聚簇主鍵，完整 URL 只作為一般欄位
+保存。InnoDB 的每個次級索引都會帶上主鍵，8 字節的雜湊取代最長 2KB 的
+VARCHAR(512) utf8mb4 主鍵後，索引體積與 buffer pool 佔用都大幅減少；
+批次查詢與更新也改以整數 `IN (...)` 比對。
+
+雜湊前先正規化 URL：去除前後空白、scheme 與主機名轉小寫、移除片段 (#...)，
+路徑與查詢字串保持原樣。
+"""
+from typing import Dict, Iterable, List
+from urllib.parse import urlsplit, urlunsplit
+
+import xxhash
+
+_SIGN_BIT = 1 << 63
+
+
+def normalize_url(url: str) -> str:
+    """返回用於計算雜湊的正規化 URL。"""
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, ""))
+
+
+def url_hash(url: str) -> int:
+    """返回正規化 URL 的 xxh64，轉換為有號 64 位整數以存入 MySQL BIGINT。"""
+    value = xxhash.xxh64_intdigest(normalize_url(url).encode("utf-8"))
+    return value - (1 << 64) if value & _SIGN_BIT else value
+
+
+def url_hashes(urls: Iterable[str]) -> List[int]:
+    """批次版本的 `url_hash`，保持輸入順序。"""
+    return [url_hash(url) for url in urls]
+
+
+def hash_index(urls: Iterable[str]) -> Dict[int, str]:
+    """`{url_hash: url}`，用於將以雜湊查回的資料行對應回調用方傳入的 URL。"""
+    return {url_hash(url): url for url in urls}
@@ -2,75 +2,547 @@
 """
 此模組提供全域的通用工具函數，以遵循 DRY (Don't Repeat Yourself) 原則。
 """
+import html
 import logging
+import re
+import time
 import requests
-from typing import Callable, Iterable, Any, Generator, Optional, Dict, List
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from tenacity import retry, stop_after_attempt, wait_exponential
-from bs4 import BeautifulSoup, Tag
+import httpx
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from html.entities import html5 as html5_entities
+from typing import Callable, Iterable, Iterator, Any, Generator, AsyncGenerator, Optional, Dict, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+from crawler.http_client import HttpClient, ResponseTooLargeError, get_http_client
+from crawler.ratelimit import get_rate_limiter
+from crawler.settings import settings
 
 logger = logging.getLogger(__name__)
 
+def _timed_call(func: Callable[..., Any], task: Any) -> Tuple[Any, Optional[BaseException], float]:
+    """在 worker 線程中執行任務並計時，異常作為返回值帶回而不是拋出。"""
+    started = time.perf_counter()
+    try:
+        return func(task), None, time.perf_counter() - started
+    except Exception as exc:
+        return None, exc, time.perf_counter() - started
+
 def run_concurrently(
     func: Callable[..., Any],
-    tasks: List[Any],
-    max_workers: int
-) -> Generator[Any, None, None]:
-    """
-    以線程池併發執行任務。
-    """
-    if not tasks:
-        # yield from () 是一個返回空生成器的簡潔寫法
-        yield from ()
-        return
-        
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        future_to_task = {executor.submit(func, task): task for task in tasks}
-        
-        for future in as_completed(future_to_task):
-            task_repr = repr(future_to_task[future])[:100]
-            try:
-                yield future.result()
-            except Exception as exc:
-                logger.error(f"Error in concurrent task '{task_repr}': {exc}", exc_info=True)
+    tasks: Iterable[Any],
+    max_workers: int,
+    window: Optional[int] = None,
+    on_latency: Optional[Callable[[Any, float], None]] = None,
+) -> Generator[Tuple[Any, Any], None, None]:
+    """
+    以線程池併發執行任務，並限制同時在途的任務數量。
 
+    任務按需從 `tasks` 中取出提交，任何時刻最多只有 `window` 個 (預設為
+    `max_workers * 2`) future 存活，因此大批量任務不會一次性佔滿記憶體。
+    結果按完成順序以 `(task, result)` 的形式 yield；若任務拋出異常，
+    `result` 即為該異常物件，由調用方決定如何處理。
 
-@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+    Args:
+        func (Callable[..., Any]): 對每個任務調用的函數。
+        tasks (Iterable[Any]): 任務序列，可以是生成器。
+        max_workers (int): 線程池大小。
+        window (Optional[int]): 同時在途的任務上限。
+        on_latency (Optional[Callable[[Any, float], None]]): 每個任務完成時以 (task, 秒數) 回調。
+
+    Yields:
+        Tuple[Any, Any]: `(task, result_or_exception)`。
+    """
+    window = max(window or max_workers * 2, 1)
+    task_iter = iter(tasks)
+    in_flight: Dict[Future, Any] = {}
+    latencies: List[float] = []
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def submit_next() -> bool:
+        try:
+            task = next(task_iter)
+        except StopIteration:
+            return False
+        in_flight[executor.submit(_timed_call, func, task)] = task
+        return True
+
+    completed = False
+    try:
+        while len(in_flight) < window and submit_next():
+            pass
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = in_flight.pop(future)
+                result, exc, latency = future.result()
+                latencies.append(latency)
+                logger.debug(f"Concurrent task '{repr(task)[:100]}' finished in {latency:.3f}s")
+                if on_latency:
+                    on_latency(task, latency)
+                if exc is not None:
+                    logger.error(f"Error in concurrent task '{repr(task)[:100]}': {exc}", exc_info=exc)
+                    result = exc
+                submit_next()
+                yield task, result
+        completed = True
+    finally:
+        # 提前結束 (例如 Celery 的 SoftTimeLimitExceeded 在 wait() 中拋出，或調用方關閉生成器) 時
+        # 取消尚未開始的任務，且不等待正在執行的任務，讓調用方的清理 (例如 sink 寫入) 立即進行
+        executor.shutdown(wait=completed, cancel_futures=True)
+
+    if latencies:
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        logger.info(
+            f"run_concurrently finished {len(latencies)} tasks: "
+            f"avg={sum(latencies) / len(latencies):.3f}s, p95={p95:.3f}s, max={latencies[-1]:.3f}s"
+        )
+
+
+# 超過大小上限的響應重試也只會再次超限，直接拋出
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=2, max=10),
+    retry=retry_if_not_exception_type(ResponseTooLargeError),
+)
 def make_request(
     url: str,
     headers: Dict,
     method: str = "GET",
     params: Optional[Dict] = None,
     timeout: int = 20,
+    client: Optional[HttpClient] = None,
     **kwargs
 ) -> requests.Response:
     """
     一個帶有重試機制的健壯的網絡請求函數。
+    請求經由共享的 HttpClient 發出以重用連線；未指定 `client` 時使用預設客戶端。
     """
     try:
         # [確認] kwargs 允許我們傳遞 verify=False 等參數
         logger.debug(f"Making {method} request to {url} with params: {params} and kwargs: {kwargs}")
-        response = requests.request(method, url, headers=headers, params=params, timeout=timeout, **kwargs)
+        client = client or get_http_client()
+        response = client.request(method, url, headers=headers, params=params, timeout=timeout, **kwargs)
         response.raise_for_status()
         return response
     except requests.RequestException as e:
         logger.warning(f"Request failed for {url} with params {params}. Error: {e}. Retrying...")
         raise
 
-from bs4 import BeautifulSoup # Add this import
+# 當前事件循環內共享的 AsyncClient，以 verify 參數區分 (1111/Yes123 需關閉 SSL 驗證)
+_async_clients: ContextVar[Optional[Dict[bool, httpx.AsyncClient]]] = ContextVar("_async_clients", default=None)
+
+@asynccontextmanager
+async def async_client_scope() -> AsyncGenerator[None, None]:
+    """
+    為一次 asyncio 執行建立共享的 AsyncClient 作用域。
+
+    AsyncClient 的連線綁定於創建它的事件循環，因此不能跨 `asyncio.run` 重用。
+    在此作用域內的 `make_async_request` 會共用同一組連線池，離開時統一關閉。
+    """
+    clients: Dict[bool, httpx.AsyncClient] = {}
+    token = _async_clients.set(clients)
+    try:
+        yield
+    finally:
+        _async_clients.reset(token)
+        for client in clients.values():
+            await client.aclose()
+
+def _get_async_client(verify: bool) -> httpx.AsyncClient:
+    clients = _async_clients.get()
+    if clients is None:
+        raise RuntimeError("make_async_request 必須在 async_client_scope() 內調用。")
+    if verify not in clients:
+        clients[verify] = httpx.AsyncClient(verify=verify, follow_redirects=True)
+    return clients[verify]
+
+@retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=2, max=10))
+async def make_async_request(
+    url: str,
+    headers: Dict,
+    method: str = "GET",
+    params: Optional[Dict] = None,
+    timeout: int = 20,
+    verify: bool = True,
+    platform: str = "default",
+    **kwargs
+) -> httpx.Response:
+    """
+    `make_request` 的非同步版本，重試策略與同步版本一致。
+    `platform` 用於向分散式限流器申請該平台/主機的請求許可。
+    """
+    try:
+        logger.debug(f"Making async {method} request to {url} with params: {params} and kwargs: {kwargs}")
+        host = httpx.URL(url).host
+        limiter = get_rate_limiter()
+        await limiter.acquire_async(platform, host)
+
+        client = _get_async_client(verify)
+        try:
+            response = await client.request(method, url, headers=headers, params=params, timeout=timeout, **kwargs)
+        except httpx.TimeoutException:
+            await limiter.feedback_async(platform, host, None)
+            raise
+        await limiter.feedback_async(platform, host, response.status_code)
+        # 與 requests 一致，304 (條件請求命中) 不視為錯誤，由調用方處理
+        if response.status_code != httpx.codes.NOT_MODIFIED:
+            response.raise_for_status()
+        return response
+    except httpx.HTTPError as e:
+        logger.warning(f"Async request failed for {url} with params {params}. Error: {e}. Retrying...")
+        raise
+
+# --- HTML 文件抽象 ---
+#
+# 所有平台的解析器與列表頁抓取器都透過 `parse_html` 取得 `HtmlNode`，而不直接
+# 依賴 BeautifulSoup。預設使用 C 實現的 selectolax (lexbor)，未安裝或
+# `PARSER_HTML_BACKEND=bs4` 時回退到 BeautifulSoup + html.parser。
+# `HtmlNode` 的方法名稱與語義對齊 BeautifulSoup 的 `Tag`，兩個後端對同一頁面
+# 應產生相同的解析結果 (見 crawler/test_html.py)。
+
+try:
+    from selectolax.lexbor import LexborHTMLParser, LexborNode
+except ImportError:  # pragma: no cover - 取決於部署環境
+    LexborHTMLParser = None
+
+# BeautifulSoup 的 get_text() 不包含這些標籤內的文字
+NON_TEXT_TAGS = frozenset({"script", "style", "template"})
+_NON_TEXT_SELECTOR = "script, style, template"
+
+
+class HtmlNode(ABC):
+    """
+    HTML 元素的統一接口。
+
+    只涵蓋解析器實際用到的操作：CSS 選擇、文字與屬性讀取，以及相鄰/父級元素的導航。
+    `get` 返回原始屬性字串 (BeautifulSoup 的 class 屬性會是列表，此處不保證)。
+    """
+    name: str
+
+    @property
+    def text(self) -> str:
+        return self.get_text()
+
+    @abstractmethod
+    def get_text(self, strip: bool = False) -> str:
+        ...
+
+    @property
+    @abstractmethod
+    def string(self) -> Optional[str]:
+        """元素只有單一子節點時返回其文字 (遞歸)，否則返回 None，等同 `Tag.string`。"""
+
+    @abstractmethod
+    def get(self, attr: str, default: Optional[str] = None) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def select(self, selector: str) -> List["HtmlNode"]:
+        ...
+
+    @abstractmethod
+    def select_one(self, selector: str) -> Optional["HtmlNode"]:
+        ...
+
+    @abstractmethod
+    def find_next_sibling(self, name: Optional[str] = None) -> Optional["HtmlNode"]:
+        ...
+
+    @abstractmethod
+    def find_parent(self, name: Optional[str] = None) -> Optional["HtmlNode"]:
+        ...
+
+    @property
+    @abstractmethod
+    def children(self) -> List["HtmlNode"]:
+        """直接子元素 (不含文字節點)。"""
+
+    @property
+    @abstractmethod
+    def descendants(self) -> Iterator["HtmlNode"]:
+        """按文件順序迭代所有後代元素 (不含自身與文字節點)。"""
+
+    @abstractmethod
+    def walk(self) -> Iterator[Tuple[str, Any]]:
+        """
+        以單次遍歷按文件順序產生包含自身在內的整棵子樹事件，供需要一次建立索引的解析器使用：
+
+        - `("start", HtmlNode)` / `("end", None)`: 元素的開始與結束。
+        - `("text", str)`: 會出現在 `get_text()` 中的文字節點。
+        - `("hidden", str)`: 不計入 `get_text()` 的子節點 (註解、script/style 內的文字)，
+          但和 `Tag.string` 一樣算作一個子節點。
+        """
 
-# ... (other functions remain the same)
+
+class _SoupNode(HtmlNode):
+    """BeautifulSoup 後端 (回退實現)。"""
+    __slots__ = ("_tag",)
+
+    def __init__(self, tag: Tag):
+        self._tag = tag
+
+    @property
+    def name(self) -> str:
+        return self._tag.name
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _SoupNode) and self._tag is other._tag
+
+    def __hash__(self) -> int:
+        return id(self._tag)
+
+    def get_text(self, strip: bool = False) -> str:
+        return self._tag.get_text(strip=strip)
+
+    @property
+    def string(self) -> Optional[str]:
+        value = self._tag.string
+        return str(value) if value is not None else None
+
+    def get(self, attr: str, default: Optional[str] = None) -> Optional[str]:
+        return self._tag.get(attr, default)
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        return [_SoupNode(tag) for tag in self._tag.select(selector)]
+
+    def select_one(self, selector: str) -> Optional[HtmlNode]:
+        tag = self._tag.select_one(selector)
+        return _SoupNode(tag) if tag is not None else None
+
+    def find_next_sibling(self, name: Optional[str] = None) -> Optional[HtmlNode]:
+        tag = self._tag.find_next_sibling(name) if name else self._tag.find_next_sibling()
+        return _SoupNode(tag) if tag is not None else None
+
+    def find_parent(self, name: Optional[str] = None) -> Optional[HtmlNode]:
+        tag = self._tag.find_parent(name) if name else self._tag.find_parent()
+        return _SoupNode(tag) if tag is not None else None
+
+    @property
+    def children(self) -> List[HtmlNode]:
+        return [_SoupNode(tag) for tag in self._tag.find_all(recursive=False)]
+
+    @property
+    def descendants(self) -> Iterator[HtmlNode]:
+        return (_SoupNode(tag) for tag in self._tag.find_all())
+
+    def walk(self) -> Iterator[Tuple[str, Any]]:
+        stack = [iter((self._tag,))]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                if stack:
+                    yield "end", None
+            elif isinstance(node, Tag):
+                yield "start", _SoupNode(node)
+                stack.append(iter(node.contents))
+            elif type(node) in (NavigableString, CData):
+                yield "text", str(node)
+            else:
+                yield "hidden", str(node)
+
+
+class _LexborNode(HtmlNode):
+    """selectolax (lexbor) 後端。"""
+    __slots__ = ("_node",)
+
+    def __init__(self, node: "LexborNode"):
+        self._node = node
+
+    @property
+    def name(self) -> str:
+        return self._node.tag
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _LexborNode) and self._node.mem_id == other._node.mem_id
+
+    def __hash__(self) -> int:
+        return self._node.mem_id
+
+    def get_text(self, strip: bool = False) -> str:
+        node = self._node
+        if node.tag in NON_TEXT_TAGS or node.css_first(_NON_TEXT_SELECTOR) is None:
+            return node.text(deep=True, strip=strip)
+        # 與 BeautifulSoup 一致：忽略 script / style 內的文字
+        parts = []
+        for child in node.traverse(include_text=True):
+            if child.is_text_node and child.parent.tag not in NON_TEXT_TAGS:
+                parts.append(child.text_content.strip() if strip else child.text_content)
+        return "".join(parts)
+
+    @property
+    def string(self) -> Optional[str]:
+        node = self._node
+        while True:
+            children = list(node.iter(include_text=True))
+            if len(children) != 1:
+                return None
+            node = children[0]
+            if node.is_text_node:
+                return node.text_content
+            if node.is_comment_node:
+                return node.comment_content
+
+    def get(self, attr: str, default: Optional[str] = None) -> Optional[str]:
+        value = self._node.attributes.get(attr, default)
+        return default if value is None else value
+
+    def select(self, selector: str) -> List[HtmlNode]:
+        return [_LexborNode(node) for node in self._node.css(selector)]
+
+    def select_one(self, selector: str) -> Optional[HtmlNode]:
+        node = self._node.css_first(selector)
+        return _LexborNode(node) if node is not None else None
+
+    def find_next_sibling(self, name: Optional[str] = None) -> Optional[HtmlNode]:
+        node = self._node.next
+        while node is not None:
+            if node.is_element_node and (name is None or node.tag == name):
+                return _LexborNode(node)
+            node = node.next
+        return None
+
+    def find_parent(self, name: Optional[str] = None) -> Optional[HtmlNode]:
+        node = self._node.parent
+        while node is not None and node.is_element_node:
+            if name is None or node.tag == name:
+                return _LexborNode(node)
+            node = node.parent
+        return None
+
+    @property
+    def children(self) -> List[HtmlNode]:
+        return [_LexborNode(node) for node in self._node.iter() if node.is_element_node]
+
+    @property
+    def descendants(self) -> Iterator[HtmlNode]:
+        nodes = self._node.traverse()
+        next(nodes, None)  # traverse 會先返回自身
+        return (_LexborNode(node) for node in nodes if node.is_element_node)
+
+    def walk(self) -> Iterator[Tuple[str, Any]]:
+        stack = [iter((self._node,))]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+                if stack:
+                    yield "end", None
+            elif node.is_element_node:
+                yield "start", _LexborNode(node)
+                stack.append(node.iter(include_text=True))
+            elif node.is_text_node:
+                yield ("hidden" if node.parent.tag in NON_TEXT_TAGS else "text"), node.text_content
+            elif node.is_comment_node:
+                yield "hidden", node.comment_content
+
+
+_fallback_warned = False
+
+def parse_html(html: str, backend: Optional[str] = None) -> HtmlNode:
+    """
+    將 HTML 字串解析為 `HtmlNode`。
+
+    Args:
+        html (str): 原始 HTML。
+        backend (Optional[str]): "lexbor" 或 "bs4"；預設取 `settings.parser.html_backend`。
+
+    Returns:
+        HtmlNode: 文件的根節點。
+    """
+    global _fallback_warned
+    backend = backend or settings.parser.html_backend
+    if backend == "lexbor":
+        if LexborHTMLParser is not None:
+            return _LexborNode(LexborHTMLParser(html).root)
+        if not _fallback_warned:
+            logger.warning("selectolax 未安裝，HTML 解析回退到 BeautifulSoup (html.parser)。")
+            _fallback_warned = True
+    return _SoupNode(BeautifulSoup(html, "html.parser"))
+
+
+_SCRIPT_END_RE = re.compile(r"</script\s*>", re.IGNORECASE)
+
+@lru_cache(maxsize=16)
+def _script_open_re(element_id: str) -> "re.Pattern[str]":
+    return re.compile(
+        r"<script\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*?\bid\s*=\s*([\"']?)"
+        + re.escape(element_id)
+        + r"\1(?=[\s/>])(?:\"[^\"]*\"|'[^']*'|[^'\">])*>",
+        re.IGNORECASE,
+    )
+
+def find_script_text(html: str, element_id: str) -> Optional[str]:
+    """
+    直接在原始 HTML 中找出 `<script id="...">` 的內容，不建立 DOM。
+
+    script 的內容是原始文字 (不含實體或子標籤)，因此結果與
+    `parse_html(html).select_one(f"script#{element_id}").string` 相同，
+    適合只需要 `__NEXT_DATA__` 之類內嵌 JSON 的大型頁面。
+
+    Returns:
+        Optional[str]: script 的內容 (空標籤為空字串)；找不到該標籤時返回 None。
+    """
+    opening = _script_open_re(element_id).search(html)
+    if not opening:
+        return None
+    closing = _SCRIPT_END_RE.search(html, opening.end())
+    # 與 HTML 解析器一致：未閉合的 script 延伸到文件結尾
+    return html[opening.end():closing.start() if closing else len(html)]
+
+
+# 標記 (HTML 註解、script/style/template 區塊及其內容、一般標籤) 的單一正則，
+# 與 BeautifulSoup(html.parser).get_text() 丟棄的內容一致；未閉合的註解或標籤保留為文字
+_MARKUP_RE = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style|template)\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*>.*?(?:</\1\s*>|$)"
+    r"|</?[a-zA-Z!?](?:\"[^\"]*\"|'[^']*'|[^'\">])*>",
+    re.DOTALL | re.IGNORECASE,
+)
+# 只轉換有結尾 (分號或非字元) 的實體，避免 html.unescape 對 "&copy2" 之類的前綴匹配
+_ENTITY_RE = re.compile(r"&(?:#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*)(?:;|(?=[^;a-zA-Z0-9]))")
+_CLEAN_TEXT_CACHE_MAX_LEN = 64  # 只快取短字串 (地點、學歷等重複出現的標籤)
+
+def _unescape_entity(match: "re.Match[str]") -> str:
+    entity = match.group()
+    if entity[1] != "#" and entity[1:].rstrip(";") + ";" not in html5_entities:
+        return entity  # 未知的具名實體原樣保留
+    return html.unescape(entity)
+
+def _normalize_text(text: str) -> str:
+    """移除標記、反轉義實體並合併空白；不含 `<` 或 `&` 的純文字跳過前兩步。"""
+    if "<" in text or "&" in text:
+        text = _ENTITY_RE.sub(_unescape_entity, _MARKUP_RE.sub("", text))
+    return " ".join(text.split())
+
+_clean_short_text = lru_cache(maxsize=4096)(_normalize_text)
 
 def clean_text(text: Optional[str]) -> Optional[str]:
+    """
+    將可能含有 HTML 的字串正規化為純文字：移除標籤、反轉義實體、合併空白。
+
+    一般的標籤、註解與已知實體與 `BeautifulSoup(text, "html.parser").get_text()`
+    再合併空白的結果相同，但不建立解析樹；短字串的結果會被快取。
+
+    已知的差異在於未知的具名實體：此處原樣保留，html.parser 則會吞掉它們，
+    例如字串結尾的 "AT&T"、"P&G"、"Q&A"、"R&D" 會變成 "ATT"、"PG"、"QA"、"RD"，
+    "&notit;" 會失去分號。職缺中的公司名與縮寫保持原文才是正確的結果。
+    """
     if isinstance(text, str):
-        # First, remove HTML tags
-        soup = BeautifulSoup(text, "html.parser")
-        cleaned_text = soup.get_text()
-        # Then, remove extra whitespace and strip leading/trailing whitespace
-        return ' '.join(cleaned_text.split()).strip()
+        if len(text) <= _CLEAN_TEXT_CACHE_MAX_LEN:
+            return _clean_short_text(text)
+        return _normalize_text(text)
     return text
 
-def safe_extract_text(tag: Optional[Tag], default: Optional[str] = None) -> Optional[str]:
-    if isinstance(tag, Tag):
+def safe_extract_text(tag: Optional[Union[HtmlNode, Tag]], default: Optional[str] = None) -> Optional[str]:
+    if isinstance(tag, (HtmlNode, Tag)):
         return clean_text(tag.get_text())
-    return default
\ No newline at end of file
+    return default
@@ -0,0 +1,158 @@
+# crawler/validators.py
+"""HTTP 條件請求的驗證器快取 (Validator Cache for Conditional Requests)。
+
+詳情頁重新抓取時，多數頁面內容並未改變。此模組在 Redis 中按 URL 保存
+詳情響應的 `ETag` / `Last-Modified`，下次抓取時帶上 `If-None-Match` /
+`If-Modified-Since`；伺服器返回 304 時 DetailFetcher 拋出 `NotModifiedError`，
+Orchestrator 將其視為「未變更」，跳過解析與 `upsert_jobs`。
+
+新的驗證器不會立即寫入 Redis，而是先暫存在記憶體中，由 `DetailsSink`
+在對應的 Job 寫入資料庫之後才提交。這樣即使解析或寫入失敗，下次抓取
+也不會因為 304 而漏掉從未入庫的職缺。
+"""
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, Iterable
+
+import redis
+from redis.client import Redis as RedisClient
+
+from crawler.cache import get_redis_client
+from crawler.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class NotModifiedError(Exception):
+    """詳情頁返回 304 Not Modified，內容自上次成功抓取後未變更。"""
+    def __init__(self, url: str):
+        super().__init__(f"{url} not modified since last crawl.")
+        self.url = url
+
+
+class ValidatorCache:
+    """
+    單一平台的驗證器快取，以 `validators:{platform}:{url}` 為鍵存放 Redis hash。
+
+    Attributes:
+        platform (str): 平台值，例如 "platform_1111"。
+        ttl (int): 驗證器在 Redis 中的保留秒數。
+    """
+    def __init__(self, platform: str, client: RedisClient, ttl: int):
+        self.platform = platform
+        self.redis = client
+        self.ttl = ttl
+        self._staged: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, url: str) -> str:
+        return f"validators:{self.platform}:{url}"
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """返回該 URL 的條件請求標頭；沒有快取或 Redis 不可用時返回空字典。"""
+        try:
+            cached = self.redis.hgetall(self._key(url))
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法讀取驗證器，改為無條件請求 ({url}): {e}")
+            return {}
+
+        headers = {}
+        if etag := cached.get("etag"):
+            headers["If-None-Match"] = etag
+        if last_modified := cached.get("last_modified"):
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    async def conditional_headers_async(self, url: str) -> Dict[str, str]:
+        """`conditional_headers` 的非同步版本，在線程池中讀取 Redis，不阻塞事件循環。"""
+        return await asyncio.to_thread(self.conditional_headers, url)
+
+    def check(self, url: str, response: Any) -> None:
+        """
+        檢查詳情響應：304 時拋出 `NotModifiedError`，否則暫存響應中的驗證器。
+        同時適用於 `requests.Response` 與 `httpx.Response`。只操作記憶體中的
+        暫存區，不訪問 Redis，非同步 DetailFetcher 可直接調用。
+
+        Raises:
+            NotModifiedError: 伺服器返回 304。
+        """
+        if response.status_code == 304:
+            raise NotModifiedError(url)
+
+        validators = {}
+        if etag := response.headers.get("ETag"):
+            validators["etag"] = etag
+        if last_modified := response.headers.get("Last-Modified"):
+            validators["last_modified"] = last_modified
+        if validators:
+            with self._lock:
+                self._staged[url] = validators
+
+    def commit(self, urls: Iterable[str]) -> None:
+        """將已成功入庫的 URL 的暫存驗證器寫入 Redis。"""
+        with self._lock:
+            staged = {url: self._staged.pop(url) for url in urls if url in self._staged}
+        if not staged:
+            return
+
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            for url, validators in staged.items():
+                key = self._key(url)
+                pipe.delete(key)
+                pipe.hset(key, mapping=validators)
+                pipe.expire(key, self.ttl)
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法寫入 {len(staged)} 筆驗證器: {e}")
+
+    def discard(self, urls: Iterable[str]) -> None:
+        """丟棄處理失敗的 URL 的暫存驗證器。"""
+        with self._lock:
+            for url in urls:
+                self._staged.pop(url, None)
+
+
+class _NoopValidatorCache:
+    """條件請求停用或 Redis 不可用時使用的空實現，始終發出無條件請求。"""
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        return {}
+
+    async def conditional_headers_async(self, url: str) -> Dict[str, str]:
+        return {}
+
+    def check(self, url: str, response: Any) -> None:
+        return None
+
+    def commit(self, urls: Iterable[str]) -> None:
+        return None
+
+    def discard(self, urls: Iterable[str]) -> None:
+        return None
+
+
+_validator_caches: Dict[str, Any] = {}
+_validator_caches_lock = threading.Lock()
+
+def get_validator_cache(platform: str):
+    """
+    獲取平台共享的驗證器快取。DetailFetcher 與 DetailsSink 透過同一實例
+    傳遞暫存的驗證器。`settings.http.conditional_requests` 為 False 或 Redis
+    無法初始化時返回空實現。
+    """
+    cache = _validator_caches.get(platform)
+    if cache is None:
+        with _validator_caches_lock:
+            cache = _validator_caches.get(platform)
+            if cache is None:
+                if not settings.http.conditional_requests:
+                    cache = _NoopValidatorCache()
+                else:
+                    try:
+                        cache = ValidatorCache(platform, get_redis_client(), settings.http.validator_ttl)
+                    except RuntimeError as e:
+                        logger.error(f"[{platform}] 驗證器快取初始化失敗，將發出無條件請求: {e}")
+                        cache = _NoopValidatorCache()
+                _validator_caches[platform] = cache
+    return cache
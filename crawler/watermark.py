@@ -0,0 +1,154 @@
+# crawler/watermark.py
+"""增量發現的高水位標記 (High-Water Marks for Incremental Discovery)。
+
+各平台的列表端點都按最新排序 (104 `order=16`、1111 `sortBy=da`、
+Yes123 `order_by=m_date`)。此模組在 Redis 中為每個分類記錄上一次抓取時
+見過的最新職缺日期 (列表沒有日期的平台則記錄見過的職缺連結)，讓 UrlFetcher
+在翻到「整頁都是舊職缺」時即可停止，而不必每次都翻滿 `max_pages`。
+
+標記只在該分類的 URL 成功寫入資料庫後才提交：UrlFetcher 把完整抓取的
+分類追蹤器放入 `pending_watermarks`，由 Orchestrator 在 `upsert_urls` 成功後
+調用 `commit_watermarks`，寫入失敗時下次仍會重新翻到這些頁面。
+
+Redis 不可用或平台關閉 `incremental_discovery` 時，所有分類都會退回全量翻頁。
+"""
+import logging
+import time
+from typing import Iterable, List, Optional, Set
+
+import redis
+from redis.client import Redis as RedisClient
+
+from crawler.cache import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# 高水位標記保留 30 天；超過此時間未抓取的分類會重新全量翻頁
+WATERMARK_TTL = 30 * 86400
+# 列表沒有日期的平台記錄見過的職缺連結：只保留此時間窗內見過的、最近的若干筆
+KNOWN_WINDOW = WATERMARK_TTL
+KNOWN_MAX_ENTRIES = 10000
+
+
+class WatermarkStore:
+    """以 `hwm:{platform}:{category_id}` 為鍵存放各分類高水位的 Redis 儲存。"""
+    def __init__(self, platform: str, client: RedisClient):
+        self.platform = platform
+        self.redis = client
+
+    def _key(self, category_id: str) -> str:
+        return f"hwm:{self.platform}:{category_id}"
+
+    def _known_key(self, category_id: str) -> str:
+        return f"hwm:{self.platform}:{category_id}:known"
+
+    def get(self, category_id: str) -> Optional[str]:
+        try:
+            return self.redis.get(self._key(category_id))
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法讀取分類 {category_id} 的高水位，將全量翻頁: {e}")
+            return None
+
+    def set(self, category_id: str, value: str) -> None:
+        try:
+            self.redis.set(self._key(category_id), value, ex=WATERMARK_TTL)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法更新分類 {category_id} 的高水位: {e}")
+
+    def all_known(self, category_id: str, job_ids: List[str]) -> bool:
+        """以 ZMSCORE 判斷 `job_ids` 是否都在已知職缺中，不載入整個集合。"""
+        try:
+            scores = self.redis.zmscore(self._known_key(category_id), job_ids)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法讀取分類 {category_id} 的已知職缺，將繼續翻頁: {e}")
+            return False
+        return all(score is not None for score in scores)
+
+    def add_known(self, category_id: str, job_ids: Iterable[str]) -> None:
+        """
+        以最後見到的時間為分數記錄職缺連結，並修剪超出 `KNOWN_WINDOW` 或
+        `KNOWN_MAX_ENTRIES` 的舊項目，讓集合大小維持在列表實際的規模。
+        """
+        key = self._known_key(category_id)
+        now = time.time()
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.zadd(key, {job_id: now for job_id in job_ids})
+            pipe.zremrangebyscore(key, "-inf", now - KNOWN_WINDOW)
+            pipe.zremrangebyrank(key, 0, -KNOWN_MAX_ENTRIES - 1)
+            pipe.expire(key, WATERMARK_TTL)
+            pipe.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"[{self.platform}] 無法更新分類 {category_id} 的已知職缺: {e}")
+
+
+class CategoryWatermark:
+    """
+    單一分類在一次 URL 發現中的高水位追蹤器。
+
+    建立時讀取上次的標記 (`previous`)，翻頁過程中記錄本次見到的最新值
+    (`latest`) 或職缺連結 (`seen`)，只有在分類完整抓取且 URL 寫入資料庫後
+    調用 `commit` 才會寫回，避免中途失敗時跳過尚未抓取或尚未保存的頁面。
+    """
+    def __init__(self, store: Optional[WatermarkStore], category_id: str):
+        self.store = store
+        self.category_id = category_id
+        self.previous = store.get(category_id) if store else None
+        self.latest: Optional[str] = None
+        self.seen: Set[str] = set()
+
+    def is_stale_page(self, keys: List[Optional[str]]) -> bool:
+        """
+        記錄一頁職缺的排序鍵 (可比較的日期字串)，並判斷整頁是否都早於上次的高水位。
+
+        與高水位同一天的職缺不視為舊職缺，避免漏抓同日新刊登的職缺；
+        任何一筆缺少排序鍵時也不會停止翻頁。
+        """
+        valid = [k for k in keys if k]
+        if valid and (self.latest is None or max(valid) > self.latest):
+            self.latest = max(valid)
+
+        if not self.previous or not keys or len(valid) != len(keys):
+            return False
+        return all(k < self.previous for k in valid)
+
+    def is_known_page(self, job_ids: List[str]) -> bool:
+        """
+        適用於列表中沒有日期的平台：記錄本頁的職缺 ID，並判斷整頁是否都是
+        先前抓取時見過的職缺。
+
+        不能只以上次最新的一筆職缺作為標記：該職缺被修改後會重新排到最前面，
+        翻到它時後面仍可能有上次之後刊登的新職缺。整頁都已知才停止翻頁。
+        """
+        self.seen.update(job_ids)
+        if not self.store or not job_ids:
+            return False
+        return self.store.all_known(self.category_id, job_ids)
+
+    def commit(self) -> None:
+        if not self.store:
+            return
+        # 只向前推進：第一頁就全是舊職缺時，latest 會早於上次的標記
+        if self.latest and (self.previous is None or self.latest > self.previous):
+            self.store.set(self.category_id, self.latest)
+        if self.seen:
+            self.store.add_known(self.category_id, self.seen)
+
+
+def commit_watermarks(watermarks: List[CategoryWatermark]) -> None:
+    """提交並清空 UrlFetcher 累積的分類高水位；應在 URL 成功寫入資料庫後調用。"""
+    while watermarks:
+        watermarks.pop().commit()
+
+
+def get_watermark_store(platform: str, enabled: bool) -> Optional[WatermarkStore]:
+    """
+    返回平台的高水位儲存；未啟用增量發現或 Redis 無法連接時返回 None (全量翻頁)。
+    """
+    if not enabled:
+        return None
+    try:
+        return WatermarkStore(platform, get_redis_client())
+    except RuntimeError as e:
+        logger.warning(f"[{platform}] 無法初始化高水位儲存，將全量翻頁: {e}")
+        return None
@@ -10,12 +10,11 @@ from crawler.enums import SourcePlatform
 from airflow.operators.python import PythonOperator
 
 
-def _run_celery_task(task_name: str, **kwargs):
-    """Helper function to run Celery tasks."""
-    from celery import Celery
-    from crawler.app import celery_app
+def _run_celery_task(task_name: str, kwargs: Optional[dict] = None):
+    """Helper function to run Celery tasks; `kwargs` are passed to the task as keyword arguments."""
+    from crawler.app import app as celery_app
 
-    celery_app.send_task(task_name, kwargs=kwargs)
+    celery_app.send_task(task_name, kwargs=kwargs or {})
 
 
 def create_category_task(dag: DAG, platform: SourcePlatform) -> Optional[BaseOperator]:
@@ -57,9 +56,9 @@ def create_urls_task(
         dag=dag,
     )
 
-def create_details_task(dag: DAG, platform: SourcePlatform, limit: int = 5000) -> BaseOperator:
-    """創建一個觸發職缺詳情抓取流程的 Airflow task。"""
-    task_kwargs = {"platform_name": platform.value, "limit": limit}
+def create_details_task(dag: DAG, platform: SourcePlatform, limit: int = 5000, mode: str = "thread") -> BaseOperator:
+    """創建一個觸發職缺詳情抓取流程的 Airflow task。`mode` 為 "thread" 或 "async"。"""
+    task_kwargs = {"platform_name": platform.value, "limit": limit, "mode": mode}
 
     return PythonOperator(
         task_id=f"{platform.value}_details",
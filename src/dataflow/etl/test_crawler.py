@@ -0,0 +1,30 @@
+import pytest
+
+pytest.importorskip("airflow")
+
+from crawler import app
+from crawler.enums import SourcePlatform
+from src.dataflow.etl import crawler as etl
+
+
+def test_details_task_sends_its_kwargs_to_celery(monkeypatch):
+    sent = []
+    monkeypatch.setattr(app.app, "send_task", lambda name, **options: sent.append((name, options)))
+    task = etl.create_details_task(None, SourcePlatform.PLATFORM_104, limit=100, mode="async")
+
+    task.python_callable(**task.op_kwargs)
+
+    assert sent == [(
+        "crawler.run_details_pipeline",
+        {"kwargs": {"platform_name": "platform_104", "limit": 100, "mode": "async"}},
+    )]
+
+
+def test_tasks_without_kwargs_send_an_empty_mapping(monkeypatch):
+    sent = []
+    monkeypatch.setattr(app.app, "send_task", lambda name, **options: sent.append((name, options)))
+    task = etl.create_category_task(None, SourcePlatform.PLATFORM_1111)
+
+    task.python_callable(**task.op_kwargs)
+
+    assert sent == [("platform_1111.run_category_pipeline", {"kwargs": {}})]